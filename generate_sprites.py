@@ -5,21 +5,140 @@ Generates all game sprites as high-quality pixel art PNGs with transparency.
 Features: richer palettes, dark outlines, dithering, consistent top-left lighting.
 """
 
-from PIL import Image, ImageDraw
-import os
+import functools
+import importlib
+import io
 import math
+import os
+import random
+import sys
+import threading
+import time
 
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "sprites")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Importing this module must stay cheap and side-effect free (no directory
+# creation, no heavy imports) so test runners, benchmarks and watchers can
+# load it freely.  check_import_time() enforces the budget.
+IMPORT_BUDGET_MS = 15.0
+# Loaded lazily or inside the functions that need them, never at import
+DEFERRED_MODULES = ("numpy", "PIL", "argparse", "subprocess", "json", "hashlib", "inspect", "socket")
+
+
+class _LazyModule:
+    """Placeholder for a heavy module, imported on first attribute access.
+
+    On first use the real module replaces the placeholder in this module's
+    globals, so later lookups cost nothing extra.
+    """
+
+    def __init__(self, alias, name):
+        self._alias = alias
+        self._name = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+
+Image = _LazyModule("Image", "PIL.Image")
+np = _LazyModule("np", "numpy")
+
+
+def write_atomic(path, data):
+    """Write bytes via a hidden temp file and rename, so readers never see a partial file."""
+    directory, base = os.path.split(path)
+    tmp = os.path.join(directory, f".{base}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
 
-def save(img, name):
-    path = os.path.join(OUTPUT_DIR, name)
-    img.save(path)
-    print(f"  Created: {name} ({img.width}x{img.height})")
 
+def write_if_changed(path, data):
+    """write_atomic() unless the file already holds exactly these bytes; returns True if written.
 
-def px(img, x, y, color):
+    Leaving identical files alone keeps their mtime, so Godot's editor and
+    headless exports don't reimport them.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    write_atomic(path, data)
+    return True
+
+
+def encode_png(img):
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+# While render() runs on a thread, save() collects images here instead of
+# writing files
+_capture = threading.local()
+
+
+def save(img, name):
+    captured = getattr(_capture, "images", None)
+    if captured is not None:
+        captured[name] = img
+        return
+    _, changed = write_sprite(os.path.join(OUTPUT_DIR, name), encode_png(img), img)
+    print(f"  {'Created' if changed else 'Unchanged'}: {name} ({img.width}x{img.height})")
+
+
+def save_data(data, name):
+    """Like save() for a non-image companion file, such as glyph metrics."""
+    captured = getattr(_capture, "files", None)
+    if captured is not None:
+        captured[name] = data
+        return
+    if write_if_changed(os.path.join(OUTPUT_DIR, name), data):
+        print(f"  Created: {name}")
+
+
+# Reusable RGBA canvases keyed by size.  Generators take a cleared canvas
+# from new_canvas(); whoever is provably done with an image (the write
+# pipeline after encoding, flatten_layers for its inputs) hands it back with
+# release_canvas(), so batch and variant renders stop allocating pixel buffers.
+CANVAS_POOL_LIMIT = 8
+_canvas_pool = {}
+_canvas_lock = threading.Lock()
+canvas_stats = {"allocated": 0, "reused": 0}
+
+
+def new_canvas(width, height):
+    """A fully transparent RGBA canvas, recycled from the pool when possible."""
+    with _canvas_lock:
+        free = _canvas_pool.get((width, height))
+        img = free.pop() if free else None
+        canvas_stats["reused" if img else "allocated"] += 1
+    if img is None:
+        return Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    img.paste((0, 0, 0, 0), (0, 0, width, height))
+    img.info.clear()
+    return img
+
+
+def release_canvas(img):
+    """Return an RGBA image nobody will touch again to the pool."""
+    if img.mode != "RGBA" or img.readonly:
+        return
+    with _canvas_lock:
+        free = _canvas_pool.setdefault(img.size, [])
+        if len(free) < CANVAS_POOL_LIMIT and not any(c is img for c in free):
+            free.append(img)
+
+
+# Reference primitives: deliberately simple pure-PIL loops.  Generators call
+# px/fill_rect/... which are bound to the fast versions further down; these
+# stay as the oracle that fuzz_backends() checks the fast ones against.
+
+def px_reference(img, x, y, color):
     """Set a single pixel with bounds checking."""
     if 0 <= x < img.width and 0 <= y < img.height:
         img.putpixel((x, y), color)
@@ -32,14 +151,14 @@ def get_px(img, x, y):
     return (0, 0, 0, 0)
 
 
-def fill_rect(img, x1, y1, x2, y2, color):
+def fill_rect_reference(img, x1, y1, x2, y2, color):
     """Fill a rectangle of pixels."""
     for yy in range(max(0, y1), min(img.height, y2 + 1)):
         for xx in range(max(0, x1), min(img.width, x2 + 1)):
             img.putpixel((xx, yy), color)
 
 
-def draw_ellipse_filled(img, x1, y1, x2, y2, color):
+def draw_ellipse_filled_reference(img, x1, y1, x2, y2, color):
     """Draw a filled ellipse pixel by pixel."""
     cx = (x1 + x2) / 2.0
     cy = (y1 + y2) / 2.0
@@ -49,10 +168,10 @@ def draw_ellipse_filled(img, x1, y1, x2, y2, color):
         for xx in range(x1, x2 + 1):
             if rx > 0 and ry > 0:
                 if ((xx - cx) ** 2) / (rx ** 2) + ((yy - cy) ** 2) / (ry ** 2) <= 1.0:
-                    px(img, xx, yy, color)
+                    px_reference(img, xx, yy, color)
 
 
-def add_outline(img, outline_color=(10, 10, 15, 255)):
+def add_outline_reference(img, outline_color=(10, 10, 15, 255)):
     """Add a 1px dark outline around all non-transparent pixels."""
     w, h = img.size
     outline_pixels = []
@@ -72,17 +191,35 @@ def add_outline(img, outline_color=(10, 10, 15, 255)):
         img.putpixel((x, y), outline_color)
 
 
-def dither_rect(img, x1, y1, x2, y2, color1, color2, pattern="checker"):
-    """Fill a rect with a dithering pattern between two colors."""
+def dither_rect_reference(img, x1, y1, x2, y2, color1, color2, pattern="checker"):
+    """Fill a rect with a dithering pattern between two colors.
+
+    color1 lands where the pattern threshold is below one half.  Thresholds
+    are worked out per pixel here, not read from DITHER_PATTERNS, so this
+    stays an independent oracle for the fast backend.
+    """
+    bayer_sizes = {"bayer2": 2, "bayer4": 4, "bayer8": 8}
+    if pattern not in ("checker", "horizontal", "vertical") and pattern not in bayer_sizes:
+        known = sorted(["checker", "horizontal", "vertical", *bayer_sizes])
+        raise ValueError(f"Unknown dither pattern {pattern!r}; expected one of {known}")
+    size = bayer_sizes.get(pattern, 0)
     for yy in range(max(0, y1), min(img.height, y2 + 1)):
         for xx in range(max(0, x1), min(img.width, x2 + 1)):
             if pattern == "checker":
-                c = color1 if (xx + yy) % 2 == 0 else color2
+                first = (xx + yy) % 2 == 0
             elif pattern == "horizontal":
-                c = color1 if yy % 2 == 0 else color2
+                first = yy % 2 == 0
             elif pattern == "vertical":
-                c = color1 if xx % 2 == 0 else color2
-            img.putpixel((xx, yy), c)
+                first = xx % 2 == 0
+            else:
+                # Bayer rank: each bit level of (x, y) picks a 2x2 quadrant,
+                # the lowest bits weighing most
+                rank, bit = 0, 1
+                while bit < size:
+                    rank = rank * 4 + ((0, 2), (3, 1))[bool(yy & bit)][bool(xx & bit)]
+                    bit *= 2
+                first = 2 * rank < size * size
+            img.putpixel((xx, yy), color1 if first else color2)
 
 
 def blend_color(c1, c2, t):
@@ -90,30 +227,798 @@ def blend_color(c1, c2, t):
     return tuple(int(c1[i] + (c2[i] - c1[i]) * t) for i in range(4))
 
 
+# ============================================================
+# PALETTES & RAMPS - Shared colour ramps and lookup tables
+# ============================================================
+# Named palettes run brightest to darkest.  Generators unpack them into
+# their usual local names, so a palette can be tuned or swapped in one
+# place and every sprite that uses it follows.
+#
+# The tables live here rather than in a module of their own on purpose:
+# watch() only polls and re-parses this file, generator_version() hashes
+# it to stamp the manifest, and the golden check renders it from git HEAD
+# on its own.  A palette edit in another file would slip past all three.
+PALETTES = {
+    # Knight plate: highlight, light, base, mid shadow, dark, deepest shadow
+    "steel": (
+        (160, 200, 235, 255), (120, 170, 210, 255), (70, 130, 180, 255),
+        (50, 100, 155, 255), (35, 70, 120, 255), (20, 45, 85, 255),
+    ),
+    "forest": (
+        (90, 190, 95, 255), (60, 160, 70, 255), (34, 120, 50, 255),
+        (25, 95, 38, 255), (18, 70, 25, 255), (10, 48, 15, 255),
+    ),
+    "arcane": (
+        (180, 130, 220, 255), (150, 100, 200, 255), (110, 60, 170, 255),
+        (85, 40, 145, 255), (60, 25, 110, 255), (38, 12, 75, 255),
+    ),
+    "crimson": (
+        (230, 100, 90, 255), (200, 65, 55, 255), (170, 40, 35, 255),
+        (140, 28, 25, 255), (105, 18, 15, 255), (70, 10, 8, 255),
+    ),
+    "charcoal": (
+        (120, 120, 130, 255), (90, 90, 100, 255), (60, 60, 70, 255),
+        (45, 45, 55, 255), (30, 30, 40, 255), (18, 18, 25, 255),
+    ),
+    # Slime gel: specular first, then the six body steps
+    "slime": (
+        (200, 255, 210, 255), (130, 245, 130, 255), (80, 220, 80, 255),
+        (50, 180, 50, 255), (30, 140, 30, 255), (15, 100, 15, 255), (8, 65, 8, 255),
+    ),
+    "bone": (
+        (250, 248, 240, 255), (240, 235, 225, 255), (225, 215, 195, 255),
+        (200, 190, 170, 255), (170, 160, 140, 255), (130, 120, 100, 255),
+    ),
+    "dark_metal": (
+        (140, 140, 155, 255), (110, 110, 125, 255), (80, 80, 95, 255),
+        (55, 55, 68, 255), (35, 35, 48, 255), (18, 18, 28, 255),
+    ),
+    # Fireball core to rim: white-hot, yellow, bright orange, orange,
+    # red-orange, red, dark red
+    "fire": (
+        (255, 255, 240, 255), (255, 245, 120, 255), (255, 190, 40, 255),
+        (255, 130, 25, 255), (240, 80, 20, 255), (210, 40, 15, 255), (150, 20, 8, 255),
+    ),
+    # XP gems: specular first, then the six body steps
+    "gem_blue": (
+        (235, 245, 255, 255), (150, 190, 255, 255), (95, 145, 255, 255),
+        (55, 105, 235, 255), (38, 75, 200, 255), (25, 48, 160, 255), (15, 28, 110, 255),
+    ),
+    "gem_green": (
+        (240, 255, 240, 255), (160, 255, 170, 255), (95, 235, 115, 255),
+        (45, 200, 75, 255), (28, 160, 55, 255), (16, 120, 40, 255), (6, 80, 28, 255),
+    ),
+    "gem_red": (
+        (255, 240, 235, 255), (255, 160, 150, 255), (255, 105, 95, 255),
+        (225, 48, 48, 255), (180, 30, 36, 255), (135, 20, 30, 255), (88, 10, 20, 255),
+    ),
+    "gem_diamond": (
+        (255, 255, 255, 255), (242, 246, 255, 255), (218, 228, 252, 255),
+        (188, 202, 242, 255), (152, 168, 218, 255), (116, 128, 188, 255), (80, 86, 142, 255),
+    ),
+    "skin": ((225, 185, 145, 255), (195, 155, 115, 255)),
+    # Elite enemies: glint, rim light, then gold from bright to deepest shadow
+    "elite_gold": (
+        (255, 252, 225, 255), (255, 240, 160, 255), (250, 215, 90, 255),
+        (230, 180, 50, 255), (200, 145, 35, 255), (160, 110, 25, 255),
+        (120, 78, 18, 255), (80, 48, 12, 255),
+    ),
+    # Belt buckles and pommels: base, highlight
+    "trim_gold": ((200, 170, 40, 255), (240, 215, 80, 255)),
+}
+
+
+def _frozen(arr):
+    arr.flags.writeable = False
+    return arr
+
+
+@functools.lru_cache(maxsize=256)
+def ramp(c1, c2, steps):
+    """N-step uint8 ramp from c1 to c2 (inclusive), matching blend_color rounding.
+
+    Memoised by endpoints and step count; the returned array is read-only.
+    """
+    t = np.linspace(0.0, 1.0, steps)[:, None]
+    a = np.array(c1, dtype=np.float64)
+    b = np.array(c2, dtype=np.float64)
+    return _frozen((a + (b - a) * t).astype(np.uint8))
+
+
+@functools.lru_cache(maxsize=256)
+def ramp_through(stops, steps):
+    """N-step ramp through several colour stops spaced evenly along it."""
+    stops = np.array(stops, dtype=np.float64)
+    pos = np.linspace(0.0, len(stops) - 1, steps)
+    lo = np.minimum(pos.astype(np.intp), len(stops) - 2)
+    t = (pos - lo)[:, None]
+    return _frozen((stops[lo] + (stops[lo + 1] - stops[lo]) * t).astype(np.uint8))
+
+
+def _as_key(colors):
+    """Palette arguments as a hashable key: a PALETTES name or a tuple of tuples."""
+    if isinstance(colors, str):
+        return colors
+    return tuple(tuple(int(v) for v in c) for c in colors)
+
+
+@functools.lru_cache(maxsize=256)
+def palette_array(colors):
+    """Read-only (n, 4) uint8 table for a tuple of RGBA colours or a PALETTES name."""
+    if isinstance(colors, str):
+        colors = PALETTES[colors]
+    return _frozen(np.array(colors, dtype=np.uint8))
+
+
+def ramp_lookup(table, field):
+    """Map a float field in [0, 1] onto a colour table: 0 -> table[0], 1 -> table[-1]."""
+    table = np.asarray(table)
+    idx = np.rint(np.clip(field, 0.0, 1.0) * (len(table) - 1)).astype(np.intp)
+    return table[idx]
+
+
+def gradient_fill(img, mask, colors, field):
+    """Smooth (undithered) counterpart of dither_gradient."""
+    paint_mask(img, mask, ramp_lookup(palette_array(_as_key(colors)), field))
+
+
+# ============================================================
+# DITHERING ENGINE - Ordered (Bayer) and error-diffusion fills
+# ============================================================
+# Everything here works on whole-canvas numpy arrays: a boolean mask picks
+# the region, a float field in [0, 1] says how far along a palette ramp each
+# pixel sits, and a threshold matrix tiled in canvas coordinates decides the
+# pattern.  Thresholds are anchored to the canvas (not the region), so two
+# adjacent calls with the same pattern line up seamlessly.
+
+def bayer_matrix(n):
+    """Ordered-dither threshold matrix of size n x n (n a power of two), values in [0, 1)."""
+    if n < 1 or n & (n - 1):
+        raise ValueError(f"Bayer matrix size must be a power of two, got {n}")
+    m = np.zeros((1, 1))
+    while m.shape[0] < n:
+        m = np.block([[4 * m, 4 * m + 2], [4 * m + 3, 4 * m + 1]])
+    return m / (n * n)
+
+
+# Explicit threshold rows, or an int for a Bayer matrix of that size
+DITHER_PATTERNS = {
+    "checker": ((0.0, 0.5), (0.5, 0.0)),
+    "horizontal": ((0.0,), (0.5,)),
+    "vertical": ((0.0, 0.5),),
+    "bayer2": 2,
+    "bayer4": 4,
+    "bayer8": 8,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def dither_matrix(pattern):
+    """Look up a threshold matrix by name, rejecting unknown patterns."""
+    try:
+        spec = DITHER_PATTERNS[pattern]
+    except KeyError:
+        raise ValueError(
+            f"Unknown dither pattern {pattern!r}; expected one of {sorted(DITHER_PATTERNS)}"
+        ) from None
+    return _frozen(bayer_matrix(spec) if isinstance(spec, int) else np.array(spec))
+
+
+def threshold_map(img, pattern="bayer4"):
+    """Tile a dither threshold matrix over the whole canvas."""
+    matrix = dither_matrix(pattern)
+    mh, mw = matrix.shape
+    reps = (-(-img.height // mh), -(-img.width // mw))
+    return np.tile(matrix, reps)[:img.height, :img.width]
+
+
+def rect_mask(img, x1, y1, x2, y2):
+    """Boolean canvas mask for an inclusive rect (clipped like fill_rect)."""
+    mask = np.zeros((img.height, img.width), dtype=bool)
+    mask[max(0, y1):max(0, y2 + 1), max(0, x1):max(0, x2 + 1)] = True
+    return mask
+
+
+def ellipse_mask(img, x1, y1, x2, y2):
+    """Boolean canvas mask matching draw_ellipse_filled's pixel coverage."""
+    cx = (x1 + x2) / 2.0
+    cy = (y1 + y2) / 2.0
+    rx = (x2 - x1) / 2.0
+    ry = (y2 - y1) / 2.0
+    if not (rx > 0 and ry > 0):
+        return np.zeros((img.height, img.width), dtype=bool)
+    ys, xs = np.ogrid[:img.height, :img.width]
+    inside = ((xs - cx) ** 2) / (rx ** 2) + ((ys - cy) ** 2) / (ry ** 2) <= 1.0
+    return inside & (xs >= x1) & (xs <= x2) & (ys >= y1) & (ys <= y2)
+
+
+def linear_field(img, x1, y1, x2, y2):
+    """Float field that runs 0 at (x1, y1) to 1 at (x2, y2), clamped beyond the ends."""
+    ys, xs = np.ogrid[:img.height, :img.width]
+    dx, dy = x2 - x1, y2 - y1
+    length_sq = float(dx * dx + dy * dy) or 1.0
+    return np.clip(((xs - x1) * dx + (ys - y1) * dy) / length_sq, 0.0, 1.0)
+
+
+def level_map(img, steps, regions):
+    """Mask and field for dither_gradient from flat rects of palette steps.
+
+    `regions` are inclusive (x1, y1, x2, y2, step) rects painted in order,
+    later ones on top, for a palette of `steps` colours.  A half step such
+    as 2.5 lands exactly between two colours, so with the "checker" pattern
+    it reproduces dither_rect(step + 1, step).
+    """
+    mask = np.zeros((img.height, img.width), dtype=bool)
+    field = np.zeros((img.height, img.width))
+    for x1, y1, x2, y2, step in regions:
+        region = rect_mask(img, x1, y1, x2, y2)
+        mask |= region
+        field[region] = step / (steps - 1)
+    return mask, field
+
+
+def paint_mask(img, mask, colors):
+    """Write colors under a boolean mask.
+
+    `colors` is either one RGBA tuple or an (h, w, 4) uint8 array.  Pixels
+    are replaced outright, exactly like px/fill_rect.
+    """
+    src = np.empty((img.height, img.width, 4), dtype=np.uint8)
+    src[...] = colors
+    alpha = Image.fromarray(mask.astype(np.uint8) * 255, "L")
+    img.paste(Image.fromarray(src, "RGBA"), (0, 0), alpha)
+
+
+def dither_fill(img, mask, color1, color2, level=0.5, pattern="bayer4"):
+    """Two-colour ordered dither: color1 wherever the threshold is below `level`.
+
+    `level` may be a scalar coverage or a per-pixel float field.
+    """
+    pick = threshold_map(img, pattern) < level
+    colors = np.where(pick[..., None], np.array(color1, np.uint8), np.array(color2, np.uint8))
+    paint_mask(img, mask, colors)
+
+
+def dither_gradient(img, mask, colors, field, pattern="bayer4"):
+    """Ordered-dither a float field across N palette steps.
+
+    `colors` is a PALETTES name or a colour sequence.  field 0 maps to
+    colors[0] and 1 to colors[-1]; between two steps the threshold matrix
+    decides which neighbour each pixel takes.
+    """
+    palette = palette_array(_as_key(colors))
+    if len(palette) == 1:
+        paint_mask(img, mask, palette[0])
+        return
+    scaled = np.clip(field, 0.0, 1.0) * (len(palette) - 1)
+    lo = np.minimum(np.floor(scaled).astype(np.intp), len(palette) - 2)
+    idx = lo + (scaled - lo > threshold_map(img, pattern))
+    paint_mask(img, mask, palette[idx])
+
+
+ERROR_DIFFUSION_KERNELS = {
+    # (dx, dy, weight) relative to the current pixel, scanning left-to-right
+    "floyd-steinberg": ((1, 0, 7 / 16), (-1, 1, 3 / 16), (0, 1, 5 / 16), (1, 1, 1 / 16)),
+    "atkinson": ((1, 0, 1 / 8), (2, 0, 1 / 8), (-1, 1, 1 / 8), (0, 1, 1 / 8),
+                 (1, 1, 1 / 8), (0, 2, 1 / 8)),
+}
+
+
+def dither_error_diffusion(img, mask, colors, field, kernel="floyd-steinberg"):
+    """Error-diffusion dither of a float field across N palette steps.
+
+    Error diffusion is inherently sequential, so the scan runs in Python but
+    only over the mask's bounding box, and error never leaks outside the mask.
+    """
+    try:
+        taps = ERROR_DIFFUSION_KERNELS[kernel]
+    except KeyError:
+        raise ValueError(
+            f"Unknown diffusion kernel {kernel!r}; expected one of {sorted(ERROR_DIFFUSION_KERNELS)}"
+        ) from None
+    palette = palette_array(_as_key(colors))
+    steps = len(palette) - 1
+    ys, xs = np.nonzero(mask)
+    if not len(ys):
+        return
+    y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+    work = (np.clip(np.broadcast_to(field, mask.shape), 0.0, 1.0) * steps)[y0:y1, x0:x1].tolist()
+    inside = mask[y0:y1, x0:x1].tolist()
+    h, w = y1 - y0, x1 - x0
+    idx = np.zeros((h, w), dtype=np.intp)
+    for y in range(h):
+        row = work[y]
+        for x in range(w):
+            if not inside[y][x]:
+                continue
+            q = min(steps, max(0, int(row[x] + 0.5)))
+            idx[y, x] = q
+            err = row[x] - q
+            for dx, dy, wt in taps:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < w and ny < h and inside[ny][nx]:
+                    work[ny][nx] += err * wt
+    full = np.zeros(mask.shape, dtype=np.intp)
+    full[y0:y1, x0:x1] = idx
+    paint_mask(img, mask, palette[full])
+
+
+# ============================================================
+# RADIAL FIELDS - Distance-driven rings, orbs and glows
+# ============================================================
+# Distance from the centre is computed once as an array; bands and falloff
+# curves are then pure array maps, so a 256px aura costs about the same
+# Python work as a 16px one.
+
+def radial_field(img, cx, cy):
+    """Euclidean distance of every pixel from (cx, cy), as an (h, w) float array."""
+    ys, xs = np.ogrid[:img.height, :img.width]
+    dx = xs - cx
+    dy = ys - cy
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def band_lookup(field, limits, values):
+    """Map a field through ascending thresholds like an if/elif `<` chain.
+
+    Values below limits[0] get values[0], ..., values at or above limits[-1]
+    get values[-1], so `values` has one more entry than `limits`.
+    """
+    return np.asarray(values)[np.digitize(field, limits)]
+
+
+FALLOFF_CURVES = {
+    "linear": lambda t: t,
+    "quadratic": lambda t: t * t,
+    "smooth": lambda t: t * t * (3.0 - 2.0 * t),
+    "sqrt": lambda t: np.sqrt(t),
+}
+
+
+def falloff(dist, r_inner, r_outer, curve="linear"):
+    """1.0 inside r_inner, easing to 0.0 at r_outer along the named curve."""
+    try:
+        shape = FALLOFF_CURVES[curve]
+    except KeyError:
+        raise ValueError(f"Unknown falloff curve {curve!r}; expected one of {sorted(FALLOFF_CURVES)}") from None
+    span = max(r_outer - r_inner, 1e-9)
+    return shape(np.clip((r_outer - dist) / span, 0.0, 1.0))
+
+
+def paint_radial(img, cx, cy, r_outer, color, r_inner=0.0, curve="linear", pattern=None):
+    """Soft circular glow centred on (cx, cy).
+
+    With no pattern the falloff scales the colour's alpha; with a dither
+    pattern the colour is drawn solid wherever the falloff beats the
+    threshold, for hard-edged pixel-art glows.
+    """
+    dist = radial_field(img, cx, cy)
+    strength = falloff(dist, r_inner, r_outer, curve)
+    if pattern is None:
+        mask = strength > 0
+        colors = np.empty((img.height, img.width, 4), dtype=np.uint8)
+        colors[..., :3] = color[:3]
+        colors[..., 3] = (color[3] * strength).astype(np.uint8)
+        paint_mask(img, mask & (colors[..., 3] > 0), colors)
+    else:
+        paint_mask(img, (strength > 0) & (threshold_map(img, pattern) < strength), color)
+
+
+def shade_radial(img, cx, cy, r_outer, colors, r_inner=0.0, curve="linear", pattern=None):
+    """Radial shading through a palette: colors[0] at the centre, colors[-1] at r_outer.
+
+    Without a dither pattern the span from r_inner to r_outer splits into
+    equal bands, one per colour, like a stack of concentric filled
+    ellipses; with one, neighbouring steps are ordered-dithered together.
+    """
+    dist = radial_field(img, cx, cy)
+    field = 1.0 - falloff(dist, r_inner, r_outer, curve)
+    mask = dist <= r_outer
+    if pattern is None:
+        palette = palette_array(_as_key(colors))
+        idx = np.minimum((field * len(palette)).astype(np.intp), len(palette) - 1)
+        paint_mask(img, mask, palette[idx])
+    else:
+        dither_gradient(img, mask, colors, field, pattern)
+
+
+# ============================================================
+# LINES & POLYLINES - Array rasteriser for bolts, cracks and strokes
+# ============================================================
+# Lines are rasterised as a whole with an integer DDA (round-half-up on the
+# minor axis), which gives the same staircase as Bresenham for the
+# horizontal, vertical and 45-degree runs used throughout the hand-drawn
+# sprites.  Points are (x, y) rows of an (n, 2) int array and are painted in
+# order: where two writes land on one pixel the later one wins, exactly as a
+# sequence of px() calls would.
+
+def line_points(x0, y0, x1, y1):
+    """Pixels from (x0, y0) to (x1, y1) inclusive, as an (n, 2) int array."""
+    dx, dy = x1 - x0, y1 - y0
+    n = max(abs(dx), abs(dy))
+    if n == 0:
+        return np.array([[x0, y0]])
+    t = np.arange(n + 1)
+    xs = x0 + (2 * dx * t + n) // (2 * n)
+    ys = y0 + (2 * dy * t + n) // (2 * n)
+    return np.stack([xs, ys], axis=1)
+
+
+def _check_polyline(vertices):
+    if len(vertices) < 2:
+        raise ValueError(f"A polyline needs at least 2 vertices, got {len(vertices)}")
+
+
+def polyline_points(vertices):
+    """Rasterise a connected polyline; shared joints appear once."""
+    _check_polyline(vertices)
+    pts = [np.array([vertices[0]])]
+    for (x0, y0), (x1, y1) in zip(vertices, vertices[1:]):
+        pts.append(line_points(x0, y0, x1, y1)[1:])
+    return np.concatenate(pts)
+
+
+def paint_points(img, points, colors):
+    """Write colours at (x, y) points in order, clipping off-canvas points.
+
+    `colors` is one RGBA tuple or one per point; later points overwrite
+    earlier ones on the same pixel.
+    """
+    points = np.asarray(points).reshape(-1, 2)
+    colors = np.broadcast_to(np.asarray(colors, dtype=np.uint8), (len(points), 4))
+    xs, ys = points[:, 0], points[:, 1]
+    keep = (xs >= 0) & (xs < img.width) & (ys >= 0) & (ys < img.height)
+    flat = (ys * img.width + xs)[keep]
+    colors = colors[keep]
+    # Keep only the last write to each pixel
+    _, first_from_end = np.unique(flat[::-1], return_index=True)
+    last = len(flat) - 1 - first_from_end
+    mask = np.zeros(img.height * img.width, dtype=bool)
+    mask[flat[last]] = True
+    src = np.zeros((img.height * img.width, 4), dtype=np.uint8)
+    src[flat[last]] = colors[last]
+    paint_mask(img, mask.reshape(img.height, img.width), src.reshape(img.height, img.width, 4))
+
+
+def stamp_points(img, points, offsets, colors):
+    """Stamp a brush of (dx, dy) offsets at every point.
+
+    `colors` is one RGBA tuple or one per offset.  Writes go point by point
+    and, within a point, in offset order, matching nested px() loops.
+    """
+    points = np.asarray(points).reshape(-1, 2)
+    offsets = np.asarray(offsets).reshape(-1, 2)
+    stamped = (points[:, None, :] + offsets[None, :, :]).reshape(-1, 2)
+    per_offset = np.broadcast_to(np.asarray(colors, dtype=np.uint8), (len(offsets), 4))
+    paint_points(img, stamped, np.tile(per_offset, (len(points), 1)))
+
+
+def disc_offsets(radius):
+    """Offsets within Euclidean distance `radius` of the origin, row-major."""
+    r = int(math.floor(radius))
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    inside = dx * dx + dy * dy <= radius * radius
+    return np.stack([dx[inside], dy[inside]], axis=1)
+
+
+def square_offsets(half):
+    """Offsets of a (2 * half + 1) square brush, row-major."""
+    dy, dx = np.mgrid[-half:half + 1, -half:half + 1]
+    return np.stack([dx.ravel(), dy.ravel()], axis=1)
+
+
+def stroke_points(vertices, width=1, cap="butt"):
+    """Pixels covered by a polyline stroke of the given width.
+
+    The body is a span across each segment's minor axis, so "butt" ends stop
+    flush with the end vertices; "square" and "round" add a square or disc
+    brush at both ends.
+    """
+    if cap not in ("butt", "square", "round"):
+        raise ValueError(f"Unknown line cap {cap!r}; expected 'butt', 'square' or 'round'")
+    _check_polyline(vertices)
+    lo, hi = -((width - 1) // 2), width // 2
+    span = np.arange(lo, hi + 1)
+    pieces = []
+    for i, ((x0, y0), (x1, y1)) in enumerate(zip(vertices, vertices[1:])):
+        seg = line_points(x0, y0, x1, y1)
+        if i:
+            seg = seg[1:]
+        # Spread across the minor axis: rows for flat runs, columns for steep ones
+        if abs(x1 - x0) >= abs(y1 - y0):
+            offsets = np.stack([np.zeros_like(span), span], axis=1)
+        else:
+            offsets = np.stack([span, np.zeros_like(span)], axis=1)
+        pieces.append((seg[:, None, :] + offsets[None]).reshape(-1, 2))
+    if cap != "butt" and width > 1:
+        brush = square_offsets(hi) if cap == "square" else disc_offsets((width - 1) / 2.0)
+        ends = np.array([vertices[0], vertices[-1]])
+        pieces.append((ends[:, None, :] + brush[None]).reshape(-1, 2))
+    return np.concatenate(pieces)
+
+
+def draw_polyline(img, vertices, color, width=1, cap="butt", glow_radius=0, glow_color=None):
+    """Draw a polyline stroke, optionally over a soft-edged glow halo.
+
+    The halo covers every pixel within `glow_radius` of the stroke and is
+    painted first, so the stroke always sits on top of it.
+    """
+    stroke = stroke_points(vertices, width, cap)
+    if glow_radius > 0 and glow_color is not None:
+        stamp_points(img, np.unique(stroke, axis=0), disc_offsets(glow_radius), glow_color)
+    paint_points(img, stroke, color)
+
+
+def random_bolt_vertices(rng, width=16, height=48, top=0, bottom=42, sway=3, step=(2, 5)):
+    """Zig-zag lightning polyline from the top centre down to the impact point."""
+    cx = width // 2
+    vertices = [(cx, top)]
+    y = top
+    while y < bottom:
+        y = min(bottom, y + rng.randint(*step))
+        x = cx if y == bottom else cx + rng.randint(-sway, sway)
+        vertices.append((x, y))
+    return vertices
+
+
+def random_bolt_branches(rng, bolt_path, count=6, length=(2, 4)):
+    """Pick (start_x, start_y, dx, dy, length) offshoots along a bolt path."""
+    branches = []
+    for i in sorted(rng.sample(range(2, len(bolt_path) - 4), count)):
+        sx, sy = (int(v) for v in bolt_path[i])
+        dx = rng.choice((-1, 1))
+        dy = rng.choice((-1, 0, 1))
+        branches.append((sx, sy, dx, dy, rng.randint(*length)))
+    return branches
+
+
+# ============================================================
+# LAYER STACK - Blend translucent passes instead of overwriting
+# ============================================================
+# px/fill_rect replace pixels, which is right for opaque pixel art but wrong
+# for glows and smoke: a 45-alpha halo should tint what is under it, not
+# punch a hole through it.  Effects draw each pass onto its own layer with
+# the usual primitives and flatten the stack once, just before saving.
+# Compositing runs in premultiplied float space over whole arrays.
+
+def _blend_over(dst, src):
+    return src + dst * (1.0 - src[..., 3:])
+
+
+def _blend_add(dst, src):
+    out = dst + src
+    out[..., 3:] = src[..., 3:] + dst[..., 3:] * (1.0 - src[..., 3:])
+    return out
+
+
+def _blend_multiply(dst, src):
+    sa, da = src[..., 3:], dst[..., 3:]
+    out = src * (1.0 - da) + dst * (1.0 - sa) + src * dst
+    out[..., 3:] = sa + da * (1.0 - sa)
+    return out
+
+
+BLEND_MODES = {
+    "over": _blend_over,
+    "add": _blend_add,
+    "multiply": _blend_multiply,
+}
+
+
+def new_layer(layers, size, mode="over"):
+    """Append a transparent layer to a stack and return it for drawing."""
+    if mode not in BLEND_MODES:
+        raise ValueError(f"Unknown blend mode {mode!r}; expected one of {sorted(BLEND_MODES)}")
+    layer = new_canvas(*size)
+    layers.append((layer, mode))
+    return layer
+
+
+def flatten_layers(layers):
+    """Composite a layer stack bottom-to-top into one straight-alpha image.
+
+    The layers go back to the canvas pool, so don't draw on them afterwards.
+    """
+    width, height = layers[0][0].size
+    out = np.zeros((height, width, 4))
+    for layer, mode in layers:
+        src = np.asarray(layer, dtype=np.float64) / 255.0
+        src[..., :3] *= src[..., 3:]
+        out = BLEND_MODES[mode](out, src)
+    alpha = np.clip(out[..., 3:], 0.0, 1.0)
+    rgb = np.divide(out[..., :3], alpha, out=np.zeros_like(out[..., :3]), where=alpha > 0)
+    straight = np.concatenate([np.clip(rgb, 0.0, 1.0), alpha], axis=-1)
+    for layer, _ in layers:
+        release_canvas(layer)
+    img = new_canvas(width, height)
+    img.frombytes(np.rint(straight * 255.0).astype(np.uint8).tobytes())
+    return img
+
+
+# ============================================================
+# PIXEL-ART SCALING - Edge-aware resampling for derived sheets
+# ============================================================
+# Nearest-neighbour at 1.5x doubles every other row and column, which makes
+# lines wobble.  Scale3x (AdvMAME3x) first rounds diagonal edges at 3x using
+# only colours already in the sprite; sampling that back down keeps the
+# palette intact and the strokes even.
+
+def _neighbourhood(px):
+    """The 3x3 neighbours A..I of every pixel, edges replicated."""
+    p = np.pad(px, 1, mode="edge")
+    return (p[:-2, :-2], p[:-2, 1:-1], p[:-2, 2:],
+            p[1:-1, :-2], px, p[1:-1, 2:],
+            p[2:, :-2], p[2:, 1:-1], p[2:, 2:])
+
+
+def _packed(img):
+    """An RGBA image as an (h, w) uint32 array, one value per pixel."""
+    rgba = np.ascontiguousarray(np.asarray(img.convert("RGBA")))
+    return rgba.view(np.uint32)[..., 0]
+
+
+def _unpacked(px):
+    h, w = px.shape
+    return Image.fromarray(np.ascontiguousarray(px).view(np.uint8).reshape(h, w, 4), "RGBA")
+
+
+def scale2x_packed(px):
+    """Scale2x (EPX) on a packed array: each pixel becomes a 2x2 block."""
+    _, b, _, d, e, f, _, h, _ = _neighbourhood(px)
+    core = (b != h) & (d != f)
+    height, width = e.shape
+    out = np.empty((height, 2, width, 2), dtype=np.uint32)
+    out[:, 0, :, 0] = np.where(core & (d == b), d, e)
+    out[:, 0, :, 1] = np.where(core & (b == f), f, e)
+    out[:, 1, :, 0] = np.where(core & (d == h), d, e)
+    out[:, 1, :, 1] = np.where(core & (h == f), f, e)
+    return out.reshape(height * 2, width * 2)
+
+
+def scale3x_packed(px):
+    """Scale3x (AdvMAME3x) on a packed array: each pixel becomes a 3x3 block."""
+    a, b, c, d, e, f, g, h, i = _neighbourhood(px)
+    core = (b != h) & (d != f)
+    db, bf, dh, hf = d == b, b == f, d == h, h == f
+    rules = (
+        (db, d), ((db & (e != c)) | (bf & (e != a)), b), (bf, f),
+        ((db & (e != g)) | (dh & (e != a)), d), (np.zeros_like(core), e),
+        ((bf & (e != i)) | (hf & (e != c)), f),
+        (dh, d), ((dh & (e != i)) | (hf & (e != g)), h), (hf, f),
+    )
+    height, width = e.shape
+    out = np.empty((height, 3, width, 3), dtype=np.uint32)
+    for k, (cond, src) in enumerate(rules):
+        out[:, k // 3, :, k % 3] = np.where(core & cond, src, e)
+    return out.reshape(height * 3, width * 3)
+
+
+def scale2x(img):
+    """Double an RGBA image with the Scale2x rules."""
+    return _unpacked(scale2x_packed(_packed(img)))
+
+
+def scale3x(img):
+    """Triple an RGBA image with the Scale3x rules."""
+    return _unpacked(scale3x_packed(_packed(img)))
+
+
+def rescale_pixel_art(img, factor):
+    """Resize by factor (at most 3) via Scale3x and centre sampling; no new colours."""
+    width, height = round(img.width * factor), round(img.height * factor)
+    big = scale3x_packed(_packed(img))
+    ys = ((np.arange(height) + 0.5) * big.shape[0] / height).astype(np.intp)
+    xs = ((np.arange(width) + 0.5) * big.shape[1] / width).astype(np.intp)
+    out = new_canvas(width, height)
+    out.frombytes(np.ascontiguousarray(big[ys[:, None], xs]).tobytes())
+    return out
+
+
+# ============================================================
+# FAST PRIMITIVES - Array/C-level versions of the drawing helpers
+# ============================================================
+# Same signatures and byte-identical results as the *_reference versions
+# (fuzz_backends() checks this on random canvases and op sequences), but
+# rects, ellipses, dithers and outlines are written in one paste instead
+# of one putpixel per pixel.
+
+def px_fast(img, x, y, color):
+    """Set a single pixel with bounds checking, skipping putpixel's per-call mode handling."""
+    w, h = img.size
+    if 0 <= x < w and 0 <= y < h:
+        if img.readonly:
+            img.putpixel((x, y), color)  # detaches a shared buffer first
+        else:
+            img.im.putpixel((x, y), color)
+
+
+def fill_rect_fast(img, x1, y1, x2, y2, color):
+    """Fill a rectangle of pixels with a single paste."""
+    x1, y1 = max(0, x1), max(0, y1)
+    x2, y2 = min(img.width, x2 + 1), min(img.height, y2 + 1)
+    if x1 < x2 and y1 < y2:
+        img.paste(tuple(color), (x1, y1, x2, y2))
+
+
+def draw_ellipse_filled_fast(img, x1, y1, x2, y2, color):
+    """Draw a filled ellipse through its coverage mask."""
+    mask = ellipse_mask(img, x1, y1, x2, y2)
+    if mask.any():
+        paint_mask(img, mask, color)
+
+
+def add_outline_fast(img, outline_color=(10, 10, 15, 255)):
+    """Add a 1px dark outline around all non-transparent pixels, as array ops."""
+    alpha = np.asarray(img.getchannel("A"))
+    solid = alpha > 128
+    near = np.zeros_like(solid)
+    near[1:, :] |= solid[:-1, :]
+    near[:-1, :] |= solid[1:, :]
+    near[:, 1:] |= solid[:, :-1]
+    near[:, :-1] |= solid[:, 1:]
+    outline = near & (alpha == 0)
+    if outline.any():
+        paint_mask(img, outline, outline_color)
+
+
+def dither_rect_fast(img, x1, y1, x2, y2, color1, color2, pattern="checker"):
+    """Fill a rect with a dithering pattern between two colors, as one masked paste."""
+    mask = rect_mask(img, x1, y1, x2, y2)
+    pick = threshold_map(img, pattern) < 0.5
+    if mask.any():
+        colors = np.where(pick[..., None], np.array(color1, np.uint8), np.array(color2, np.uint8))
+        paint_mask(img, mask, colors)
+
+
+PRIMITIVE_BACKENDS = {
+    "reference": {
+        "px": px_reference,
+        "fill_rect": fill_rect_reference,
+        "draw_ellipse_filled": draw_ellipse_filled_reference,
+        "add_outline": add_outline_reference,
+        "dither_rect": dither_rect_reference,
+    },
+    "fast": {
+        "px": px_fast,
+        "fill_rect": fill_rect_fast,
+        "draw_ellipse_filled": draw_ellipse_filled_fast,
+        "add_outline": add_outline_fast,
+        "dither_rect": dither_rect_fast,
+    },
+}
+
+px = px_fast
+fill_rect = fill_rect_fast
+draw_ellipse_filled = draw_ellipse_filled_fast
+add_outline = add_outline_fast
+dither_rect = dither_rect_fast
+
+
+def use_backend(name):
+    """Rebind px/fill_rect/draw_ellipse_filled/add_outline/dither_rect module-wide."""
+    try:
+        globals().update(PRIMITIVE_BACKENDS[name])
+    except KeyError:
+        raise ValueError(f"Unknown backend {name!r}; expected one of {sorted(PRIMITIVE_BACKENDS)}") from None
+
+
 # ============================================================
 # 1. KNIGHT (32x48) - Blue armored knight hero
 # ============================================================
 def generate_knight():
-    img = Image.new("RGBA", (32, 48), (0, 0, 0, 0))
+    img = new_canvas(32, 48)
 
     # Extended palette with 6 shading steps
-    steel_hi = (160, 200, 235, 255)    # Brightest highlight
-    steel_lt = (120, 170, 210, 255)    # Light
-    steel = (70, 130, 180, 255)        # Base
-    steel_md = (50, 100, 155, 255)     # Mid shadow
-    steel_dk = (35, 70, 120, 255)      # Dark
-    steel_vdk = (20, 45, 85, 255)      # Deepest shadow
+    steel_hi, steel_lt, steel, steel_md, steel_dk, steel_vdk = PALETTES["steel"]
     visor_dark = (15, 15, 30, 255)
-    skin = (225, 185, 145, 255)
-    skin_shadow = (195, 155, 115, 255)
+    skin, skin_shadow = PALETTES["skin"]
     eye_dark = (30, 30, 45, 255)
     sword_hi = (220, 225, 235, 255)
     sword_mid = (180, 190, 200, 255)
     sword_dk = (140, 150, 165, 255)
     hilt_brown = (139, 90, 43, 255)
     hilt_dk = (100, 60, 25, 255)
-    gold = (200, 170, 40, 255)
-    gold_hi = (240, 215, 80, 255)
+    gold, gold_hi = PALETTES["trim_gold"]
 
     # === HELMET ===
     # Top plume/crest
@@ -152,17 +1057,20 @@ def generate_knight():
     px(img, 18, 16, skin_shadow)
 
     # === TORSO / ARMOR ===
-    fill_rect(img, 8, 17, 23, 30, steel)
-    # Chest highlight (top-left light)
-    fill_rect(img, 8, 17, 14, 22, steel_lt)
-    fill_rect(img, 8, 17, 11, 19, steel_hi)
-    dither_rect(img, 12, 17, 14, 19, steel_hi, steel_lt)
+    # Chest highlight (top-left light), shadow on right and bottom
+    plate = (steel_vdk, steel_dk, steel, steel_lt, steel_hi)
+    mask, field = level_map(img, len(plate), [
+        (8, 17, 23, 30, 2),
+        (8, 17, 14, 22, 3),
+        (8, 17, 11, 19, 4),
+        (12, 17, 14, 19, 3.5),
+        (20, 24, 23, 30, 1),
+        (22, 20, 23, 30, 0),
+        (19, 26, 21, 30, 1.5),
+    ])
+    dither_gradient(img, mask, plate, field, "checker")
     # Chest plate center ridge
     fill_rect(img, 15, 17, 16, 28, steel_md)
-    # Shadow on right and bottom
-    fill_rect(img, 20, 24, 23, 30, steel_dk)
-    fill_rect(img, 22, 20, 23, 30, steel_vdk)
-    dither_rect(img, 19, 26, 21, 30, steel, steel_dk)
     # Armor plate line
     fill_rect(img, 8, 23, 23, 23, steel_dk)
     # Belt
@@ -201,13 +1109,16 @@ def generate_knight():
     fill_rect(img, 24, 29, 27, 30, skin_shadow)
 
     # === LEGS ===
-    fill_rect(img, 10, 31, 15, 42, steel_dk)
-    fill_rect(img, 17, 31, 22, 42, steel_dk)
-    # Left leg highlight
-    fill_rect(img, 10, 31, 12, 36, steel)
-    dither_rect(img, 10, 37, 12, 40, steel, steel_dk)
-    # Right leg shadow
-    fill_rect(img, 20, 36, 22, 42, steel_vdk)
+    # Left leg highlight, right leg shadow
+    greaves = (steel_vdk, steel_dk, steel)
+    mask, field = level_map(img, len(greaves), [
+        (10, 31, 15, 42, 1),
+        (17, 31, 22, 42, 1),
+        (10, 31, 12, 36, 2),
+        (10, 37, 12, 40, 1.5),
+        (20, 36, 22, 42, 0),
+    ])
+    dither_gradient(img, mask, greaves, field, "checker")
     # Knee plates
     fill_rect(img, 10, 36, 15, 37, steel)
     fill_rect(img, 17, 36, 22, 37, steel_md)
@@ -253,20 +1164,14 @@ def generate_knight():
 # 2. ARCHER (32x48) - Green hooded archer
 # ============================================================
 def generate_archer():
-    img = Image.new("RGBA", (32, 48), (0, 0, 0, 0))
+    img = new_canvas(32, 48)
 
     # Rich green palette
-    green_hi = (90, 190, 95, 255)
-    green_lt = (60, 160, 70, 255)
-    green = (34, 120, 50, 255)
-    green_md = (25, 95, 38, 255)
-    green_dk = (18, 70, 25, 255)
-    green_vdk = (10, 48, 15, 255)
+    green_hi, green_lt, green, green_md, green_dk, green_vdk = PALETTES["forest"]
     brown = (120, 70, 30, 255)
     brown_lt = (150, 95, 45, 255)
     brown_dk = (80, 45, 15, 255)
-    skin = (225, 185, 145, 255)
-    skin_shadow = (195, 155, 115, 255)
+    skin, skin_shadow = PALETTES["skin"]
     eye_color = (40, 40, 45, 255)
     bow_lt = (170, 110, 45, 255)
     bow = (140, 85, 30, 255)
@@ -400,16 +1305,10 @@ def generate_archer():
 # 3. SLIME (24x24) - Glossy gel slime with drip detail
 # ============================================================
 def generate_slime():
-    img = Image.new("RGBA", (24, 24), (0, 0, 0, 0))
+    img = new_canvas(24, 24)
 
     # Glossy green palette
-    spec = (200, 255, 210, 255)        # Specular highlight
-    green_hi = (130, 245, 130, 255)
-    green_lt = (80, 220, 80, 255)
-    green = (50, 180, 50, 255)
-    green_md = (30, 140, 30, 255)
-    green_dk = (15, 100, 15, 255)
-    green_vdk = (8, 65, 8, 255)
+    spec, green_hi, green_lt, green, green_md, green_dk, green_vdk = PALETTES["slime"]
     white = (255, 255, 255, 255)
     pupil = (15, 15, 20, 255)
     mouth = (10, 70, 10, 255)
@@ -486,14 +1385,9 @@ def generate_slime():
 # 4. SKELETON (24x36) - Sharper bones, glowing eyes, weapon
 # ============================================================
 def generate_skeleton():
-    img = Image.new("RGBA", (24, 36), (0, 0, 0, 0))
+    img = new_canvas(24, 36)
 
-    bone_hi = (250, 248, 240, 255)
-    bone_lt = (240, 235, 225, 255)
-    bone = (225, 215, 195, 255)
-    bone_md = (200, 190, 170, 255)
-    bone_dk = (170, 160, 140, 255)
-    bone_vdk = (130, 120, 100, 255)
+    bone_hi, bone_lt, bone, bone_md, bone_dk, bone_vdk = PALETTES["bone"]
     eye_glow = (200, 50, 50, 255)
     eye_bright = (255, 100, 80, 255)
     teeth = (210, 200, 185, 255)
@@ -609,15 +1503,10 @@ def generate_skeleton():
 # 5. ARMORED KNIGHT (32x48) - Menacing dark knight enemy
 # ============================================================
 def generate_armored_knight():
-    img = Image.new("RGBA", (32, 48), (0, 0, 0, 0))
+    img = new_canvas(32, 48)
 
     # Dark metal palette
-    metal_hi = (140, 140, 155, 255)
-    metal_lt = (110, 110, 125, 255)
-    metal = (80, 80, 95, 255)
-    metal_md = (55, 55, 68, 255)
-    metal_dk = (35, 35, 48, 255)
-    metal_vdk = (18, 18, 28, 255)
+    metal_hi, metal_lt, metal, metal_md, metal_dk, metal_vdk = PALETTES["dark_metal"]
     red_glow = (220, 30, 30, 255)
     red_bright = (255, 60, 50, 255)
     red_dk = (140, 10, 10, 255)
@@ -748,7 +1637,7 @@ def generate_armored_knight():
 # 6. DRAGON (64x48) - Red dragon boss with more detail
 # ============================================================
 def generate_dragon():
-    img = Image.new("RGBA", (64, 48), (0, 0, 0, 0))
+    img = new_canvas(64, 48)
 
     # Rich red palette
     red_hi = (240, 90, 65, 255)
@@ -767,6 +1656,7 @@ def generate_dragon():
     wing_bone = (140, 18, 15, 255)
     wing_mem = (170, 35, 30, 180)
     wing_mem_lt = (190, 55, 45, 160)
+    wing_mem_dk = (150, 25, 20, 160)
     claw = (50, 50, 55, 255)
     claw_hi = (90, 90, 100, 255)
     tooth = (245, 245, 230, 255)
@@ -774,25 +1664,30 @@ def generate_dragon():
     fire_yellow = (255, 230, 60, 255)
 
     # === BODY ===
-    fill_rect(img, 20, 22, 48, 38, red)
-    fill_rect(img, 18, 25, 50, 35, red)
-    # Body highlight (top-left light)
-    fill_rect(img, 20, 22, 33, 26, red_lt)
-    fill_rect(img, 20, 22, 27, 24, red_hi)
-    dither_rect(img, 28, 22, 35, 26, red_lt, red)
-    # Body shadow
-    fill_rect(img, 38, 33, 50, 38, red_dk)
-    fill_rect(img, 45, 30, 50, 38, red_vdk)
-    dither_rect(img, 36, 34, 42, 38, red, red_dk)
-    # Scale texture (dithered bands)
-    dither_rect(img, 22, 28, 46, 30, red, red_md, "checker")
+    # Highlight (top-left light), shadow, and a dithered band of scales
+    hide = (red_vdk, red_dk, red_md, red, red_lt, red_hi)
+    mask, field = level_map(img, len(hide), [
+        (20, 22, 48, 38, 3),
+        (18, 25, 50, 35, 3),
+        (20, 22, 33, 26, 4),
+        (20, 22, 27, 24, 5),
+        (28, 22, 35, 26, 3.5),
+        (38, 33, 50, 38, 1),
+        (45, 30, 50, 38, 0),
+        (22, 28, 46, 30, 2.5),
+    ])
+    dither_gradient(img, mask, hide, field, "checker")
 
     # Belly (warm gradient)
-    fill_rect(img, 24, 33, 44, 38, belly)
-    fill_rect(img, 26, 36, 42, 38, belly_lt)
-    fill_rect(img, 28, 37, 38, 38, belly_hi)
-    fill_rect(img, 38, 33, 44, 36, belly_dk)
-    dither_rect(img, 24, 33, 30, 35, belly, belly_lt)
+    warm = (belly_hi, belly_lt, belly, belly_dk)
+    mask, field = level_map(img, len(warm), [
+        (24, 33, 44, 38, 2),
+        (26, 36, 42, 38, 1),
+        (28, 37, 38, 38, 0),
+        (38, 33, 44, 36, 3),
+        (24, 33, 30, 35, 1.5),
+    ])
+    dither_gradient(img, mask, warm, field, "checker")
 
     # === HEAD ===
     fill_rect(img, 8, 16, 22, 28, red)
@@ -853,15 +1748,17 @@ def generate_dragon():
     # Left wing bones
     fill_rect(img, 22, 10, 25, 22, wing_bone)
     fill_rect(img, 22, 10, 23, 14, red_md)
-    # Left wing membrane
-    fill_rect(img, 14, 4, 22, 10, wing_mem)
-    fill_rect(img, 10, 6, 14, 12, wing_mem)
-    fill_rect(img, 22, 4, 30, 12, wing_mem)
-    fill_rect(img, 25, 6, 32, 14, wing_mem)
-    # Membrane light gradient
-    fill_rect(img, 14, 4, 18, 7, wing_mem_lt)
-    fill_rect(img, 22, 4, 26, 7, wing_mem_lt)
-    dither_rect(img, 12, 8, 20, 10, wing_mem_lt, wing_mem)
+    # Left wing membrane with its light gradient
+    mask, field = level_map(img, 2, [
+        (14, 4, 22, 10, 0),
+        (10, 6, 14, 12, 0),
+        (22, 4, 30, 12, 0),
+        (25, 6, 32, 14, 0),
+        (14, 4, 18, 7, 1),
+        (22, 4, 26, 7, 1),
+        (12, 8, 20, 10, 0.5),
+    ])
+    dither_gradient(img, mask, (wing_mem, wing_mem_lt), field, "checker")
     # Wing finger bones
     fill_rect(img, 14, 4, 15, 10, wing_bone)
     fill_rect(img, 22, 3, 23, 8, wing_bone)
@@ -875,13 +1772,15 @@ def generate_dragon():
     # Right wing bones
     fill_rect(img, 40, 10, 43, 22, wing_bone)
     fill_rect(img, 42, 10, 43, 14, red_dk)
-    # Right wing membrane
-    fill_rect(img, 36, 4, 44, 12, wing_mem)
-    fill_rect(img, 44, 4, 52, 10, wing_mem)
-    fill_rect(img, 52, 6, 56, 12, wing_mem)
-    fill_rect(img, 34, 6, 38, 14, wing_mem)
     # Right wing membrane is darker (shadow side)
-    dither_rect(img, 44, 6, 52, 10, wing_mem, (150, 25, 20, 160))
+    mask, field = level_map(img, 2, [
+        (36, 4, 44, 12, 1),
+        (44, 4, 52, 10, 1),
+        (52, 6, 56, 12, 1),
+        (34, 6, 38, 14, 1),
+        (44, 6, 52, 10, 0.5),
+    ])
+    dither_gradient(img, mask, (wing_mem_dk, wing_mem), field, "checker")
     # Wing finger bones
     fill_rect(img, 36, 3, 37, 8, wing_bone)
     fill_rect(img, 44, 3, 45, 8, wing_bone)
@@ -931,7 +1830,7 @@ def generate_dragon():
 # 7. SWORD ARC (48x24) - Keep existing (already updated)
 # ============================================================
 def generate_sword_arc():
-    img = Image.new("RGBA", (48, 24), (0, 0, 0, 0))
+    img = new_canvas(48, 24)
 
     white = (255, 255, 255, 255)
     bright = (255, 255, 220, 255)
@@ -942,27 +1841,16 @@ def generate_sword_arc():
     r_outer = 22
     r_inner = 16
 
-    for y in range(24):
-        for x in range(48):
-            dx = x - cx
-            dy = y - cy
-            dist = (dx * dx + dy * dy) ** 0.5
-            if r_inner <= dist <= r_outer and y < 20:
-                mid_r = (r_outer + r_inner) / 2.0
-                band_dist = abs(dist - mid_r) / ((r_outer - r_inner) / 2.0)
-                if band_dist < 0.3:
-                    px(img, x, y, white)
-                elif band_dist < 0.6:
-                    px(img, x, y, bright)
-                elif band_dist < 0.8:
-                    px(img, x, y, yellow)
-                else:
-                    px(img, x, y, light_yellow)
-
-    for sx, sy in [(8, 6), (15, 2), (33, 2), (40, 6), (24, 1)]:
-        px(img, sx, sy, white)
-        px(img, sx + 1, sy, bright)
-        px(img, sx, sy + 1, bright)
+    dist = radial_field(img, cx, cy)
+    rows = np.arange(img.height)[:, None]
+    mid_r = (r_outer + r_inner) / 2.0
+    band_dist = np.abs(dist - mid_r) / ((r_outer - r_inner) / 2.0)
+    arc = (dist >= r_inner) & (dist <= r_outer) & (rows < 20)
+    paint_mask(img, arc, band_lookup(band_dist, [0.3, 0.6, 0.8],
+                                     [white, bright, yellow, light_yellow]).astype(np.uint8))
+
+    stamp_points(img, [(8, 6), (15, 2), (33, 2), (40, 6), (24, 1)],
+                 [(0, 0), (1, 0), (0, 1)], [white, bright, bright])
 
     save(img, "sword_arc.png")
 
@@ -971,7 +1859,7 @@ def generate_sword_arc():
 # 8. ARROW (16x6) - Sharper tip, better fletching
 # ============================================================
 def generate_arrow():
-    img = Image.new("RGBA", (16, 6), (0, 0, 0, 0))
+    img = new_canvas(16, 6)
 
     shaft_lt = (160, 110, 55, 255)
     shaft = (135, 88, 38, 255)
@@ -1023,15 +1911,12 @@ def generate_arrow():
 # 9. FIREBALL (20x20) - More flame layers, heat distortion
 # ============================================================
 def generate_fireball():
-    img = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
-
-    white_hot = (255, 255, 240, 255)
-    yellow = (255, 245, 120, 255)
-    bright_orange = (255, 190, 40, 255)
-    orange = (255, 130, 25, 255)
-    red_orange = (240, 80, 20, 255)
-    red = (210, 40, 15, 255)
-    dark_red = (150, 20, 8, 255)
+    layers = []
+    smoke_layer = new_layer(layers, (20, 20))
+    img = new_layer(layers, (20, 20))
+    shimmer_layer = new_layer(layers, (20, 20), "add")
+
+    white_hot, yellow, bright_orange, orange, red_orange, red, dark_red = PALETTES["fire"]
     smoke = (80, 30, 10, 140)
 
     # Outer smoke/heat wisps
@@ -1042,7 +1927,7 @@ def generate_fireball():
         (7, 19), (12, 19),
     ]
     for sx, sy in smoke_positions:
-        px(img, sx, sy, smoke)
+        px(smoke_layer, sx, sy, smoke)
 
     # Outer dark red flame
     draw_ellipse_filled(img, 2, 2, 17, 17, dark_red)
@@ -1090,16 +1975,16 @@ def generate_fireball():
         (0, 15), (19, 15), (4, 19), (15, 19),
     ]
     for gx, gy in glow_positions:
-        px(img, gx, gy, (255, 150, 30, 60))
+        px(shimmer_layer, gx, gy, (255, 150, 30, 60))
 
-    save(img, "fireball.png")
+    save(flatten_layers(layers), "fireball.png")
 
 
 # ============================================================
 # 10. BONE (16x8) - Cracked texture, sharper knobs
 # ============================================================
 def generate_bone():
-    img = Image.new("RGBA", (16, 8), (0, 0, 0, 0))
+    img = new_canvas(16, 8)
 
     bone_hi = (250, 245, 240, 255)
     bone_lt = (240, 235, 225, 255)
@@ -1156,7 +2041,7 @@ def generate_bone():
 # 11. SHIELD (16x16) - Better metallic sheen, rivets
 # ============================================================
 def generate_shield():
-    img = Image.new("RGBA", (16, 16), (0, 0, 0, 0))
+    img = new_canvas(16, 16)
 
     border_hi = (140, 145, 155, 255)
     border = (100, 100, 115, 255)
@@ -1230,8 +2115,13 @@ def generate_shield():
 # ============================================================
 # 12. LIGHTNING (16x48) - Impactful vertical bolt with glow
 # ============================================================
-def generate_lightning():
-    img = Image.new("RGBA", (16, 48), (0, 0, 0, 0))
+def generate_lightning(seed=None):
+    """Hand-authored bolt by default; a seed draws a procedural variant instead."""
+    layers = []
+    outer_layer = new_layer(layers, (16, 48))
+    glow_layer = new_layer(layers, (16, 48), "add")
+    img = new_layer(layers, (16, 48))
+    impact_layer = new_layer(layers, (16, 48))
 
     white = (255, 255, 255, 255)
     core = (230, 245, 255, 255)
@@ -1244,69 +2134,51 @@ def generate_lightning():
     impact_white = (255, 255, 230, 255)
     impact_yellow = (255, 245, 120, 200)
 
-    # Main jagged bolt path - zigzags down from top to bottom center
-    bolt_path = [
-        (8, 0), (8, 1), (9, 2), (9, 3),
-        (7, 4), (6, 5), (5, 6), (5, 7),
-        (6, 8), (7, 9), (8, 10), (9, 11), (10, 12),
-        (9, 13), (8, 14), (7, 15), (6, 16), (5, 17),
-        (5, 18), (6, 19), (7, 20), (8, 21), (9, 22),
-        (10, 23), (10, 24),
-        (9, 25), (8, 26), (7, 27), (6, 28), (5, 29),
-        (5, 30), (6, 31), (7, 32), (8, 33), (9, 34),
-        (9, 35), (8, 36), (7, 37), (7, 38), (8, 39),
-        (8, 40), (8, 41), (8, 42),
-    ]
+    if seed is None:
+        # Main jagged bolt path - zigzags down from top to bottom center
+        bolt_lines = [
+            [(8, 0), (8, 1), (9, 3)],
+            [(7, 4), (5, 6), (5, 7), (10, 12), (5, 17), (5, 18), (10, 23),
+             (10, 24), (5, 29), (5, 30), (9, 34), (9, 35), (7, 37), (7, 38),
+             (8, 39), (8, 42)],
+        ]
+        bolt_path = np.concatenate([polyline_points(line) for line in bolt_lines])
+        # Branch sparks (small jagged offshoots)
+        branches = [
+            # (start_x, start_y, dx, dy, length)
+            (5, 7, -1, 1, 4),
+            (10, 12, 1, 0, 3),
+            (5, 17, -1, -1, 3),
+            (10, 24, 1, 1, 3),
+            (5, 30, -1, 0, 3),
+            (9, 35, 1, -1, 2),
+        ]
+    else:
+        rng = random.Random(seed)
+        bolt_path = polyline_points(random_bolt_vertices(rng))
+        branches = random_bolt_branches(rng, bolt_path)
 
     # Outer glow (widest, blue-tinted, faint)
-    for bx, by in bolt_path:
-        for dx in range(-4, 5):
-            for dy in [-1, 0, 1]:
-                if abs(dx) >= 2:
-                    px(img, bx + dx, by + dy, glow_outer)
+    outer = [(dx, dy) for dx in range(-4, 5) for dy in (-1, 0, 1) if abs(dx) >= 2]
+    stamp_points(outer_layer, bolt_path, outer, glow_outer)
 
     # Inner glow (warm)
-    for bx, by in bolt_path:
-        for dx in [-2, -1, 0, 1, 2]:
-            for dy in [-1, 0, 1]:
-                if abs(dx) == 2 or abs(dy) == 1:
-                    px(img, bx + dx, by + dy, glow)
+    inner = [(dx, dy) for dx in range(-2, 3) for dy in (-1, 0, 1) if abs(dx) == 2 or abs(dy) == 1]
+    stamp_points(glow_layer, bolt_path, inner, glow)
 
     # Yellow body (3px wide)
-    for bx, by in bolt_path:
-        px(img, bx - 1, by, yellow)
-        px(img, bx, by, bright_yellow)
-        px(img, bx + 1, by, yellow)
-
-    # Bright core
-    for bx, by in bolt_path:
-        px(img, bx, by, core)
-
-    # White-hot center (every other pixel for shimmer)
-    for i, (bx, by) in enumerate(bolt_path):
-        if i % 2 == 0:
-            px(img, bx, by, white)
-
-    # Branch sparks (small jagged offshoots)
-    branches = [
-        # (start_x, start_y, dx, dy, length)
-        (5, 7, -1, 1, 4),
-        (10, 12, 1, 0, 3),
-        (5, 17, -1, -1, 3),
-        (10, 24, 1, 1, 3),
-        (5, 30, -1, 0, 3),
-        (9, 35, 1, -1, 2),
-    ]
+    stamp_points(img, bolt_path, [(-1, 0), (0, 0), (1, 0)], [yellow, bright_yellow, yellow])
+
+    # Bright core, with a white-hot center every other pixel for shimmer
+    paint_points(img, bolt_path, core)
+    paint_points(img, bolt_path[::2], white)
+
     for sx, sy, dx, dy, length in branches:
-        for i in range(length):
-            bx = sx + dx * i
-            by = sy + dy * i
-            if i == 0:
-                px(img, bx, by, spark)
-            else:
-                px(img, bx, by, yellow)
-                # Add a glow pixel beside each branch segment
-                px(img, bx + (1 if dx <= 0 else -1), by, glow)
+        segment = line_points(sx, sy, sx + dx * (length - 1), sy + dy * (length - 1))
+        # Spark at the root, then yellow with a glow pixel beside each step
+        side = 1 if dx <= 0 else -1
+        paint_points(img, segment, [spark] + [yellow] * (len(segment) - 1))
+        paint_points(glow_layer, segment[1:] + (side, 0), glow)
 
     # Extra isolated spark dots
     spark_positions = [
@@ -1318,19 +2190,11 @@ def generate_lightning():
 
     # Impact glow at bottom (bright radial burst)
     impact_cx, impact_cy = 8, 44
-    for dy in range(-4, 5):
-        for dx in range(-5, 6):
-            dist = (dx * dx + dy * dy) ** 0.5
-            if dist <= 5.0:
-                ix, iy = impact_cx + dx, impact_cy + dy
-                if dist < 1.5:
-                    px(img, ix, iy, impact_white)
-                elif dist < 3.0:
-                    px(img, ix, iy, bright_yellow)
-                elif dist < 4.0:
-                    px(img, ix, iy, impact_yellow)
-                else:
-                    px(img, ix, iy, glow)
+    dist = radial_field(img, impact_cx, impact_cy)
+    rows = np.arange(img.height)[:, None]
+    burst = (dist <= 5.0) & (np.abs(rows - impact_cy) <= 4)
+    paint_mask(impact_layer, burst, band_lookup(dist, [1.5, 3.0, 4.0],
+                                                [impact_white, bright_yellow, impact_yellow, glow]).astype(np.uint8))
 
     # Ground sparks radiating from impact
     ground_sparks = [
@@ -1338,99 +2202,94 @@ def generate_lightning():
         (6, 47), (10, 47), (8, 47),
     ]
     for gx, gy in ground_sparks:
-        px(img, gx, gy, yellow)
+        px(impact_layer, gx, gy, yellow)
 
-    save(img, "lightning.png")
+    save(flatten_layers(layers), "lightning.png" if seed is None else f"lightning_{seed:03d}.png")
 
 
 # ============================================================
-# 13. XP ORB (12x12) - More facets, brighter glow
+# 13. XP ORB (strip 68x24) - One native gem per tier
 # ============================================================
-def generate_xp_orb():
-    img = Image.new("RGBA", (12, 12), (0, 0, 0, 0))
-
-    white = (240, 255, 255, 255)
-    cyan_hi = (140, 250, 255, 255)
-    cyan_lt = (80, 230, 245, 255)
-    cyan = (20, 200, 220, 255)
-    cyan_md = (10, 160, 180, 255)
-    cyan_dk = (0, 120, 150, 255)
-    cyan_vdk = (0, 80, 110, 255)
-    glow = (0, 200, 255, 60)
-    glow_bright = (80, 230, 255, 100)
-
-    diamond_rows = {
-        0: (5, 6),
-        1: (4, 7),
-        2: (3, 8),
-        3: (2, 9),
-        4: (1, 10),
-        5: (1, 10),
-        6: (1, 10),
-        7: (2, 9),
-        8: (3, 8),
-        9: (4, 7),
-        10: (5, 6),
-        11: (5, 6),
-    }
-
-    # Outer glow aura
-    for y, (x_start, x_end) in diamond_rows.items():
-        for x in range(max(0, x_start - 2), min(12, x_end + 3)):
-            if not (x_start <= x <= x_end):
-                px(img, x, y, glow)
-    # Brighter inner glow
-    for y, (x_start, x_end) in diamond_rows.items():
-        for x in range(max(0, x_start - 1), min(12, x_end + 2)):
-            if not (x_start <= x <= x_end):
-                px(img, x, y, glow_bright)
-
-    # Fill diamond with gradient
-    for y, (x_start, x_end) in diamond_rows.items():
-        for x in range(x_start, x_end + 1):
-            # Distance-based gradient from top-left
-            d = ((x - 4) ** 2 + (y - 3) ** 2) ** 0.5
-            if d < 2:
-                px(img, x, y, cyan_hi)
-            elif d < 3.5:
-                px(img, x, y, cyan_lt)
-            elif d < 5:
-                px(img, x, y, cyan)
-            elif d < 7:
-                px(img, x, y, cyan_md)
-            else:
-                px(img, x, y, cyan_dk)
+# Mirrors TIER_DATA in scripts/pickups/XPOrb.gd: each tier is drawn at its
+# gem_scale times the 12px base size instead of being tinted and upscaled
+# in game, and all tiers share one strip so orbs batch on one texture.
+# Gems sit left to right at y=0; XPOrb.gd's region rects must match.
+XP_ORB_TIERS = (
+    # tier, gem_scale, palette (specular, highlight, light, base, mid, dark, deepest)
+    (1, 1.0, "gem_blue"),
+    (2, 1.2, "gem_green"),
+    (3, 1.5, "gem_red"),
+    (4, 2.0, "gem_diamond"),
+)
+XP_ORB_BASE_SIZE = 12
+
+
+def xp_orb_regions():
+    """{tier: (x, y, w, h)} of each gem in xp_orb.png."""
+    regions, x = {}, 0
+    for tier, scale, _ in XP_ORB_TIERS:
+        size = round(XP_ORB_BASE_SIZE * scale)
+        regions[tier] = (x, 0, size, size)
+        x += size
+    return regions
+
+
+def draw_xp_gem(size, colors, sparkle=False):
+    """A faceted diamond gem with a two-step glow on a size x size canvas."""
+    white, hi, lt, base, md, dk, vdk = colors
+    img = new_canvas(size, size)
+    k = size / XP_ORB_BASE_SIZE
+    c = (size - 1) / 2.0
+    ys, xs = np.ogrid[:size, :size]
+    # Diamond metric: <= 1 inside the gem, each extra 1/half-width is one pixel of glow
+    half = size / 2.0 - 1.0
+    shape = np.abs(xs - c) / half + np.abs(ys - c) / (half + 1.0)
+    gem = shape <= 1.0
+    paint_mask(img, (shape <= 1.0 + 2.0 / half) & ~gem, base[:3] + (60,))
+    paint_mask(img, (shape <= 1.0 + 1.0 / half) & ~gem, lt[:3] + (100,))
+
+    # Shade from a top-left light
+    d = radial_field(img, c - 1.5 * k, c - 2.5 * k)
+    paint_mask(img, gem, band_lookup(d, [2 * k, 3.5 * k, 5 * k, 7 * k],
+                                     [hi, lt, base, md, dk]).astype(np.uint8))
+
+    # Facets: darker horizontal belt and vertical ridge
+    arr = np.array(img)
+    belt = gem & (np.abs(ys - c) <= 0.5 * k)
+    ridge = gem & (xs == int(c)) & ~belt
+    for mask, amount in ((belt, 25), (ridge, 20)):
+        shaded = arr.copy()
+        shaded[..., :3] = np.clip(arr[..., :3].astype(int) - amount, 0, 255)
+        paint_mask(img, mask, shaded)
+
+    # Deep shadow on the lower right edge
+    right_edge = gem & ~np.roll(gem, -1, axis=1)
+    paint_mask(img, right_edge & (ys > c + 1.5 * k), vdk)
+
+    # White specular near the top
+    sx, sy = int(c - 0.5 * k), int(c - 4.5 * k)
+    for x, y, color in ((sx, sy + 1, white), (sx, sy + 2, white),
+                        (sx - 1, sy + 2, white), (sx - 1, sy + 3, hi)):
+        if gem[y, x]:
+            px(img, x, y, color)
+    if sparkle:
+        # Four-point glint on the upper right glow
+        gx, gy = size - 4, 3
+        for x, y in ((gx, gy), (gx - 1, gy), (gx + 1, gy), (gx, gy - 1), (gx, gy + 1)):
+            px(img, x, y, white if (x, y) == (gx, gy) else hi)
+    return img
 
-    # Facet lines (crystal-like)
-    # Horizontal facet
-    for y_row in [5, 6]:
-        xs, xe = diamond_rows[y_row]
-        for x in range(xs, xe + 1):
-            c = get_px(img, x, y_row)
-            if c[3] > 0:
-                darker = tuple(max(0, c[i] - 25) for i in range(3)) + (255,)
-                px(img, x, y_row, darker)
-    # Vertical facet
-    for y in range(12):
-        xs, xe = diamond_rows[y]
-        mid = (xs + xe) // 2
-        if xs <= mid <= xe:
-            c = get_px(img, mid, y)
-            if c[3] > 0:
-                darker = tuple(max(0, c[i] - 20) for i in range(3)) + (255,)
-                px(img, mid, y, darker)
-
-    # White specular
-    px(img, 5, 1, white)
-    px(img, 5, 2, white)
-    px(img, 4, 2, white)
-    px(img, 4, 3, cyan_hi)
-
-    # Deep shadow corner
-    for y in range(8, 11):
-        xs, xe = diamond_rows[y]
-        px(img, xe, y, cyan_vdk)
 
+def generate_xp_orb():
+    regions = xp_orb_regions()
+    width = sum(w for _, _, w, _ in regions.values())
+    height = max(h for _, _, _, h in regions.values())
+    img = new_canvas(width, height)
+    for tier, _, palette in XP_ORB_TIERS:
+        x, y, size, _ = regions[tier]
+        gem = draw_xp_gem(size, PALETTES[palette], sparkle=tier == 4)
+        img.paste(gem, (x, y))
+        release_canvas(gem)
     save(img, "xp_orb.png")
 
 
@@ -1438,7 +2297,7 @@ def generate_xp_orb():
 # 14. CHEST (24x20) - Wood grain, better lock, gems
 # ============================================================
 def generate_chest():
-    img = Image.new("RGBA", (24, 20), (0, 0, 0, 0))
+    img = new_canvas(24, 20)
 
     wood_hi = (175, 115, 60, 255)
     wood_lt = (155, 95, 45, 255)
@@ -1540,7 +2399,7 @@ def generate_chest():
 # 15. ROCK (32x32) - Dark cavern boulder
 # ============================================================
 def generate_rock():
-    img = Image.new("RGBA", (32, 32), (0, 0, 0, 0))
+    img = new_canvas(32, 32)
 
     stone_hi = (110, 105, 95, 255)
     stone_lt = (90, 85, 78, 255)
@@ -1572,13 +2431,12 @@ def generate_rock():
 
     # Cracks
     crack_paths = [
-        [(12, 12), (13, 13), (14, 14), (13, 15), (12, 16)],
-        [(18, 10), (19, 11), (20, 12), (21, 13)],
-        [(8, 18), (9, 19), (10, 20), (10, 21)],
+        [(12, 12), (14, 14), (12, 16)],
+        [(18, 10), (21, 13)],
+        [(8, 18), (10, 20), (10, 21)],
     ]
     for path in crack_paths:
-        for cx, cy in path:
-            px(img, cx, cy, crack_color)
+        draw_polyline(img, path, crack_color)
 
     # Moss highlights (top-left)
     moss_positions = [
@@ -1610,7 +2468,7 @@ def generate_rock():
 # 16. CAVERN FLOOR TILE (64x64) - Dark stone tiling texture
 # ============================================================
 def generate_cavern_floor():
-    img = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
+    img = new_canvas(64, 64)
 
     # Base dark stone colors
     floor_hi = (55, 48, 58, 255)
@@ -1625,7 +2483,6 @@ def generate_cavern_floor():
     fill_rect(img, 0, 0, 63, 63, floor)
 
     # Subtle variation across the tile
-    import random
     random.seed(42)  # Deterministic
     for y in range(64):
         for x in range(64):
@@ -1692,7 +2549,7 @@ def generate_cavern_floor():
 # 17. ORBIT PROJECTILE (16x16) - Small blue/white glowing orb
 # ============================================================
 def generate_orbit_projectile():
-    img = Image.new("RGBA", (16, 16), (0, 0, 0, 0))
+    img = new_canvas(16, 16)
 
     # Blue/white glowing orb palette
     white_core = (255, 255, 255, 255)
@@ -1707,26 +2564,9 @@ def generate_orbit_projectile():
     glow = (60, 130, 255, 70)
     glow_faint = (40, 100, 220, 35)
 
-    # Outermost glow halo (very faint)
-    draw_ellipse_filled(img, 0, 0, 15, 15, glow_faint)
-
-    # Outer glow ring
-    draw_ellipse_filled(img, 1, 1, 14, 14, glow)
-
-    # Brighter inner glow
-    draw_ellipse_filled(img, 2, 2, 13, 13, glow_bright)
-
-    # Darkest visible ring
-    draw_ellipse_filled(img, 3, 3, 12, 12, ice_vdk)
-
-    # Dark blue ring
-    draw_ellipse_filled(img, 4, 4, 11, 11, ice_dk)
-
-    # Mid blue body
-    draw_ellipse_filled(img, 4, 4, 11, 11, ice_md)
-
-    # Blue body
-    draw_ellipse_filled(img, 5, 5, 10, 10, ice)
+    # Blue body, darkening rings, then glow halos fading out one pixel apart
+    shade_radial(img, 7.5, 7.5, 7.5, (ice, ice_md, ice_vdk, glow_bright, glow, glow_faint),
+                 r_inner=1.5)
 
     # Light blue inner
     draw_ellipse_filled(img, 5, 5, 9, 9, ice_lt)
@@ -1767,66 +2607,55 @@ def generate_orbit_projectile():
 # ============================================================
 # 18. AURA (64x64) - Translucent green/white radial circle
 # ============================================================
-def generate_aura():
-    size = 64
-    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+def generate_aura(size=64):
+    layers = []
+    img = new_layer(layers, (size, size))
+    sparkle_layer = new_layer(layers, (size, size), "add")
 
+    # Radii are authored for 64px and scale with the canvas
+    scale = size / 64.0
     cx, cy = size // 2, size // 2
-    outer_r = 30.0
-    inner_r = 22.0
-
-    # Palette: soft green-white glow, subtle and translucent
-    for y in range(size):
-        for x in range(size):
-            dx = x - cx
-            dy = y - cy
-            dist = (dx * dx + dy * dy) ** 0.5
-
-            if dist > outer_r + 2:
-                continue
-
-            # Outermost faint glow fringe (soft edge)
-            if dist > outer_r:
-                t = (dist - outer_r) / 2.0
-                alpha = int(20 * (1.0 - t))
-                if alpha > 0:
-                    px(img, x, y, (180, 255, 200, alpha))
-                continue
-
-            # Main ring region (between inner_r and outer_r)
-            if dist >= inner_r:
-                # Band position: 0 at inner_r, 1 at outer_r
-                band_t = (dist - inner_r) / (outer_r - inner_r)
-
-                # Ring is brightest in the middle of the band
-                mid_dist = abs(band_t - 0.5) * 2.0  # 0 at center, 1 at edges
-
-                if mid_dist < 0.3:
-                    # Bright core of the ring
-                    alpha = 90
-                    r, g, b = 220, 255, 230
-                elif mid_dist < 0.6:
-                    alpha = 65
-                    r, g, b = 180, 240, 200
-                elif mid_dist < 0.85:
-                    alpha = 40
-                    r, g, b = 140, 220, 170
-                else:
-                    alpha = 22
-                    r, g, b = 120, 200, 150
-
-                # Dither pattern for subtle texture
-                if (x + y) % 3 == 0:
-                    alpha = max(0, alpha - 10)
-
-                px(img, x, y, (r, g, b, alpha))
-
-            # Interior fill (very subtle inner glow)
-            elif dist >= inner_r - 6:
-                fade_t = (inner_r - dist) / 6.0  # 0 at inner_r, 1 deeper inside
-                alpha = int(18 * (1.0 - fade_t))
-                if alpha > 0 and (x + y) % 2 == 0:
-                    px(img, x, y, (160, 230, 180, alpha))
+    outer_r = 30.0 * scale
+    inner_r = 22.0 * scale
+    fringe_w = 2.0 * scale
+    fade_w = 6.0 * scale
+
+    dist = radial_field(img, cx, cy)
+    ys, xs = np.ogrid[:size, :size]
+    diag = xs + ys
+    colors = np.zeros((size, size, 4), dtype=np.uint8)
+
+    # Outermost faint glow fringe (soft edge)
+    fringe = (dist > outer_r) & (dist <= outer_r + fringe_w)
+    fringe_alpha = (20 * (1.0 - (dist - outer_r) / fringe_w)).astype(int)
+    fringe &= fringe_alpha > 0
+    colors[fringe, :3] = (180, 255, 200)
+    colors[fringe, 3] = fringe_alpha[fringe]
+
+    # Main ring region (between inner_r and outer_r). Band position runs
+    # 0 at inner_r to 1 at outer_r; the ring is brightest mid-band.
+    ring = (dist >= inner_r) & (dist <= outer_r)
+    band_t = (dist - inner_r) / (outer_r - inner_r)
+    mid_dist = np.abs(band_t - 0.5) * 2.0
+    ring_colors = band_lookup(mid_dist, [0.3, 0.6, 0.85], [
+        (220, 255, 230, 90),  # Bright core of the ring
+        (180, 240, 200, 65),
+        (140, 220, 170, 40),
+        (120, 200, 150, 22),
+    ])
+    # Dither pattern for subtle texture
+    ring_colors[..., 3] -= np.where(diag % 3 == 0, 10, 0)
+    colors[ring] = np.clip(ring_colors, 0, 255)[ring]
+
+    # Interior fill (very subtle inner glow)
+    interior = (dist >= inner_r - fade_w) & (dist < inner_r)
+    fade_t = (inner_r - dist) / fade_w
+    interior_alpha = (18 * (1.0 - fade_t)).astype(int)
+    interior &= (interior_alpha > 0) & (diag % 2 == 0)
+    colors[interior, :3] = (160, 230, 180)
+    colors[interior, 3] = interior_alpha[interior]
+
+    paint_mask(img, fringe | ring | interior, colors)
 
     # Add a few sparkle points along the ring for visual interest
     sparkle_angles = [0.0, 0.7, 1.4, 2.1, 2.8, 3.5, 4.2, 4.9, 5.6]
@@ -1834,19 +2663,19 @@ def generate_aura():
     for angle in sparkle_angles:
         sx = int(cx + math.cos(angle) * sparkle_r)
         sy = int(cy + math.sin(angle) * sparkle_r)
-        px(img, sx, sy, (255, 255, 255, 110))
+        px(sparkle_layer, sx, sy, (255, 255, 255, 110))
         # Adjacent glow
         for ddx, ddy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            px(img, sx + ddx, sy + ddy, (220, 255, 230, 70))
+            px(sparkle_layer, sx + ddx, sy + ddy, (220, 255, 230, 70))
 
-    save(img, "aura.png")
+    save(flatten_layers(layers), "aura.png" if size == 64 else f"aura_{size}.png")
 
 
 # ============================================================
 # 19. PASSIVE ITEM: SPINACH (20x20) - Green leafy vegetable
 # ============================================================
 def generate_passive_spinach():
-    img = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
+    img = new_canvas(20, 20)
 
     green_hi = (100, 210, 80, 255)
     green_lt = (70, 180, 55, 255)
@@ -1908,7 +2737,7 @@ def generate_passive_spinach():
 # 20. PASSIVE ITEM: ARMOR (20x20) - Metal chest plate
 # ============================================================
 def generate_passive_armor():
-    img = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
+    img = new_canvas(20, 20)
 
     metal_hi = (200, 210, 220, 255)
     metal_lt = (170, 180, 195, 255)
@@ -1967,7 +2796,7 @@ def generate_passive_armor():
 # 21. PASSIVE ITEM: WINGS (20x20) - Feathered wings
 # ============================================================
 def generate_passive_wings():
-    img = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
+    img = new_canvas(20, 20)
 
     white = (255, 255, 255, 255)
     feather_hi = (220, 235, 250, 255)
@@ -2033,7 +2862,7 @@ def generate_passive_wings():
 # 22. PASSIVE ITEM: HOLLOW HEART (20x20) - Glowing red heart
 # ============================================================
 def generate_passive_hollow_heart():
-    img = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
+    img = new_canvas(20, 20)
 
     red_hi = (255, 130, 140, 255)
     red_lt = (240, 80, 90, 255)
@@ -2100,7 +2929,7 @@ def generate_passive_hollow_heart():
 # 23. PASSIVE ITEM: DUPLICATOR (20x20) - Double diamond / mirror
 # ============================================================
 def generate_passive_duplicator():
-    img = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
+    img = new_canvas(20, 20)
 
     gold_hi = (255, 230, 100, 255)
     gold_lt = (240, 210, 70, 255)
@@ -2176,7 +3005,7 @@ def generate_passive_duplicator():
 # 24. PASSIVE ITEM: TOME (20x20) - Magic spell book
 # ============================================================
 def generate_passive_tome():
-    img = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
+    img = new_canvas(20, 20)
 
     cover_hi = (140, 70, 30, 255)
     cover_lt = (120, 55, 20, 255)
@@ -2260,17 +3089,11 @@ def generate_passive_tome():
 # 25. MAGE (32x48) - Purple-robed wizard with pointed hat & staff
 # ============================================================
 def generate_mage():
-    img = Image.new("RGBA", (32, 48), (0, 0, 0, 0))
+    img = new_canvas(32, 48)
 
     # Purple robe palette (6 shading steps)
-    purp_hi = (180, 130, 220, 255)     # Brightest highlight
-    purp_lt = (150, 100, 200, 255)     # Light
-    purp = (110, 60, 170, 255)         # Base
-    purp_md = (85, 40, 145, 255)       # Mid shadow
-    purp_dk = (60, 25, 110, 255)       # Dark
-    purp_vdk = (38, 12, 75, 255)       # Deepest shadow
-    skin = (225, 185, 145, 255)
-    skin_shadow = (195, 155, 115, 255)
+    purp_hi, purp_lt, purp, purp_md, purp_dk, purp_vdk = PALETTES["arcane"]
+    skin, skin_shadow = PALETTES["skin"]
     eye_dark = (30, 30, 45, 255)
     hair_lt = (180, 175, 190, 255)
     hair = (150, 145, 165, 255)
@@ -2283,8 +3106,7 @@ def generate_mage():
     crystal = (60, 170, 230, 255)
     crystal_dk = (30, 120, 190, 255)
     crystal_glow = (100, 200, 255, 100)
-    gold = (200, 170, 40, 255)
-    gold_hi = (240, 215, 80, 255)
+    gold, gold_hi = PALETTES["trim_gold"]
 
     # === POINTED HAT ===
     # Hat tip
@@ -2430,15 +3252,10 @@ def generate_mage():
 # 26. BERSERKER (32x48) - Muscular red warrior with big axe
 # ============================================================
 def generate_berserker():
-    img = Image.new("RGBA", (32, 48), (0, 0, 0, 0))
+    img = new_canvas(32, 48)
 
     # Red / crimson armor palette
-    red_hi = (230, 100, 90, 255)       # Brightest highlight
-    red_lt = (200, 65, 55, 255)        # Light
-    red = (170, 40, 35, 255)           # Base
-    red_md = (140, 28, 25, 255)        # Mid shadow
-    red_dk = (105, 18, 15, 255)        # Dark
-    red_vdk = (70, 10, 8, 255)         # Deepest shadow
+    red_hi, red_lt, red, red_md, red_dk, red_vdk = PALETTES["crimson"]
     skin = (215, 175, 130, 255)
     skin_lt = (235, 200, 160, 255)
     skin_shadow = (185, 140, 95, 255)
@@ -2453,8 +3270,7 @@ def generate_berserker():
     axe = (160, 170, 180, 255)
     axe_dk = (120, 125, 135, 255)
     axe_vdk = (80, 85, 95, 255)
-    gold = (200, 170, 40, 255)
-    gold_hi = (240, 215, 80, 255)
+    gold, gold_hi = PALETTES["trim_gold"]
 
     # === WILD HAIR (no helmet) ===
     # Hair flowing outward
@@ -2620,17 +3436,11 @@ def generate_berserker():
 # 27. THIEF (32x48) - Dark hooded rogue with twin daggers
 # ============================================================
 def generate_thief():
-    img = Image.new("RGBA", (32, 48), (0, 0, 0, 0))
+    img = new_canvas(32, 48)
 
     # Dark gray / charcoal palette
-    gray_hi = (120, 120, 130, 255)     # Brightest highlight
-    gray_lt = (90, 90, 100, 255)       # Light
-    gray = (60, 60, 70, 255)           # Base
-    gray_md = (45, 45, 55, 255)        # Mid shadow
-    gray_dk = (30, 30, 40, 255)        # Dark
-    gray_vdk = (18, 18, 25, 255)       # Deepest shadow
-    skin = (225, 185, 145, 255)
-    skin_shadow = (195, 155, 115, 255)
+    gray_hi, gray_lt, gray, gray_md, gray_dk, gray_vdk = PALETTES["charcoal"]
+    skin, skin_shadow = PALETTES["skin"]
     eye_dark = (30, 30, 45, 255)
     mask = (50, 48, 55, 255)
     mask_dk = (35, 33, 40, 255)
@@ -2639,8 +3449,7 @@ def generate_thief():
     blade_dk = (140, 150, 165, 255)
     hilt_brown = (100, 65, 30, 255)
     hilt_dk = (70, 42, 15, 255)
-    gold = (200, 170, 40, 255)
-    gold_hi = (240, 215, 80, 255)
+    gold, gold_hi = PALETTES["trim_gold"]
     belt_brown = (90, 55, 22, 255)
 
     # === HOOD (deep, pulled low) ===
@@ -2796,7 +3605,7 @@ def generate_thief():
 # 28. TORCH (10x16) - Small wall torch, destructible prop
 # ============================================================
 def generate_torch():
-    img = Image.new("RGBA", (10, 16), (0, 0, 0, 0))
+    img = new_canvas(10, 16)
 
     wood_hi = (160, 110, 55, 255)
     wood_lt = (140, 90, 40, 255)
@@ -2859,7 +3668,7 @@ def generate_torch():
 # 29. BARREL (14x16) - Wooden barrel, destructible prop
 # ============================================================
 def generate_barrel():
-    img = Image.new("RGBA", (14, 16), (0, 0, 0, 0))
+    img = new_canvas(14, 16)
 
     wood_hi = (185, 130, 70, 255)
     wood_lt = (165, 110, 55, 255)
@@ -2943,7 +3752,7 @@ def generate_barrel():
 # 30. CRYSTAL (12x18) - Glowing blue crystal formation
 # ============================================================
 def generate_crystal():
-    img = Image.new("RGBA", (12, 18), (0, 0, 0, 0))
+    img = new_canvas(12, 18)
 
     glow = (80, 180, 255, 60)
     crys_white = (220, 240, 255, 255)
@@ -3019,7 +3828,7 @@ def generate_crystal():
 # 31. GOLD COIN (12x12) - Collectible gold coin
 # ============================================================
 def generate_gold_coin():
-    img = Image.new("RGBA", (12, 12), (0, 0, 0, 0))
+    img = new_canvas(12, 12)
 
     gold_hi = (255, 240, 120, 255)
     gold_lt = (255, 215, 75, 255)
@@ -3104,7 +3913,7 @@ def generate_gold_coin():
 # 32. PICKUP: CHICKEN (14x14) - Roasted chicken drumstick heal
 # ============================================================
 def generate_pickup_chicken():
-    img = Image.new("RGBA", (14, 14), (0, 0, 0, 0))
+    img = new_canvas(14, 14)
 
     meat_hi = (220, 170, 90, 255)
     meat_lt = (200, 145, 70, 255)
@@ -3163,7 +3972,7 @@ def generate_pickup_chicken():
 # 33. PICKUP: MAGNET (14x14) - Horseshoe magnet vacuum
 # ============================================================
 def generate_pickup_magnet():
-    img = Image.new("RGBA", (14, 14), (0, 0, 0, 0))
+    img = new_canvas(14, 14)
 
     red_hi = (240, 90, 80, 255)
     red_lt = (220, 60, 50, 255)
@@ -3224,7 +4033,7 @@ def generate_pickup_magnet():
 # 34. PICKUP: ROSARY (14x14) - Holy cross / rosary kill-all
 # ============================================================
 def generate_pickup_rosary():
-    img = Image.new("RGBA", (14, 14), (0, 0, 0, 0))
+    img = new_canvas(14, 14)
 
     silver_hi = (245, 248, 255, 255)
     silver_lt = (215, 220, 235, 255)
@@ -3301,7 +4110,7 @@ def generate_pickup_rosary():
 # 35. PICKUP: HOURGLASS (14x14) - Time freeze hourglass
 # ============================================================
 def generate_pickup_hourglass():
-    img = Image.new("RGBA", (14, 14), (0, 0, 0, 0))
+    img = new_canvas(14, 14)
 
     gold_hi = (255, 230, 100, 255)
     gold_lt = (240, 210, 70, 255)
@@ -3380,63 +4189,2001 @@ def generate_pickup_hourglass():
     save(img, "pickup_hourglass.png")
 
 
+# ============================================================
+# 36. ELITE ENEMIES (1.5x) - Gold variants derived from the base sheets
+# ============================================================
+# Elites used to be the base sprite tinted Color(1.3, 1.0, 0.5) and scaled
+# 1.5x in game.  These sheets bake that look instead: the base render is
+# remapped onto a gold ramp by brightness, rescaled with Scale3x and given
+# a rim light and a diagonal shimmer.  EnemyBase._apply_elite swaps them in.
+ELITE_SCALE = 1.5
+
+
+def _render_base(generator):
+    """Run another generator in memory and return the image it saves."""
+    outer = getattr(_capture, "images", None)
+    _capture.images = {}
+    try:
+        generator()
+        (img,) = _capture.images.values()
+        return img
+    finally:
+        _capture.images = outer
+
+
+def derive_elite(base):
+    img = rescale_pixel_art(base, ELITE_SCALE)
+    arr = np.array(img)
+    rgb = arr[..., :3].astype(np.float64)
+    lum = rgb @ np.array([0.299, 0.587, 0.114])
+    # Outlines stay dark; everything else maps onto the gold ramp by brightness
+    body = (arr[..., 3] > 0) & (lum > 16)
+    # except small saturated accents (eyes, gems, blades), which keep their colour
+    sat = (rgb.max(axis=-1) - rgb.min(axis=-1)) / np.maximum(rgb.max(axis=-1), 1.0)
+    accent = body & (sat > 0.5)
+    if accent.sum() < 0.15 * body.sum():
+        body &= ~accent
+    lo, hi = lum[body].min(), lum[body].max()
+    gold = palette_array("elite_gold")
+    paint_mask(img, body, ramp_lookup(gold[::-1], (lum - lo) / max(hi - lo, 1.0)))
+
+    # Rim light wherever the body meets empty space or outline above it
+    above = np.zeros_like(body)
+    above[1:] = body[:-1]
+    paint_mask(img, body & ~above, gold[1])
+    # Shimmer: a thin diagonal glint across the body
+    ys, xs = np.ogrid[:img.height, :img.width]
+    band = (xs + ys - img.height // 3) % (img.height + img.width) // 2 == 0
+    paint_mask(img, body & band, gold[0])
+    return img
+
+
+def generate_slime_elite():
+    save(derive_elite(_render_base(generate_slime)), "slime_elite.png")
+
+
+def generate_skeleton_elite():
+    save(derive_elite(_render_base(generate_skeleton)), "skeleton_elite.png")
+
+
+def generate_armored_knight_elite():
+    save(derive_elite(_render_base(generate_armored_knight)), "armored_knight_elite.png")
+
+
+# ============================================================
+# 37. DAMAGE NUMBERS (atlas) - Outlined pixel glyphs for combat text
+# ============================================================
+# Replaces the per-hit Labels in EnemyBase._show_damage_number and
+# _show_crit_label: one row per style, outlines baked in, and a metrics
+# file (damage_glyphs.json) that DamageNumber.gd reads to lay out quads.
+GLYPHS_5X7 = {
+    "0": (".###.", "#...#", "#..##", "#.#.#", "##..#", "#...#", ".###."),
+    "1": ("..#..", ".##..", "..#..", "..#..", "..#..", "..#..", ".###."),
+    "2": (".###.", "#...#", "....#", "...#.", "..#..", ".#...", "#####"),
+    "3": ("####.", "....#", "....#", ".###.", "....#", "....#", "####."),
+    "4": ("...#.", "..##.", ".#.#.", "#..#.", "#####", "...#.", "...#."),
+    "5": ("#####", "#....", "####.", "....#", "....#", "#...#", ".###."),
+    "6": ("..##.", ".#...", "#....", "####.", "#...#", "#...#", ".###."),
+    "7": ("#####", "....#", "...#.", "..#..", ".#...", ".#...", ".#..."),
+    "8": (".###.", "#...#", "#...#", ".###.", "#...#", "#...#", ".###."),
+    "9": (".###.", "#...#", "#...#", ".####", "....#", "...#.", ".##.."),
+    "C": (".###.", "#...#", "#....", "#....", "#....", "#...#", ".###."),
+    "R": ("####.", "#...#", "#...#", "####.", "#.#..", "#..#.", "#...#"),
+    "I": ("###", ".#.", ".#.", ".#.", ".#.", ".#.", "###"),
+    "T": ("#####", "..#..", "..#..", "..#..", "..#..", "..#..", "..#.."),
+    "!": ("#", "#", "#", "#", "#", ".", "#"),
+}
+# Label sizes 18 / 28 / 14 in game; words are baked as a single glyph
+DAMAGE_GLYPH_STYLES = (
+    # style, glyphs, pixel scale, outline px, fill, lower-half shade
+    ("normal", "0123456789", 2, 2, (255, 255, 255, 255), (200, 200, 215, 255)),
+    ("crit", "0123456789", 3, 2, (255, 230, 25, 255), (235, 150, 20, 255)),
+    ("crit_label", ("CRIT!",), 2, 1, (255, 77, 25, 255), (190, 40, 15, 255)),
+)
+DAMAGE_GLYPH_OUTLINE = (0, 0, 0, 255)
+
+
+def _glyph_mask(text):
+    """Boolean bitmap of a glyph or word in the 5x7 font, one column between letters."""
+    parts = []
+    for ch in text:
+        bitmap = np.array([[c == "#" for c in row] for row in GLYPHS_5X7[ch]])
+        # Proportional: drop empty columns so "1" is narrower than "8"
+        parts += [bitmap[:, bitmap.any(axis=0)], np.zeros((7, 1), dtype=bool)]
+    return np.hstack(parts[:-1])
+
+
+def draw_glyph(text, scale, outline, fill, shade):
+    """One outlined glyph image plus the width of its body (without outline)."""
+    mask = np.kron(_glyph_mask(text), np.ones((scale, scale), dtype=bool))
+    mask = np.pad(mask, outline)
+    img = new_canvas(mask.shape[1], mask.shape[0])
+    ring = np.zeros_like(mask)
+    for dy in range(-outline, outline + 1):
+        for dx in range(-outline, outline + 1):
+            ring |= np.roll(np.roll(mask, dy, axis=0), dx, axis=1)
+    paint_mask(img, ring & ~mask, DAMAGE_GLYPH_OUTLINE)
+    ys = np.arange(mask.shape[0])[:, None]
+    paint_mask(img, mask & (ys < outline + 4 * scale), fill)
+    paint_mask(img, mask & (ys >= outline + 4 * scale), shade)
+    return img, mask.shape[1] - 2 * outline
+
+
+def generate_damage_glyphs():
+    import json
+
+    rows, metrics = [], {}
+    y = 0
+    for style, glyphs, scale, outline, fill, shade in DAMAGE_GLYPH_STYLES:
+        x, height, entries = 0, 0, {}
+        for text in glyphs:
+            glyph, body = draw_glyph(text, scale, outline, fill, shade)
+            rows.append((glyph, x, y))
+            # Next glyph starts one font pixel after this body; outlines overlap
+            entries[text] = {"x": x, "y": y, "w": glyph.width, "h": glyph.height,
+                             "advance": body + scale}
+            x += glyph.width + 1
+            height = max(height, glyph.height)
+        metrics[style] = {"height": height, "outline": outline, "glyphs": entries}
+        y += height + 1
+    img = new_canvas(max(g.width + gx for g, gx, _ in rows), y - 1)
+    for glyph, gx, gy in rows:
+        img.paste(glyph, (gx, gy))
+        release_canvas(glyph)
+    save(img, "damage_glyphs.png")
+    data = {"version": 1, "texture": "res://assets/sprites/damage_glyphs.png", "styles": metrics}
+    save_data((json.dumps(data, indent=2) + "\n").encode("utf-8"), "damage_glyphs.json")
+
+
+# ============================================================
+# REGISTRY - Every sprite, grouped in build order
+# ============================================================
+# A sprite's name is its generator's name without the "generate_" prefix,
+# which is also the stem of the PNG it saves.
+SPRITE_GROUPS = (
+    ("Characters", (generate_knight, generate_archer, generate_mage,
+                    generate_berserker, generate_thief)),
+    ("Enemies", (generate_slime, generate_skeleton, generate_armored_knight,
+                 generate_dragon, generate_slime_elite, generate_skeleton_elite,
+                 generate_armored_knight_elite)),
+    ("Weapon Effects", (generate_sword_arc, generate_arrow, generate_fireball,
+                        generate_bone, generate_shield, generate_lightning,
+                        generate_orbit_projectile, generate_aura)),
+    ("Effects", (generate_damage_glyphs,)),
+    ("Pickups", (generate_xp_orb, generate_chest, generate_gold_coin,
+                 generate_pickup_chicken, generate_pickup_magnet,
+                 generate_pickup_rosary, generate_pickup_hourglass)),
+    ("Passive Items", (generate_passive_spinach, generate_passive_armor,
+                       generate_passive_wings, generate_passive_hollow_heart,
+                       generate_passive_duplicator, generate_passive_tome)),
+    ("Environment", (generate_rock, generate_cavern_floor, generate_torch,
+                     generate_barrel, generate_crystal)),
+)
+
+
+def sprite_name(generator):
+    return generator.__name__[len("generate_"):]
+
+
+def iter_sprites(names=None):
+    """Yield (category, generator) in build order, optionally filtered by sprite name."""
+    wanted = None if names is None else set(names)
+    known = {sprite_name(gen) for _, gens in SPRITE_GROUPS for gen in gens}
+    unknown = (wanted or set()) - known
+    if unknown:
+        raise ValueError(f"Unknown sprite(s): {', '.join(sorted(unknown))}")
+    for category, generators in SPRITE_GROUPS:
+        for gen in generators:
+            if wanted is None or sprite_name(gen) in wanted:
+                yield category, gen
+
+
+def iter_renders(names=None):
+    """Render sprites in build order, yielding (category, filename, Image) as each finishes."""
+    for category, gen in iter_sprites(names):
+        for filename, img in render(sprite_name(gen)).items():
+            yield category, filename, img
+
+
+def write_pipeline(items, workers=None, max_pending=None, on_written=None):
+    """Encode and write (path, Image) items on worker threads while the producer keeps rendering.
+
+    A bounded queue sits between the two stages: when encoding falls behind,
+    the producer blocks instead of piling up rendered images, so memory
+    stays flat and wall time tends towards max(render, encode).  Each image
+    goes back to the canvas pool once it has been written, right after
+    on_written(path, img, png_bytes, encode_ms, changed) if that is given.
+    """
+    import queue
+
+    workers = workers or min(8, os.cpu_count() or 1)
+    pending = queue.Queue(maxsize=max_pending or 2 * workers)
+    errors = []
+
+    def worker():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            path, img = item
+            try:
+                started = time.perf_counter()
+                data = encode_png(img)
+                encode_ms = (time.perf_counter() - started) * 1000.0
+                data, changed = write_sprite(path, data, img)
+                if on_written:
+                    on_written(path, img, data, encode_ms, changed)
+            except Exception as exc:
+                errors.append((path, exc))
+            release_canvas(img)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    try:
+        for item in items:
+            pending.put(item)
+    finally:
+        for _ in threads:
+            pending.put(None)
+        for t in threads:
+            t.join()
+    if errors:
+        path, exc = errors[0]
+        raise RuntimeError(f"failed to write {len(errors)} file(s), first {path}: {exc}") from exc
+
+
+MANIFEST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sprites_manifest.json")
+MANIFEST_VERSION = 1
+
+
+@functools.lru_cache(maxsize=None)
+def generator_version():
+    """Short hash of this script's source; changes whenever the generator does."""
+    import hashlib
+
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def _load_manifest():
+    import json
+
+    if not os.path.exists(MANIFEST_FILE):
+        return {}
+    with open(MANIFEST_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return {entry["file"]: entry for entry in data["sprites"]}
+
+
+def write_manifest(entries):
+    """Merge build entries into MANIFEST_FILE, dropping files that no longer exist."""
+    import json
+
+    merged = {f: e for f, e in _load_manifest().items()
+              if os.path.exists(os.path.join(OUTPUT_DIR, f))}
+    merged.update(entries)
+    data = {"version": MANIFEST_VERSION, "generator_version": generator_version(),
+            "sprites": [merged[f] for f in sorted(merged)]}
+    write_atomic(MANIFEST_FILE, (json.dumps(data, indent=2) + "\n").encode("utf-8"))
+
+
+def build(names=None, workers=None, events=None, stages=()):
+    """Generate sprites into OUTPUT_DIR (all of them unless names are given).
+
+    stages names BUILD_STAGES to run on every rendered image; their outputs
+    are written next to it.  Every written file gets an entry in
+    MANIFEST_FILE.  events, if given, is called with one dict per build event
+    (start, each image, end) - from worker threads, so it must be thread-safe.
+    Returns {"sprites": n, "written": n, "unchanged": n}: sprites counts the
+    generated images only, the other two every image file including stage
+    outputs.
+    """
+    import hashlib
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    emit = events or (lambda event: None)
+    entries = {}
+    changed_files = {}
+    count = 0
+    started = time.perf_counter()
+    emit({"event": "build_start", "output_dir": OUTPUT_DIR, "generator_version": generator_version()})
+
+    def rendered():
+        nonlocal count
+        for category, gen in iter_sprites(names):
+            name = sprite_name(gen)
+            t0 = time.perf_counter()
+            images, files = render_outputs(name)
+            render_ms = round((time.perf_counter() - t0) * 1000.0, 3)
+            for filename, data in files.items():
+                write_if_changed(os.path.join(OUTPUT_DIR, filename), data)
+            for filename, img in images.items():
+                count += 1
+                # Derive before yielding: the writer recycles img once it is encoded
+                outputs = [(filename, img, render_ms, None)]
+                for stage in stages:
+                    t0 = time.perf_counter()
+                    derived = BUILD_STAGES[stage](filename, img)
+                    stage_ms = round((time.perf_counter() - t0) * 1000.0, 3)
+                    outputs += [(f, d, stage_ms, stage) for f, d in derived.items()]
+                for out_name, out_img, ms, stage in outputs:
+                    if out_name in entries:
+                        continue    # shared stage output (the palette LUT) is written once
+                    entry = {"name": name, "category": category, "file": out_name,
+                             "width": out_img.width, "height": out_img.height,
+                             "render_ms": ms, "generator_version": generator_version()}
+                    if stage:
+                        entry.update(stage=stage, source=filename)
+                        for key in ("pivot", "variants"):
+                            if key in out_img.info:
+                                entry[key] = list(out_img.info[key])
+                    entries[out_name] = entry
+                    yield os.path.join(OUTPUT_DIR, out_name), out_img
+
+    def written(path, img, data, encode_ms, changed):
+        entry = entries[os.path.basename(path)]
+        entry.update(bytes=len(data), sha256=hashlib.sha256(data).hexdigest(),
+                     pixels_sha256=image_digest(img), encode_ms=round(encode_ms, 3))
+        changed_files[entry["file"]] = changed
+        emit({"event": "sprite", "changed": changed, **entry})
+
+    try:
+        write_pipeline(rendered(), workers, on_written=written)
+    except Exception as exc:
+        emit({"event": "build_failed", "error": str(exc)})
+        raise
+    # Writers finish out of order, so the report waits for all of them
+    current = None
+    for entry in entries.values():
+        status = "Created" if changed_files[entry["file"]] else "Unchanged"
+        if "stage" in entry:
+            print(f"    + {entry['file']} ({entry['stage']}, {status.lower()})")
+            continue
+        if entry["category"] != current:
+            print(f"{chr(10) if current else ''}[{entry['category']}]")
+            current = entry["category"]
+        print(f"  {status}: {entry['file']} ({entry['width']}x{entry['height']})")
+    write_manifest(entries)
+    written = sum(changed_files.values())
+    summary = {"sprites": count, "written": written, "unchanged": len(changed_files) - written}
+    emit({"event": "build_end", "count": len(changed_files), **summary, "manifest": MANIFEST_FILE,
+          "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 3)})
+    return summary
+
+
+def check_import_time(budget_ms=IMPORT_BUDGET_MS):
+    """Import this module in a fresh interpreter and fail if it exceeds the budget.
+
+    Uses `python -X importtime` and reads the cumulative time of this
+    module's own entry, so interpreter start-up is not counted.  Also fails
+    if the import pulls in any of DEFERRED_MODULES.
+    """
+    import subprocess
+
+    module = os.path.splitext(os.path.basename(__file__))[0]
+    # Time a warm import: the first run only makes sure bytecode is cached
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    for _ in range(2):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env, capture_output=True, text=True, check=True,
+        )
+    cumulative_us = None
+    loaded = []
+    for line in result.stderr.splitlines():
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            cumulative_us = int(fields[1])
+        elif len(fields) == 3 and fields[2] in DEFERRED_MODULES:
+            loaded.append(fields[2])
+    if cumulative_us is None:
+        raise RuntimeError(f"-X importtime did not report {module}")
+    elapsed_ms = cumulative_us / 1000.0
+    print(f"import {module}: {elapsed_ms:.2f} ms (budget {budget_ms:.1f} ms)")
+    if loaded:
+        print(f"import {module} loaded deferred modules: {', '.join(loaded)}")
+    return elapsed_ms <= budget_ms and not loaded
+
+
+# ============================================================
+# GODOT IMPORT FILES - Stable .import sidecars for every written sprite
+# ============================================================
+# Godot rewrites a PNG's .import file (uid, hashed .ctex path, params) when
+# it first sees it, and reimports whenever the PNG changes.  Writing the
+# sidecar ourselves - keeping any uid Godot already assigned, otherwise one
+# derived from the path - and skipping byte-identical PNGs leaves the editor
+# and headless exports with nothing to redo for unchanged sprites.
+
+GODOT_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Pixel art: lossless, no mipmaps, no filtering artefacts at alpha edges
+GODOT_TEXTURE_PARAMS = (
+    ("compress/mode", "0"),
+    ("compress/high_quality", "false"),
+    ("compress/lossy_quality", "0.7"),
+    ("compress/uastc_level", "0"),
+    ("compress/rdo_quality_loss", "0.0"),
+    ("compress/hdr_compression", "1"),
+    ("compress/normal_map", "0"),
+    ("compress/channel_pack", "0"),
+    ("mipmaps/generate", "false"),
+    ("mipmaps/limit", "-1"),
+    ("roughness/mode", "0"),
+    ("roughness/src_normal", '""'),
+    ("process/channel_remap/red", "0"),
+    ("process/channel_remap/green", "1"),
+    ("process/channel_remap/blue", "2"),
+    ("process/channel_remap/alpha", "3"),
+    ("process/fix_alpha_border", "true"),
+    ("process/premult_alpha", "false"),
+    ("process/normal_map_invert_y", "false"),
+    ("process/hdr_as_srgb", "false"),
+    ("process/hdr_clamp_exposure", "false"),
+    ("process/size_limit", "0"),
+    ("detect_3d/compress_to", "1"),
+)
+# ResourceUID's text form is base 34: 'a'-'y' for 0-24, then '0'-'8' for 25-33
+_UID_CHARS = "abcdefghijklmnopqrstuvwxy012345678"
+
+
+def res_path(path):
+    """The res:// path of a file inside the Godot project, or None if it is outside."""
+    rel = os.path.relpath(os.path.abspath(path), GODOT_PROJECT_DIR)
+    if rel == ".." or rel.startswith(".." + os.sep):
+        return None
+    return "res://" + rel.replace(os.sep, "/")
+
+
+def godot_uid(resource):
+    """Deterministic uid:// for a resource path, in ResourceUID's base-34 text form."""
+    import hashlib
+
+    value = int.from_bytes(hashlib.sha256(resource.encode("utf-8")).digest()[:8], "big")
+    value &= 0x7FFFFFFFFFFFFFFF
+    digits = ""
+    while True:
+        value, c = divmod(value, len(_UID_CHARS))
+        digits = _UID_CHARS[c] + digits
+        if not value:
+            return "uid://" + digits
+
+
+def _existing_uid(import_path):
+    try:
+        with open(import_path, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith('uid="uid://'):
+                    uid = line.split('"')[1]
+                    # Godot reads any other character as a different id and rewrites it
+                    return uid if set(uid[len("uid://"):]) <= set(_UID_CHARS) else None
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def import_file_text(resource, uid):
+    """Contents of the .import sidecar Godot would write for a PNG texture."""
+    import hashlib
+
+    name = resource.rsplit("/", 1)[-1]
+    ctex = f"res://.godot/imported/{name}-{hashlib.md5(resource.encode('utf-8')).hexdigest()}.ctex"
+    params = "\n".join(f"{key}={value}" for key, value in GODOT_TEXTURE_PARAMS)
+    return (f'[remap]\n\nimporter="texture"\ntype="CompressedTexture2D"\nuid="{uid}"\n'
+            f'path="{ctex}"\nmetadata={{\n"vram_texture": false\n}}\n\n'
+            f'[deps]\n\nsource_file="{resource}"\ndest_files=["{ctex}"]\n\n'
+            f'[params]\n\n{params}\n')
+
+
+def write_import_file(png_path):
+    """Create or refresh png_path's .import sidecar; returns True if it was written."""
+    resource = res_path(png_path)
+    if resource is None:
+        return False
+    import_path = png_path + ".import"
+    uid = _existing_uid(import_path) or godot_uid(resource)
+    return write_if_changed(import_path, import_file_text(resource, uid).encode("utf-8"))
+
+
+def _same_pixels(data, img):
+    """True if PNG bytes decode to exactly img's pixels."""
+    try:
+        with Image.open(io.BytesIO(data)) as old:
+            old.load()
+            return old.mode == img.mode and old.size == img.size and image_digest(old) == image_digest(img)
+    except (OSError, SyntaxError, ValueError):
+        return False
+
+
+def write_sprite(path, data, img):
+    """Write an encoded sprite and its .import sidecar, skipping unchanged files.
+
+    A file is unchanged if its pixels match img, even when another Pillow or
+    zlib build encoded it to different bytes.  Returns (bytes on disk, written).
+    """
+    try:
+        with open(path, "rb") as f:
+            old = f.read()
+    except FileNotFoundError:
+        old = None
+    if old is not None and (old == data or _same_pixels(old, img)):
+        data, changed = old, False
+    else:
+        write_atomic(path, data)
+        changed = True
+    write_import_file(path)
+    return data, changed
+
+
+# ============================================================
+# NORMAL MAPS - *_n.png for Godot 2D lights
+# ============================================================
+# Height is a heuristic: the alpha mask blurred into a dome (silhouettes
+# bulge, edges slope away) plus luminance, which already carries the shared
+# top-left lighting.  A Sobel pass over the whole array turns height into
+# tangent-space normals in Godot's convention (green points up).  The map
+# has the sprite's exact size, so strips and atlases line up cell for cell.
+
+NORMAL_MAP_STRENGTH = 3.0
+_LUMA = (0.299, 0.587, 0.114)
+
+
+def _box_blur(field):
+    """3x3 mean with transparent (zero) surroundings."""
+    p = np.pad(field, 1)
+    h, w = field.shape
+    return sum(p[dy:dy + h, dx:dx + w] for dy in range(3) for dx in range(3)) / 9.0
+
+
+def sobel(field):
+    """(d/dx, d/dy) of a 2D field, edges replicated, y pointing down."""
+    p = np.pad(field, 1, mode="edge")
+    gx = (p[:-2, 2:] + 2 * p[1:-1, 2:] + p[2:, 2:]) - (p[:-2, :-2] + 2 * p[1:-1, :-2] + p[2:, :-2])
+    gy = (p[2:, :-2] + 2 * p[2:, 1:-1] + p[2:, 2:]) - (p[:-2, :-2] + 2 * p[:-2, 1:-1] + p[:-2, 2:])
+    return gx / 8.0, gy / 8.0
+
+
+def height_field(img):
+    arr = np.asarray(img, dtype=np.float64) / 255.0
+    alpha = arr[..., 3]
+    dome = _box_blur(_box_blur(alpha))
+    return 0.6 * dome + 0.4 * (arr[..., :3] @ np.array(_LUMA)) * alpha
+
+
+def normal_map(img, strength=NORMAL_MAP_STRENGTH):
+    """RGBA normal map of img; transparent pixels are flat and keep alpha 0."""
+    gx, gy = sobel(height_field(img))
+    # Surface faces away from rising height; flip y so +green is up
+    n = np.dstack([-gx * strength, gy * strength, np.ones_like(gx)])
+    n /= np.linalg.norm(n, axis=-1, keepdims=True)
+    out = np.empty(n.shape[:2] + (4,), dtype=np.uint8)
+    out[..., :3] = np.rint((n * 0.5 + 0.5) * 255.0)
+    out[..., 3] = np.asarray(img)[..., 3]
+    out[out[..., 3] == 0, :3] = (128, 128, 255)
+    result = new_canvas(img.width, img.height)
+    result.frombytes(out.tobytes())
+    return result
+
+
+def stage_normal_maps(filename, img):
+    stem = filename[:-len(".png")]
+    return {f"{stem}_n.png": normal_map(img)}
+
+
+# ============================================================
+# SIGNED DISTANCE FIELDS - *_sdf.png for rings and glows scaled in game
+# ============================================================
+# Aura, shield and orbit glows are scaled up to 2.5x at runtime, which blurs
+# or aliases them.  A single-channel SDF lets a shader cut a crisp edge at
+# any scale.  Distances are exact Euclidean: a separable two-pass transform
+# (Felzenszwalb-Huttenlocher) that is linear in the number of pixels.
+
+SDF_SPRITES = frozenset({"aura.png", "shield.png", "orbit_projectile.png"})
+# Distance in source pixels that maps to the full 0..255 range either side of 128
+SDF_SPREAD = 8.0
+
+
+def _lower_envelope(f):
+    """1D squared distance transform of the samples f (Felzenszwalb-Huttenlocher).
+
+    Each sample q contributes the parabola (x - q)^2 + f[q]; one pass builds
+    their lower envelope and a second reads it back, so a line costs O(n).
+    """
+    n = len(f)
+    vertex = [0] * n
+    bound = [-math.inf, math.inf] + [0.0] * (n - 1)
+    k = 0
+    for q in range(1, n):
+        fq = f[q] + q * q
+        while True:
+            p = vertex[k]
+            s = (fq - f[p] - p * p) / (2 * (q - p))
+            if s > bound[k]:
+                break
+            k -= 1
+        k += 1
+        vertex[k] = q
+        bound[k] = s
+        bound[k + 1] = math.inf
+    out = []
+    k = 0
+    for q in range(n):
+        while bound[k + 1] < q:
+            k += 1
+        p = vertex[k]
+        out.append((q - p) * (q - p) + f[p])
+    return out
+
+
+def _squared_distance_to(feature):
+    """Exact squared Euclidean distance from every pixel to the nearest True pixel.
+
+    Separable: a 1D transform along every row, then along every column of
+    the result, for O(h * w) work overall.
+    """
+    h, w = feature.shape
+    # Any finite value above the largest real distance works as "no feature"
+    far = float(h * h + w * w)
+    rows = [_lower_envelope(line) for line in np.where(feature, 0.0, far).tolist()]
+    cols = [_lower_envelope(line) for line in zip(*rows)]
+    return np.array(cols, dtype=np.float64).T
+
+
+def signed_distance(mask):
+    """Distance to the mask edge in pixels: negative inside, positive outside."""
+    if not mask.any():
+        return np.full(mask.shape, np.inf)
+    if mask.all():
+        return np.full(mask.shape, -np.inf)
+    outside = np.sqrt(_squared_distance_to(mask))
+    inside = np.sqrt(_squared_distance_to(~mask))
+    # Pixel centres sit half a pixel from the edge between them
+    return np.where(mask, 0.5 - inside, outside - 0.5)
+
+
+def sdf_image(img, spread=SDF_SPREAD):
+    """Single-channel SDF of img's alpha, thresholded at half its peak opacity."""
+    alpha = np.asarray(img)[..., 3]
+    dist = signed_distance(alpha >= max(int(alpha.max()) // 2, 1))
+    value = np.clip(128.0 - dist * (127.0 / spread), 0, 255)
+    return Image.fromarray(np.rint(value).astype(np.uint8), "L")
+
+
+def stage_sdf(filename, img):
+    if filename not in SDF_SPRITES:
+        return {}
+    return {f"{filename[:-len('.png')]}_sdf.png": sdf_image(img)}
+
+
+# ============================================================
+# ROTSPRITE SHEETS - Pre-rotated frames for directional projectiles
+# ============================================================
+# RotSprite: upscale 8x with three Scale2x passes (which smooths diagonals
+# using only existing colours), rotate with nearest sampling, and take one
+# sample per 8x8 block back at 1x.  Every angle is computed in one numpy
+# gather.  Frame i is the sprite turned clockwise by i * 360 / n degrees
+# (Godot's rotation direction); cells are square and large enough for any
+# angle, ROTSPRITE_COLUMNS to a row.
+
+ROTSPRITE_SHEETS = {"arrow.png": 32, "bone.png": 16, "sword_arc.png": 16, "fireball.png": 16}
+ROTSPRITE_COLUMNS = 8
+
+
+def rotsprite_frames(img, count):
+    """(count, cell, cell) packed frames of img rotated clockwise in even steps."""
+    big = scale2x_packed(scale2x_packed(scale2x_packed(_packed(img))))
+    cell = math.ceil(math.hypot(img.width, img.height))
+    cell += (cell - img.width) % 2    # keep centres on the same pixel grid
+    offsets = np.arange(cell) + 0.5 - cell / 2.0
+    theta = np.arange(count)[:, None, None] * (2.0 * math.pi / count)
+    cos, sin = np.cos(theta), np.sin(theta)
+    dx, dy = offsets[None, None, :], offsets[None, :, None]
+    # Inverse rotation: where in the 8x source each output pixel centre lands
+    bx = np.floor((cos * dx + sin * dy + img.width / 2.0) * 8.0).astype(np.intp)
+    by = np.floor((-sin * dx + cos * dy + img.height / 2.0) * 8.0).astype(np.intp)
+    inside = (bx >= 0) & (bx < big.shape[1]) & (by >= 0) & (by < big.shape[0])
+    samples = big[np.clip(by, 0, big.shape[0] - 1), np.clip(bx, 0, big.shape[1] - 1)]
+    return np.where(inside, samples, 0).astype(np.uint32)
+
+
+def rotsprite_sheet(img, count, columns=ROTSPRITE_COLUMNS):
+    frames = rotsprite_frames(img, count)
+    cell = frames.shape[1]
+    columns = min(columns, count)
+    rows = -(-count // columns)
+    grid = np.zeros((rows * columns, cell, cell), dtype=np.uint32)
+    grid[:count] = frames
+    sheet = grid.reshape(rows, columns, cell, cell).transpose(0, 2, 1, 3)
+    return _unpacked(sheet.reshape(rows * cell, columns * cell))
+
+
+def stage_rotsprite(filename, img):
+    count = ROTSPRITE_SHEETS.get(filename)
+    if count is None:
+        return {}
+    return {f"{filename[:-len('.png')]}_rot{count}.png": rotsprite_sheet(img, count)}
+
+
+# ============================================================
+# HD VARIANTS - @2x/@3x/@4x art for sprites drawn large in game
+# ============================================================
+# Opt-in per sprite, with the factors worth shipping for how the game scales
+# it.  Scale2x (identical to EPX) and Scale3x are the neighbourhood passes
+# above; 4x is two Scale2x passes.  Edges come out smoothed but the palette
+# is untouched, unlike a runtime bilinear or non-integer nearest scale.
+
+UPSCALE_SPRITES = {
+    "lightning.png": (2,),            # LightningStrikeEffect draws it at 2.0x
+    "shield.png": (2, 3),             # Evolved_Fortress at 2.5x
+    "sword_arc.png": (2,),            # Evolved_DragonCleaver at 2.2x
+    "rock.png": (2,),                 # RockSpawner up to 1.3x
+    "skeleton.png": (2,),             # Enemy_SkeletonLord at 2.0x
+    "armored_knight.png": (3,),       # Enemy_DarkKnightCommander at 2.5x
+    "slime.png": (3,),                # Enemy_GiantSlime at 3.0x
+}
+UPSCALERS = {
+    2: scale2x_packed,
+    3: scale3x_packed,
+    4: lambda px: scale2x_packed(scale2x_packed(px)),
+}
+
+
+def stage_upscale(filename, img):
+    stem = filename[:-len(".png")]
+    return {f"{stem}@{factor}x.png": _unpacked(UPSCALERS[factor](_packed(img)))
+            for factor in UPSCALE_SPRITES.get(filename, ())}
+
+
+# ============================================================
+# BLOOM - Offline glow for emissive effects
+# ============================================================
+# Bright pixels (HSV value over BLOOM_THRESHOLD, so saturated blues and
+# reds count as well as whites) form an emissive mask that is blurred with
+# a separable Gaussian in premultiplied space.  Two outputs, both padded by
+# the blur radius on every side so a centred Sprite2D stays aligned:
+# *_glow.png on its own, for an additive CanvasItemMaterial over the normal
+# sprite, and *_bloom.png with the glow already added through the layer
+# stack.  Either replaces the runtime WorldEnvironment glow.
+
+BLOOM_SPRITES = frozenset({"fireball.png", "lightning.png", "orbit_projectile.png", "crystal.png"})
+BLOOM_THRESHOLD = 0.6
+BLOOM_SIGMA = 2.0
+BLOOM_STRENGTH = 1.2
+
+
+def gaussian_kernel(sigma):
+    radius = max(1, math.ceil(3.0 * sigma))
+    x = np.arange(-radius, radius + 1, dtype=np.float64)
+    k = np.exp(-x * x / (2.0 * sigma * sigma))
+    return k / k.sum()
+
+
+def gaussian_blur(arr, sigma):
+    """Separable Gaussian over the first two axes, zero outside the array."""
+    k = gaussian_kernel(sigma)
+    r = len(k) // 2
+    h, w = arr.shape[:2]
+    rest = ((0, 0),) * (arr.ndim - 2)
+    p = np.pad(arr, ((r, r), (0, 0)) + rest)
+    arr = sum(k[i] * p[i:i + h] for i in range(len(k)))
+    p = np.pad(arr, ((0, 0), (r, r)) + rest)
+    return sum(k[i] * p[:, i:i + w] for i in range(len(k)))
+
+
+def glow_layer(img, threshold=BLOOM_THRESHOLD, sigma=BLOOM_SIGMA, strength=BLOOM_STRENGTH):
+    """Padded straight-alpha glow of img's emissive pixels, meant for additive blending."""
+    pad = len(gaussian_kernel(sigma)) // 2
+    arr = np.pad(np.asarray(img, dtype=np.float64) / 255.0, ((pad, pad), (pad, pad), (0, 0)))
+    value = arr[..., :3].max(axis=-1)
+    emission = np.clip((value - threshold) / (1.0 - threshold), 0.0, 1.0) * arr[..., 3]
+    glow = np.clip(gaussian_blur(arr[..., :3] * emission[..., None], sigma) * strength, 0.0, 1.0)
+    # Store so that rgb * alpha gives back the premultiplied glow
+    alpha = glow.max(axis=-1, keepdims=True)
+    rgb = np.divide(glow, alpha, out=np.zeros_like(glow), where=alpha > 0)
+    out = new_canvas(arr.shape[1], arr.shape[0])
+    out.frombytes(np.rint(np.concatenate([rgb, alpha], axis=-1) * 255.0).astype(np.uint8).tobytes())
+    return out
+
+
+def stage_bloom(filename, img):
+    if filename not in BLOOM_SPRITES:
+        return {}
+    stem = filename[:-len(".png")]
+    glow = glow_layer(img)
+    pad = (glow.width - img.width) // 2
+    layers = []
+    new_layer(layers, glow.size).paste(img, (pad, pad))
+    new_layer(layers, glow.size, "add").paste(glow, (0, 0))
+    return {f"{stem}_glow.png": glow, f"{stem}_bloom.png": flatten_layers(layers)}
+
+
+# ============================================================
+# DROP SHADOWS - Baked ground shadows for characters, enemies and props
+# ============================================================
+# A soft ellipse sized from the sprite's footprint (the widest extent of
+# its lowest quarter) sits on the ground line under the feet, so scenes get
+# a shadow without an extra node per enemy.  The canvas grows only where
+# the shadow needs room; "pivot" in the manifest is where the original
+# sprite's centre ended up, so Sprite2D.offset = size / 2 - pivot keeps the
+# art in place.  *_shadow.png is the shadow alone, *_shadowed.png has the
+# sprite composited over it.
+
+# filename -> overrides for drop_shadow()
+SHADOW_SPRITES = {
+    "knight.png": {}, "archer.png": {}, "mage.png": {}, "berserker.png": {}, "thief.png": {},
+    "slime.png": {}, "skeleton.png": {}, "armored_knight.png": {},
+    "slime_elite.png": {}, "skeleton_elite.png": {}, "armored_knight_elite.png": {},
+    "dragon.png": {"offset": (0, 3), "alpha": 0.3},    # hovers above the ground
+    "torch.png": {}, "barrel.png": {}, "crystal.png": {},
+}
+SHADOW_OFFSET = (0, 0)
+SHADOW_BLUR = 1.0
+SHADOW_ALPHA = 0.45
+SHADOW_SQUASH = 0.3
+
+
+def drop_shadow(img, offset=SHADOW_OFFSET, blur=SHADOW_BLUR, alpha=SHADOW_ALPHA, squash=SHADOW_SQUASH):
+    """(shadow, composite, pivot) for img; pivot is img's centre in the new canvas."""
+    opaque = np.asarray(img)[..., 3] > 0
+    rows = np.nonzero(opaque.any(axis=1))[0]
+    top, bottom = rows[0], rows[-1]
+    feet = opaque[max(top, bottom + 1 - max(1, (bottom - top + 1) // 4)):bottom + 1]
+    cols = np.nonzero(feet.any(axis=0))[0]
+    rx = max(1.0, (cols[-1] - cols[0] + 1) / 2.0)
+    ry = max(1.0, rx * squash)
+    cx = (cols[0] + cols[-1] + 1) / 2.0 + offset[0]
+    cy = bottom + 1.0 + offset[1]
+    # Grow the canvas just enough for the blurred ellipse
+    pad = math.ceil(3.0 * blur)
+    left = min(0, math.floor(cx - rx) - pad)
+    upper = min(0, math.floor(cy - ry) - pad)
+    width = max(img.width, math.ceil(cx + rx) + pad) - left
+    height = max(img.height, math.ceil(cy + ry) + pad) - upper
+    ys, xs = np.mgrid[:height, :width] + 0.5
+    inside = ((xs + left - cx) / rx) ** 2 + ((ys + upper - cy) / ry) ** 2 <= 1.0
+    density = gaussian_blur(inside.astype(np.float64), blur) * alpha
+    out = np.zeros((height, width, 4), dtype=np.uint8)
+    out[..., 3] = np.rint(np.clip(density, 0.0, 1.0) * 255.0)
+    shadow = new_canvas(width, height)
+    shadow.frombytes(out.tobytes())
+
+    layers = []
+    new_layer(layers, (width, height)).paste(shadow, (0, 0))
+    new_layer(layers, (width, height)).paste(img, (-left, -upper))
+    pivot = (-left + img.width / 2.0, -upper + img.height / 2.0)
+    return shadow, flatten_layers(layers), pivot
+
+
+def stage_shadow(filename, img):
+    if filename not in SHADOW_SPRITES:
+        return {}
+    stem = filename[:-len(".png")]
+    shadow, composite, pivot = drop_shadow(img, **SHADOW_SPRITES[filename])
+    shadow.info["pivot"] = composite.info["pivot"] = pivot
+    return {f"{stem}_shadow.png": shadow, f"{stem}_shadowed.png": composite}
+
+
+# ============================================================
+# PALETTE SWAPS - Index textures and a shared palette LUT for recolours
+# ============================================================
+# *_idx.png stores a palette slot per pixel (8-bit greyscale, read as R8);
+# palette_lut.png has one 256-wide row per entry in PALETTE_VARIANTS, so a
+# single shader (shaders/palette_swap.gdshader) recolours any indexed
+# sprite by picking a row.  Slot 0 is transparent, then every PALETTES
+# colour in order, then the remaining colours of PALETTE_SPRITES, which no
+# variant changes.  A variant replaces whole palettes, resampled with
+# ramp_through() when the replacement has a different number of steps.
+
+PALETTE_SPRITES = ("knight.png", "archer.png", "mage.png", "berserker.png", "thief.png",
+                   "slime.png", "skeleton.png", "armored_knight.png", "fireball.png")
+_ARMOUR = ("steel", "forest", "arcane", "crimson", "charcoal", "dark_metal")
+# LUT rows, top to bottom: variant -> {palette: replacement palette}
+PALETTE_VARIANTS = {
+    "base": {},
+    "crimson": dict.fromkeys(_ARMOUR, "crimson"),
+    "arcane": dict.fromkeys(_ARMOUR, "arcane"),
+    "frost": {**dict.fromkeys(_ARMOUR, "steel"), "slime": "gem_blue", "fire": "gem_blue",
+              "bone": "gem_diamond"},
+    "elite": {**dict.fromkeys(_ARMOUR, "elite_gold"), "slime": "elite_gold", "bone": "elite_gold",
+              "fire": "elite_gold"},
+}
+PALETTE_LUT_FILE = "palette_lut.png"
+PALETTE_LUT_WIDTH = 256
+
+
+def _packed_rgba(arr):
+    """uint32 key per RGBA pixel, for exact colour lookups."""
+    return np.ascontiguousarray(arr, dtype=np.uint8).view(np.uint32)[..., 0]
+
+
+@functools.lru_cache(maxsize=1)
+def palette_slots():
+    """(colours, slices): the LUT's base row and each palette's slots in it."""
+    colours = [(0, 0, 0, 0)]
+    slices = {}
+    for name, palette in PALETTES.items():
+        slices[name] = slice(len(colours), len(colours) + len(palette))
+        colours += palette
+    seen = set(colours)
+    extras = set()
+    for filename in PALETTE_SPRITES:
+        img = render(filename[:-len(".png")])[filename]
+        arr = np.asarray(img).reshape(-1, 4)
+        extras.update(tuple(int(v) for v in c) for c in np.unique(arr[arr[:, 3] > 0], axis=0))
+    colours += sorted(extras - seen)
+    if len(colours) > PALETTE_LUT_WIDTH:
+        raise ValueError(f"palette LUT needs {len(colours)} slots, only {PALETTE_LUT_WIDTH} fit")
+    return np.array(colours, dtype=np.uint8), slices
+
+
+@functools.lru_cache(maxsize=1)
+def palette_lut():
+    """Read-only (variants, PALETTE_LUT_WIDTH, 4) table: one recolour per row."""
+    base, slices = palette_slots()
+    lut = np.zeros((len(PALETTE_VARIANTS), PALETTE_LUT_WIDTH, 4), dtype=np.uint8)
+    for row, swaps in enumerate(PALETTE_VARIANTS.values()):
+        lut[row, :len(base)] = base
+        for name, replacement in swaps.items():
+            span = slices[name]
+            lut[row, span] = ramp_through(PALETTES[replacement], span.stop - span.start)
+    return _frozen(lut)
+
+
+def palette_indices(img):
+    """L-mode image of LUT slots for img; every colour must already have a slot."""
+    base, _ = palette_slots()
+    arr = np.asarray(img).copy()
+    arr[arr[..., 3] == 0] = 0
+    keys = _packed_rgba(base)
+    order = np.argsort(keys)
+    pixels = _packed_rgba(arr)
+    pos = np.minimum(np.searchsorted(keys, pixels, sorter=order), len(keys) - 1)
+    index = order[pos]
+    if not np.array_equal(keys[index], pixels):
+        raise ValueError("image has colours outside the palette LUT")
+    return Image.fromarray(index.astype(np.uint8), "L")
+
+
+def stage_palette(filename, img):
+    if filename not in PALETTE_SPRITES:
+        return {}
+    stem = filename[:-len(".png")]
+    lut = Image.fromarray(np.ascontiguousarray(palette_lut()), "RGBA")
+    lut.info["variants"] = tuple(PALETTE_VARIANTS)
+    return {f"{stem}_idx.png": palette_indices(img), PALETTE_LUT_FILE: lut}
+
+
+# Optional per-image build stages (--stage NAME): fn(filename, img) -> {filename: Image}
+BUILD_STAGES = {
+    "normal": stage_normal_maps,
+    "sdf": stage_sdf,
+    "rotsprite": stage_rotsprite,
+    "upscale": stage_upscale,
+    "bloom": stage_bloom,
+    "shadow": stage_shadow,
+    "palette": stage_palette,
+}
+
+
+# ============================================================
+# GOLDEN IMAGES - Byte-exact regression check for every sprite
+# ============================================================
+# Every registered sprite is rendered in memory and the SHA-256 of its raw
+# RGBA bytes (plus size) is compared with the digests committed in
+# GOLDEN_FILE.  Work on the primitives is safe to merge when --check passes;
+# an intended art change is recorded with --update-golden.
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_FILE = os.path.join(_HERE, "sprite_digests.json")
+GOLDEN_DIFF_DIR = os.path.join(_HERE, "golden_diffs")
+GOLDEN_DIFF_SCALE = 8
+
+
+def image_digest(img):
+    """Content hash of an image's pixels, independent of PNG encoding."""
+    import hashlib
+
+    h = hashlib.sha256(f"{img.mode}:{img.width}x{img.height}:".encode("ascii"))
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+
+def render_all(names=None):
+    """Render every registered sprite in memory: {filename: Image}."""
+    return {filename: img for _, filename, img in iter_renders(names)}
+
+
+def _load_golden():
+    import json
+
+    if not os.path.exists(GOLDEN_FILE):
+        return {}
+    with open(GOLDEN_FILE, encoding="utf-8") as f:
+        return json.load(f)["sprites"]
+
+
+def update_golden():
+    """Record the current render of every sprite as the golden digests."""
+    import json
+
+    digests = {name: image_digest(img) for name, img in render_all().items()}
+    data = json.dumps({"version": 1, "sprites": dict(sorted(digests.items()))}, indent=2)
+    write_atomic(GOLDEN_FILE, (data + "\n").encode("utf-8"))
+    print(f"Recorded {len(digests)} golden digests in {os.path.basename(GOLDEN_FILE)}")
+
+
+def _reference_images(filenames):
+    """Best available "before" images for a visual diff.
+
+    Renders the generator as committed at git HEAD when possible, since
+    that is what the golden digests describe; otherwise falls back to the
+    PNGs on disk.
+    """
+    import subprocess
+    import types
+
+    refs = {}
+    try:
+        source = subprocess.run(
+            ["git", "show", f"HEAD:./{os.path.basename(__file__)}"],
+            cwd=_HERE, capture_output=True, text=True, check=True,
+        ).stdout
+        module = types.ModuleType("_golden_reference")
+        module.__file__ = os.path.abspath(__file__)
+        exec(compile(source, f"HEAD:{os.path.basename(__file__)}", "exec"), module.__dict__)
+        for filename in filenames:
+            try:
+                refs.update(module.render(os.path.splitext(filename)[0]))
+            except Exception:
+                pass
+    except Exception:
+        pass
+    for filename in filenames:
+        path = os.path.join(OUTPUT_DIR, filename)
+        if filename not in refs and os.path.exists(path):
+            refs[filename] = Image.open(path).convert("RGBA")
+    return refs
+
+
+def write_diff_image(path, expected, actual, scale=GOLDEN_DIFF_SCALE):
+    """Magnified expected | actual | difference panel; changed pixels show red."""
+    w = max(expected.width if expected else 0, actual.width)
+    h = max(expected.height if expected else 0, actual.height)
+    panels = []
+    for img in (expected, actual):
+        canvas = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+        if img is not None:
+            canvas.paste(img, (0, 0))
+        panels.append(np.asarray(canvas))
+    changed = (panels[0] != panels[1]).any(axis=-1)
+    diff = np.empty((h, w, 4), dtype=np.uint8)
+    diff[...] = (60, 60, 70, 255)
+    diff[changed] = (255, 40, 40, 255)
+    gap = np.zeros((h, 1, 4), dtype=np.uint8)
+    strip = np.concatenate([panels[0], gap, panels[1], gap, diff], axis=1)
+    # Checkerboard backdrop so translucent pixels stay readable
+    checks = ((np.indices(strip.shape[:2]).sum(axis=0) % 2) * 40 + 90).astype(np.uint8)
+    backdrop = Image.fromarray(np.dstack([checks, checks, checks, np.full_like(checks, 255)]), "RGBA")
+    backdrop.alpha_composite(Image.fromarray(strip, "RGBA"))
+    out = backdrop.resize((backdrop.width * scale, backdrop.height * scale), Image.NEAREST)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    out.save(path)
+    return int(changed.sum())
+
+
+def check_golden():
+    """Compare every sprite against the golden digests; returns True when all match."""
+    golden = _load_golden()
+    started = time.perf_counter()
+    rendered = render_all()
+    mismatched = [n for n, img in rendered.items()
+                  if n in golden and image_digest(img) != golden[n]]
+    new = sorted(set(rendered) - set(golden))
+    missing = sorted(set(golden) - set(rendered))
+    elapsed = time.perf_counter() - started
+    if mismatched:
+        refs = _reference_images(mismatched)
+        for name in mismatched:
+            diff_path = os.path.join(GOLDEN_DIFF_DIR, name)
+            count = write_diff_image(diff_path, refs.get(name), rendered[name])
+            print(f"  MISMATCH {name}: {count} pixel(s) differ, see {os.path.relpath(diff_path)}")
+    for name in new:
+        print(f"  NEW      {name}: no golden digest (run --update-golden)")
+    for name in missing:
+        print(f"  MISSING  {name}: has a golden digest but was not rendered")
+    ok = not (mismatched or new or missing)
+    print(f"{'OK' if ok else 'FAILED'}: checked {len(rendered)} sprites in {elapsed:.2f}s")
+    return ok
+
+
+# ============================================================
+# BENCHMARKS - Timing and memory baselines for the render pipeline
+# ============================================================
+# Each sprite generator and each drawing primitive is timed several times
+# and the minimum is kept, which filters out scheduler noise far better than
+# the mean.  A single render takes about a millisecond, well inside normal
+# jitter, so every sample loops the work for at least BENCH_SAMPLE_MS and
+# reports the time per call.  The whole machine also drifts in speed by
+# half again over several seconds, so a fixed calibration workload is timed
+# alongside and compare scales timings by how fast it ran relative to the
+# baseline.  Some renders also settle into a faster or slower mode for a
+# whole process, so BENCH_PROCESSES fresh interpreters each take their own
+# minimum and the median of those is kept.  Peak traced memory comes from a separate tracemalloc pass so
+# tracing overhead never leaks into the timings.  --bench compare fails when
+# anything got slower (or hungrier) than BENCH_FILE allows.
+
+BENCH_FILE = os.path.join(_HERE, "bench_baseline.json")
+BENCH_VERSION = 2
+BENCH_REPEATS = 4
+BENCH_PROCESSES = 5
+BENCH_SAMPLE_MS = 20.0
+BENCH_THRESHOLD = 0.25
+# Changes smaller than this are noise whatever the ratio says
+BENCH_MIN_DELTA_MS = 1.0
+BENCH_MIN_DELTA_KIB = 16.0
+
+
+def _bench_primitive_cases():
+    """name -> (canvas size, callable drawing a fixed workload onto it)."""
+    c1, c2 = (200, 60, 40, 255), (40, 60, 200, 128)
+    return {
+        "px": ((64, 64), lambda img: [px(img, x, y, c1) for y in range(0, 64, 2) for x in range(64)]),
+        "fill_rect": ((64, 64), lambda img: [fill_rect(img, i, i, 63 - i, 40, c2) for i in range(32)]),
+        "draw_ellipse_filled": ((64, 64), lambda img: [draw_ellipse_filled(img, i, i, 63 - i, 63 - i, c1)
+                                                       for i in range(0, 30, 3)]),
+        "dither_rect": ((64, 64), lambda img: [dither_rect(img, 0, 0, 63, 63, c1, c2, pattern)
+                                               for pattern in sorted(DITHER_PATTERNS)]),
+        "add_outline": ((64, 64), lambda img: (draw_ellipse_filled(img, 8, 8, 55, 55, c1),
+                                               [add_outline(img) for _ in range(4)])),
+    }
+
+
+def _bench_calibration():
+    """Fixed mix of Python loops, Pillow and numpy work that tracks machine speed."""
+    img = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
+    for y in range(0, 64, 4):
+        for x in range(64):
+            img.putpixel((x, y), (x, y, 0, 255))
+    arr = np.asarray(img).astype(np.float64)
+    np.sqrt(arr @ np.ones(4))
+    sum(i * i for i in range(5000))
+
+
+def _render_and_release(name):
+    """Render a sprite the way a batch run does, handing its canvases back."""
+    for img in render(name).values():
+        release_canvas(img)
+
+
+def _loops_for(func, sample_ms=BENCH_SAMPLE_MS):
+    """How many calls of func fill one sample of at least sample_ms."""
+    started = time.perf_counter()
+    func()
+    once_ms = (time.perf_counter() - started) * 1000.0
+    return max(1, math.ceil(sample_ms / max(once_ms, 1e-3)))
+
+
+def _min_times_ms(funcs, repeats, calibration=None):
+    """Best per-call time of each func, sampling them round-robin.
+
+    Interleaving spreads every benchmark's samples across the whole run, so
+    a slow spell on the machine cannot land on all of them at once.  With a
+    calibration func, each round's samples are first divided by how long it
+    took in that round, and the result is scaled back to its fastest round.
+    """
+    if calibration is not None:
+        funcs = {**funcs, None: calibration}
+    import gc
+
+    loops = {name: _loops_for(func) for name, func in funcs.items()}
+    samples = {name: [] for name in funcs}
+    for _ in range(repeats):
+        for name, func in funcs.items():
+            # Like timeit: a collection triggered by one sprite's garbage
+            # must not be billed to whichever sprite happens to run next
+            gc.collect()
+            gc.disable()
+            try:
+                started = time.perf_counter()
+                for _ in range(loops[name]):
+                    func()
+                elapsed = time.perf_counter() - started
+            finally:
+                gc.enable()
+            samples[name].append(elapsed / loops[name] * 1000.0)
+    if calibration is None:
+        return {name: min(times) for name, times in samples.items()}
+    cal = samples.pop(None)
+    return {name: min(t / c for t, c in zip(times, cal)) * min(cal) for name, times in samples.items()}, min(cal)
+
+
+def _peak_kib(func):
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024.0
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(repeats=BENCH_REPEATS, processes=BENCH_PROCESSES):
+    """Time every sprite and primitive; returns a baseline-shaped dict.
+
+    Some renders settle into a faster or slower steady state per process
+    (allocation layout, caches), so the work is repeated in `processes`
+    fresh interpreters and each entry keeps the median of their bests,
+    after scaling every process to the fastest calibration.
+    """
+    if processes > 1:
+        return _merge_bench([_bench_subprocess(repeats) for _ in range(processes)])
+    import platform
+
+    runs = {}
+    for _, gen in iter_sprites():
+        runs[sprite_name(gen)] = functools.partial(_render_and_release, sprite_name(gen))
+    for name, (size, draw) in _bench_primitive_cases().items():
+        runs["primitive:" + name] = lambda draw=draw, size=size: draw(Image.new("RGBA", size, (0, 0, 0, 0)))
+    for run in runs.values():
+        run()    # warm lazy imports, lookup-table caches and the canvas pool
+    times, calibration_ms = _min_times_ms(runs, repeats, _bench_calibration)
+    sprites, primitives = {}, {}
+    for name, run in runs.items():
+        section, key = (primitives, name[len("primitive:"):]) if name.startswith("primitive:") else (sprites, name)
+        section[key] = {"ms": round(times[name], 3), "peak_kib": round(_peak_kib(run), 1)}
+    return {
+        "version": BENCH_VERSION,
+        "repeats": repeats,
+        "calibration_ms": round(calibration_ms, 3),
+        "machine": f"{platform.system()} {platform.machine()} / Python {platform.python_version()}",
+        "sprites": sprites,
+        "primitives": primitives,
+    }
+
+
+def _bench_subprocess(repeats):
+    import json
+    import subprocess
+
+    module = os.path.splitext(os.path.basename(__file__))[0]
+    code = f"import json, {module}; print(json.dumps({module}.run_benchmarks({int(repeats)}, processes=1)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def _merge_bench(runs):
+    fastest = min(run["calibration_ms"] for run in runs)
+    merged = dict(runs[0], repeats=sum(run["repeats"] for run in runs), calibration_ms=fastest)
+    for section in ("sprites", "primitives"):
+        merged[section] = {}
+        for name in runs[0][section]:
+            entries = [(run[section][name], fastest / run["calibration_ms"]) for run in runs]
+            # Median, not min: one process landing in a lucky fast mode would
+            # otherwise set a baseline the others rarely reach again
+            times = sorted(e["ms"] * scale for e, scale in entries)
+            merged[section][name] = {"ms": round(times[len(times) // 2], 3),
+                                     "peak_kib": min(e["peak_kib"] for e, _ in entries)}
+    return merged
+
+
+def _load_bench():
+    import json
+
+    if not os.path.exists(BENCH_FILE):
+        return None
+    with open(BENCH_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != BENCH_VERSION:
+        raise ValueError(f"{os.path.basename(BENCH_FILE)} is version {data.get('version')}, "
+                         f"expected {BENCH_VERSION}; re-record it with --bench update")
+    return data
+
+
+def update_bench(repeats=BENCH_REPEATS):
+    """Record fresh timings as the benchmark baseline."""
+    import json
+
+    results = run_benchmarks(repeats)
+    write_atomic(BENCH_FILE, (json.dumps(results, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+    print(f"Recorded {len(results['sprites'])} sprite and {len(results['primitives'])} "
+          f"primitive timings in {os.path.basename(BENCH_FILE)}")
+
+
+def _bench_regressions(section, baseline, current, threshold):
+    """(kind, name, metric, old, new) for every entry worse than allowed."""
+    found = []
+    for name, now in current.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        for metric, floor in (("ms", BENCH_MIN_DELTA_MS), ("peak_kib", BENCH_MIN_DELTA_KIB)):
+            delta = now[metric] - old[metric]
+            if delta > floor and now[metric] > old[metric] * (1.0 + threshold):
+                found.append((section, name, metric, old[metric], now[metric]))
+    return found
+
+
+def print_bench(results, baseline=None):
+    for section in ("sprites", "primitives"):
+        print(f"{section.capitalize():<26}{'ms':>10}{'peak KiB':>11}{'vs baseline':>14}")
+        for name, now in sorted(results[section].items()):
+            old = (baseline or {}).get(section, {}).get(name)
+            change = f"{(now['ms'] / old['ms'] - 1.0) * 100:+.0f}%" if old and old["ms"] else ""
+            print(f"  {name:<24}{now['ms']:>10.3f}{now['peak_kib']:>11.1f}{change:>14}")
+        print()
+
+
+def compare_bench(repeats=BENCH_REPEATS, threshold=BENCH_THRESHOLD):
+    """Benchmark against the stored baseline; returns True when nothing regressed."""
+    baseline = _load_bench()
+    if baseline is None:
+        print(f"No baseline in {os.path.basename(BENCH_FILE)} (run --bench update)")
+        return False
+    results = run_benchmarks(repeats)
+    # Express timings at the baseline's machine speed
+    speed = results["calibration_ms"] / baseline["calibration_ms"]
+    for section in ("sprites", "primitives"):
+        for now in results[section].values():
+            now["ms"] = round(now["ms"] / speed, 3)
+    print_bench(results, baseline)
+    print(f"note: calibration ran at {1.0 / speed:.2f}x baseline speed; timings above are scaled to match")
+    if baseline.get("machine") != results["machine"]:
+        print(f"note: baseline was recorded on {baseline.get('machine')}, "
+              f"this is {results['machine']}")
+    regressions = []
+    missing = []
+    for section in ("sprites", "primitives"):
+        regressions += _bench_regressions(section, baseline[section], results[section], threshold)
+        missing += [(section, name) for name in sorted(set(results[section]) - set(baseline[section]))]
+    units = {"ms": "ms", "peak_kib": "KiB peak"}
+    for section, name, metric, old, new in regressions:
+        print(f"  REGRESSED {section[:-1]} {name}: {old:.3f} -> {new:.3f} {units[metric]} "
+              f"({(new / old - 1.0) * 100:+.0f}%, limit +{threshold * 100:.0f}%)")
+    # A sprite without a baseline entry has no gate at all, so it fails too
+    for section, name in missing:
+        print(f"  MISSING {section[:-1]} {name}: no baseline entry (run --bench update)")
+    ok = not regressions and not missing
+    print(f"{'OK' if ok else 'FAILED'}: {len(regressions)} regression(s) "
+          f"beyond +{threshold * 100:.0f}% (median of {BENCH_PROCESSES} processes, "
+          f"min of {results['repeats'] // BENCH_PROCESSES} rounds each), "
+          f"{len(missing)} without a baseline")
+    return ok
+
+
+# ============================================================
+# MEMORY REPORT - Peak memory and allocations per sprite
+# ============================================================
+# Each sprite is rendered once to warm caches and the canvas pool, then
+# again under tracemalloc, the way a batch or animation run repeats it.
+# Pixel buffers are allocated by Pillow outside tracemalloc's view, so
+# canvas allocations are counted separately from the pool statistics.
+
+def memory_report(names=None):
+    """Print traced peak, live Python blocks and new canvases for each sprite."""
+    import tracemalloc
+
+    print(f"{'Sprite':<24}{'peak KiB':>10}{'blocks':>9}{'new canvases':>15}")
+    totals = [0.0, 0, 0]
+    for _, gen in iter_sprites(names):
+        name = sprite_name(gen)
+        _render_and_release(name)
+        allocated = canvas_stats["allocated"]
+        tracemalloc.start()
+        try:
+            images = render(name)
+            peak = tracemalloc.get_traced_memory()[1] / 1024.0
+            blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        finally:
+            tracemalloc.stop()
+        for img in images.values():
+            release_canvas(img)
+        canvases = canvas_stats["allocated"] - allocated
+        totals = [max(totals[0], peak), totals[1] + blocks, totals[2] + canvases]
+        print(f"  {name:<22}{peak:>10.1f}{blocks:>9}{canvases:>15}")
+    print(f"{'Total (max peak)':<24}{totals[0]:>10.1f}{totals[1]:>9}{totals[2]:>15}")
+    print(f"Canvas pool: {canvas_stats['reused']} reused, {canvas_stats['allocated']} allocated")
+
+
+# ============================================================
+# BACKEND FUZZING - Fast primitives must match the reference exactly
+# ============================================================
+# Property: for any canvas and any sequence of primitive calls, the fast
+# backend leaves exactly the same bytes as the reference backend and raises
+# the same errors.  Cases deliberately reach past every canvas edge, invert
+# and collapse boxes (the rx/ry > 0 ellipse guard), mix alpha values around
+# add_outline's 128 threshold, include shared read-only buffers and ask for
+# unknown dither patterns.  Failures are shrunk to a minimal op list.
+
+FUZZ_OPS = ("px", "fill_rect", "draw_ellipse_filled", "dither_rect", "add_outline")
+
+
+def _fuzz_color(rng):
+    return (rng.randrange(256), rng.randrange(256), rng.randrange(256),
+            rng.choice((0, 255, 128, 129, rng.randrange(256))))
+
+
+def _fuzz_canvas(rng):
+    """(width, height, pixel bytes, read_only) for a random starting canvas."""
+    w, h = rng.randint(1, 24), rng.randint(1, 24)
+    pixels = bytearray()
+    for _ in range(w * h):
+        if rng.random() < 0.5:
+            pixels += bytes(4)
+        else:
+            pixels += bytes(_fuzz_color(rng))
+    return w, h, bytes(pixels), rng.random() < 0.2
+
+
+def _fuzz_make_canvas(spec):
+    w, h, pixels, read_only = spec
+    if read_only:
+        return Image.frombuffer("RGBA", (w, h), bytearray(pixels), "raw", "RGBA", 0, 1)
+    return Image.frombytes("RGBA", (w, h), pixels)
+
+
+def _fuzz_op(rng, w, h):
+    name = rng.choice(FUZZ_OPS)
+    if name == "px":
+        return name, (rng.randint(-3, w + 2), rng.randint(-3, h + 2), _fuzz_color(rng))
+    if name == "add_outline":
+        return name, (_fuzz_color(rng),)
+    x1, y1 = rng.randint(-6, w + 2), rng.randint(-6, h + 2)
+    x2, y2 = x1 + rng.randint(-2, w + 4), y1 + rng.randint(-2, h + 4)
+    if name == "dither_rect":
+        pattern = rng.choice(sorted(DITHER_PATTERNS) + ["zigzag"])
+        return name, (x1, y1, x2, y2, _fuzz_color(rng), _fuzz_color(rng), pattern)
+    return name, (x1, y1, x2, y2, _fuzz_color(rng))
+
+
+def _fuzz_run(backend, spec, ops):
+    """Apply ops with one backend; returns (pixel bytes, error or None)."""
+    img = _fuzz_make_canvas(spec)
+    funcs = PRIMITIVE_BACKENDS[backend]
+    try:
+        for name, args in ops:
+            funcs[name](img, *args)
+    except Exception as exc:
+        return img.tobytes(), (type(exc).__name__, str(exc))
+    return img.tobytes(), None
+
+
+def _fuzz_agrees(spec, ops):
+    return _fuzz_run("reference", spec, ops) == _fuzz_run("fast", spec, ops)
+
+
+def fuzz_backends(cases=500, seed=0, max_ops=12):
+    """Run random cases through both backends; returns True when all agree."""
+    rng = random.Random(seed)
+    for case in range(cases):
+        spec = _fuzz_canvas(rng)
+        ops = [_fuzz_op(rng, spec[0], spec[1]) for _ in range(rng.randint(1, max_ops))]
+        if _fuzz_agrees(spec, ops):
+            continue
+        # Shrink: drop ops one at a time while the backends still disagree
+        i = 0
+        while i < len(ops):
+            trial = ops[:i] + ops[i + 1:]
+            if trial and not _fuzz_agrees(spec, trial):
+                ops = trial
+            else:
+                i += 1
+        w, h, _, read_only = spec
+        print(f"MISMATCH in case {case} (seed {seed}): {w}x{h} canvas"
+              f"{' (read-only buffer)' if read_only else ''}")
+        for name, args in ops:
+            print(f"  {name}(img, {', '.join(map(repr, args))})")
+        for backend in ("reference", "fast"):
+            _, error = _fuzz_run(backend, spec, ops)
+            print(f"  {backend}: {'raised %s: %s' % error if error else 'ok'}")
+        return False
+    print(f"OK: {cases} random cases agree between reference and fast backends")
+    return True
+
+
+# ============================================================
+# WATCH MODE - Re-render only the sprites an edit touched
+# ============================================================
+# Re-parsing this whole file on every save is too slow for a tight edit
+# loop, so the source is cut into top-level chunks by a cheap line scan.
+# Only chunks whose text changed are parsed; their statements are compared
+# by AST (so comment and whitespace edits are free), re-executed into the
+# live module, and every generator that reaches a changed name through its
+# call graph is re-rendered.
+
+def _split_chunks(source):
+    """Split module source into (first_line, text) top-level chunks.
+
+    A chunk starts at any unindented line outside a triple-quoted string;
+    decorators stay with the definition they decorate and closing brackets
+    stay with the statement they close.
+    """
+    chunks = []
+    current = []
+    start = 1
+    decorators_only = True
+    in_string = False
+    for lineno, line in enumerate(source.splitlines(keepends=True), 1):
+        head = line[:1]
+        top_level = not in_string and head not in ("", " ", "\t", "\n", "#", ")", "]", "}")
+        if top_level and current and not decorators_only:
+            chunks.append((start, "".join(current)))
+            current = []
+            start = lineno
+        if top_level:
+            decorators_only = decorators_only and head == "@" if current else head == "@"
+        current.append(line)
+        if (line.count('"""') + line.count("'''")) % 2:
+            in_string = not in_string
+    if current:
+        chunks.append((start, "".join(current)))
+    return chunks
+
+
+def _chunk_units(text, first_line=1):
+    """Parse one chunk into {unit_name: (ast_dump, referenced_names, node)}."""
+    import ast
+
+    try:
+        tree = ast.parse(text, filename=os.path.basename(__file__))
+    except SyntaxError as exc:
+        exc.lineno = (exc.lineno or 1) + first_line - 1
+        raise
+    ast.increment_lineno(tree, first_line - 1)
+    units = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names = [node.name]
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = [n.id for t in targets for n in ast.walk(t) if isinstance(n, ast.Name)]
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names = [(a.asname or a.name).split(".")[0] for a in node.names]
+        else:
+            continue  # docstring, `if __name__ == ...`
+        dump = ast.dump(node)
+        refs = frozenset(n.id for n in ast.walk(node) if isinstance(n, ast.Name))
+        for name in names:
+            units[name] = (dump, refs, node)
+    return units
+
+
+def _scan_source(source, cache):
+    """All top-level units of `source`, parsing only chunks missing from `cache`."""
+    units = {}
+    for first_line, text in _split_chunks(source):
+        if text not in cache:
+            cache[text] = _chunk_units(text, first_line)
+        units.update(cache[text])
+    return units
+
+
+def _affected_generators(units, changed):
+    """Generator names whose transitive references include a changed unit."""
+    memo = {}
+
+    def reaches(name, seen):
+        if name in memo:
+            return memo[name]
+        if name in changed:
+            return True
+        seen.add(name)
+        hit = any(dep in units and dep not in seen and reaches(dep, seen)
+                  for dep in units[name][1])
+        memo[name] = hit
+        return hit
+
+    return {name for name in units
+            if name.startswith("generate_") and reaches(name, set())}
+
+
+def _dependent_assignments(units, changed):
+    """changed plus every top-level assignment that captures one of them by value.
+
+    Aliases like `px = px_fast` and tables like BUILD_STAGES hold the old
+    function object until their own statement runs again.
+    """
+    import ast
+
+    stale = set(changed)
+    while True:
+        more = {name for name, (_, refs, node) in units.items()
+                if name not in stale and refs & stale
+                and isinstance(node, (ast.Assign, ast.AnnAssign))}
+        if not more:
+            return stale
+        stale |= more
+
+
+def watch(poll_interval=0.05):
+    """Poll this file and re-render the sprites affected by each saved edit."""
+    import ast
+
+    path = os.path.abspath(__file__)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    cache = {}
+    with open(path, encoding="utf-8") as f:
+        units = _scan_source(f.read(), cache)
+    mtime = os.stat(path).st_mtime_ns
+    # Pay for the lazy imports now rather than on the first edit
+    np.zeros(1)
+    Image.new("RGBA", (1, 1))
+    print(f"Watching {os.path.basename(path)} for changes (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(poll_interval)
+            stat = os.stat(path).st_mtime_ns
+            if stat == mtime:
+                continue
+            mtime = stat
+            started = time.perf_counter()
+            with open(path, encoding="utf-8") as f:
+                source = f.read()
+            try:
+                new_units = _scan_source(source, cache)
+            except SyntaxError as exc:
+                print(f"  Syntax error, waiting for the next save: {exc}")
+                continue
+            changed = {name for name, unit in new_units.items()
+                       if name not in units or units[name][0] != unit[0]}
+            if not changed:
+                continue
+            # Re-run changed statements once each, in source order
+            stale = _dependent_assignments(new_units, changed)
+            # Re-running the aliases would reset a --backend choice
+            backend = next((b for b, fns in PRIMITIVE_BACKENDS.items()
+                            if all(globals()[k] is fn for k, fn in fns.items())), None)
+            nodes = sorted({id(new_units[n][2]): new_units[n][2] for n in stale}.values(),
+                           key=lambda node: node.lineno)
+            try:
+                exec(compile(ast.Module(body=nodes, type_ignores=[]), path, "exec"), globals())
+                if backend:
+                    use_backend(backend)
+                # Memoised tables (palettes, ramps, dither matrices) may hold old values
+                for obj in list(globals().values()):
+                    if callable(getattr(obj, "cache_clear", None)):
+                        obj.cache_clear()
+                targets = _affected_generators(new_units, stale)
+                if "SPRITE_GROUPS" in changed:
+                    old_names = {n for n in units if n.startswith("generate_")}
+                    targets |= {gen.__name__ for _, gens in SPRITE_GROUPS for gen in gens} - old_names
+                registered = [gen.__name__ for _, gens in SPRITE_GROUPS for gen in gens]
+                rebuilt = [name for name in registered if name in targets]
+                for name in rebuilt:
+                    globals()[name]()
+            except Exception as exc:  # keep watching through a broken edit
+                print(f"  {type(exc).__name__}: {exc}")
+                continue
+            finally:
+                units = new_units
+            elapsed = (time.perf_counter() - started) * 1000.0
+            print(f"  Changed {', '.join(sorted(changed))}: "
+                  f"rebuilt {len(rebuilt)} sprite(s) in {elapsed:.1f} ms")
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+
+# ============================================================
+# RENDER DAEMON - Warm process serving renders over a local socket
+# ============================================================
+# Protocol: the client sends one JSON object per line.  Each reply is one
+# JSON header line; for in-memory renders the header lists every image
+# with its byte length and the PNG bytes follow back to back.
+#
+#   {"cmd": "render", "sprites": ["lightning"], "seed": 7, "variants": 4}
+#   {"cmd": "render", "sprites": ["aura"], "params": {"size": 128}, "write": true}
+#   {"cmd": "render", "sprites": ["slime"], "write": true, "output_dir": "variants"}
+#   {"cmd": "list"}   {"cmd": "ping"}
+#
+# output_dir is relative to OUTPUT_DIR; one that resolves outside it is
+# refused, since the daemon may be reachable over the network.
+
+DAEMON_SOCKET = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sprite-daemon.sock")
+DAEMON_TCP_PORT = 8765
+# Most images one render request may ask for (sprites x variants); each is
+# held in memory until the whole reply is sent
+DAEMON_MAX_RENDERS = 256
+
+# Generators share module state (random's global seed, caches), so renders
+# are serialised; PNG encoding runs on the worker pool in parallel.
+_render_lock = threading.Lock()
+
+
+def _generator(name):
+    for _, gens in SPRITE_GROUPS:
+        for gen in gens:
+            if sprite_name(gen) == name:
+                # Look up by name so edits picked up by watch() are used
+                return globals()[gen.__name__]
+    raise ValueError(f"Unknown sprite: {name}")
+
+
+def generator_params(name):
+    """Keyword parameters a sprite's generator accepts, with their defaults."""
+    import inspect
+
+    sig = inspect.signature(_generator(name))
+    return {p.name: p.default for p in sig.parameters.values()}
+
+
+def render_outputs(name, **params):
+    """Run one generator in memory: ({filename: Image}, {filename: bytes}) it saved."""
+    gen = _generator(name)
+    unknown = set(params) - set(generator_params(name))
+    if unknown:
+        raise ValueError(f"{name} does not accept: {', '.join(sorted(unknown))}")
+    with _render_lock:
+        _capture.images = {}
+        _capture.files = {}
+        try:
+            gen(**params)
+            return _capture.images, _capture.files
+        finally:
+            del _capture.images
+            del _capture.files
+
+
+def render(name, **params):
+    """Run one generator in memory and return {filename: Image} for what it saved."""
+    return render_outputs(name, **params)[0]
+
+
+def _render_jobs(request):
+    """Expand a render request into (sprite, params) jobs, one per variant."""
+    params = dict(request.get("params") or {})
+    seed = request.get("seed")
+    sprites = list(request.get("sprites") or [])
+    variants = int(request.get("variants", 1))
+    if variants < 1:
+        raise ValueError(f"variants must be at least 1, got {variants}")
+    if variants > 1 and seed is None:
+        raise ValueError("variants need a base seed")
+    if len(sprites) * variants > DAEMON_MAX_RENDERS:
+        raise ValueError(f"Request asks for {len(sprites) * variants} renders; "
+                         f"the limit is {DAEMON_MAX_RENDERS}")
+    for name in sprites:
+        for v in range(variants):
+            job = dict(params)
+            if seed is not None:
+                job["seed"] = seed + v
+            yield name, job
+
+
+def _request_output_dir(request):
+    """The request's output_dir, which must resolve inside OUTPUT_DIR.
+
+    The daemon may listen on a network interface, so a client must not be
+    able to pick an arbitrary path for the process to write to.
+    """
+    root = os.path.realpath(OUTPUT_DIR)
+    out_dir = os.path.realpath(os.path.join(root, request.get("output_dir") or root))
+    if os.path.commonpath([root, out_dir]) != root:
+        raise ValueError(f"output_dir must be inside {OUTPUT_DIR}")
+    return out_dir
+
+
+def handle_request(request, pool):
+    """Serve one decoded request; returns (header dict, list of PNG payloads)."""
+    cmd = request.get("cmd", "render")
+    if cmd == "ping":
+        return {"ok": True, "pid": os.getpid()}, []
+    if cmd == "list":
+        sprites = {sprite_name(gen): {"category": category,
+                                      "params": generator_params(sprite_name(gen))}
+                   for category, gen in iter_sprites()}
+        return {"ok": True, "sprites": sprites}, []
+    if cmd != "render":
+        raise ValueError(f"Unknown command: {cmd}")
+    images = {}
+    for name, params in _render_jobs(request):
+        images.update(render(name, **params))
+    encoded = dict(zip(images, pool.map(encode_png, images.values())))
+    entries = [{"name": n, "width": img.width, "height": img.height, "bytes": len(encoded[n])}
+               for n, img in images.items()]
+    payloads = [encoded[e["name"]] for e in entries]
+    if request.get("write"):
+        out_dir = _request_output_dir(request)
+        os.makedirs(out_dir, exist_ok=True)
+        for entry in entries:
+            entry["path"] = os.path.join(out_dir, entry["name"])
+            write_sprite(entry["path"], encoded[entry["name"]], images[entry["name"]])
+        payloads = []
+    # write_sprite compares pixels, so canvases go back to the pool only now
+    for img in images.values():
+        release_canvas(img)
+    return {"ok": True, "images": entries}, payloads
+
+
+def _parse_address(address):
+    """"host:port" means TCP on that interface; anything else is a Unix socket path."""
+    if address:
+        host, sep, port = address.rpartition(":")
+        if sep and port.isdigit():
+            return (host or "127.0.0.1", int(port))
+        return address
+    import socket
+
+    return DAEMON_SOCKET if hasattr(socket, "AF_UNIX") else ("127.0.0.1", DAEMON_TCP_PORT)
+
+
+def serve(address=None, workers=None):
+    """Run the render daemon until interrupted."""
+    import json
+    import socketserver
+    from concurrent.futures import ThreadPoolExecutor
+
+    address = _parse_address(address)
+    pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count())
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    header, payloads = handle_request(json.loads(line), pool)
+                except Exception as exc:
+                    header, payloads = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}, []
+                self.wfile.write(json.dumps(header).encode("utf-8") + b"\n")
+                for payload in payloads:
+                    self.wfile.write(payload)
+                self.wfile.flush()
+
+    if isinstance(address, tuple):
+        server = socketserver.ThreadingTCPServer(address, Handler)
+        where = "%s:%d" % server.server_address[:2]
+    else:
+        if os.path.exists(address):
+            os.unlink(address)  # stale socket from a previous run
+        server = socketserver.ThreadingUnixStreamServer(address, Handler)
+        where = address
+    server.daemon_threads = True
+    # Warm the lazy imports and caches before the first request arrives
+    np.zeros(1)
+    Image.new("RGBA", (1, 1))
+    print(f"Sprite daemon listening on {where} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown()
+        if not isinstance(address, tuple) and os.path.exists(address):
+            os.unlink(address)
+        print("Sprite daemon stopped.")
+
+
+def daemon_request(request, address=None):
+    """Send one request to a running daemon; returns (header, {filename: PNG bytes})."""
+    import json
+    import socket
+
+    address = _parse_address(address)
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.connect(address)
+        stream = sock.makefile("rwb")
+        stream.write(json.dumps(request).encode("utf-8") + b"\n")
+        stream.flush()
+        header = json.loads(stream.readline())
+        images = {entry["name"]: stream.read(entry["bytes"])
+                  for entry in header.get("images", []) if "path" not in entry}
+    return header, images
+
+
 # ============================================================
 # MAIN - Generate all sprites
 # ============================================================
-def main():
-    print("=== Dragon Survivors Enhanced Sprite Generator ===\n")
-    print("Output directory:", OUTPUT_DIR)
-    print()
-
-    print("[Characters]")
-    generate_knight()
-    generate_archer()
-    generate_mage()
-    generate_berserker()
-    generate_thief()
-
-    print("\n[Enemies]")
-    generate_slime()
-    generate_skeleton()
-    generate_armored_knight()
-    generate_dragon()
-
-    print("\n[Weapon Effects]")
-    generate_sword_arc()
-    generate_arrow()
-    generate_fireball()
-    generate_bone()
-    generate_shield()
-    generate_lightning()
-    generate_orbit_projectile()
-    generate_aura()
-
-    print("\n[Pickups]")
-    generate_xp_orb()
-    generate_chest()
-    generate_gold_coin()
-    generate_pickup_chicken()
-    generate_pickup_magnet()
-    generate_pickup_rosary()
-    generate_pickup_hourglass()
-
-    print("\n[Passive Items]")
-    generate_passive_spinach()
-    generate_passive_armor()
-    generate_passive_wings()
-    generate_passive_hollow_heart()
-    generate_passive_duplicator()
-    generate_passive_tome()
-
-    print("\n[Environment]")
-    generate_rock()
-    generate_cavern_floor()
-    generate_torch()
-    generate_barrel()
-    generate_crystal()
-
-    print(f"\nDone! Generated 35 sprites in {OUTPUT_DIR}")
+def _event_stream(stream):
+    """An events callback writing one JSON object per line to stream."""
+    import json
+
+    lock = threading.Lock()
+
+    def emit(event):
+        line = json.dumps(event, sort_keys=True)
+        with lock:
+            stream.write(line + "\n")
+            stream.flush()
+
+    return emit
+
+
+def main(argv=None):
+    import argparse
+    import contextlib
+
+    parser = argparse.ArgumentParser(description="Generate Dragon Survivors pixel-art sprites.")
+    parser.add_argument("sprites", nargs="*", help="sprite names to build (default: all)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="threads for PNG encoding and writing (default: CPU count, max 8)")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and re-render sprites whose code changes")
+    parser.add_argument("--serve", nargs="?", const="", metavar="ADDRESS",
+                        help="run the render daemon on a Unix socket path or host:port "
+                             f"(default {os.path.basename(DAEMON_SOCKET)} next to this script)")
+    parser.add_argument("--check", action="store_true",
+                        help="render every sprite in memory and compare with the golden digests")
+    parser.add_argument("--update-golden", action="store_true",
+                        help="record the current renders as the golden digests")
+    parser.add_argument("--bench", choices=("run", "compare", "update"),
+                        help="time every sprite and primitive; compare with or update the baseline")
+    parser.add_argument("--bench-repeats", type=int, default=BENCH_REPEATS, metavar="N",
+                        help=f"rounds per benchmark in each of {BENCH_PROCESSES} processes; each keeps its fastest "
+                             f"(default {BENCH_REPEATS})")
+    parser.add_argument("--bench-threshold", type=float, default=BENCH_THRESHOLD * 100, metavar="PCT",
+                        help=f"allowed slowdown before --bench compare fails "
+                             f"(default {BENCH_THRESHOLD * 100:.0f}%%)")
+    parser.add_argument("--memory", action="store_true",
+                        help="report peak memory, live allocations and new canvases per sprite")
+    parser.add_argument("--stage", action="append", choices=sorted(BUILD_STAGES), default=[],
+                        help="also derive these outputs for every built sprite (repeatable): "
+                             "normal = *_n.png normal maps, sdf = *_sdf.png for ring and glow sprites, "
+                             "rotsprite = *_rotN.png angle sheets for projectiles, "
+                             "upscale = @2x/@3x variants of sprites shown large, "
+                             "bloom = *_glow.png and pre-composited *_bloom.png for emissive effects, "
+                             "shadow = *_shadow.png and *_shadowed.png ground shadows, "
+                             "palette = *_idx.png palette indices plus the shared palette_lut.png")
+    parser.add_argument("--events", action="store_true",
+                        help="stream build events as JSON lines on stdout (progress goes to stderr)")
+    parser.add_argument("--backend", choices=("fast", "reference"), default="fast",
+                        help="drawing primitives to render with (default: fast)")
+    parser.add_argument("--fuzz", type=int, metavar="CASES",
+                        help="compare the fast primitives with the reference ones on random cases")
+    parser.add_argument("--seed", type=int, default=0, help="seed for --fuzz")
+    parser.add_argument("--check-import-time", action="store_true",
+                        help=f"fail if importing this module takes over {IMPORT_BUDGET_MS:.0f} ms")
+    args = parser.parse_args(argv)
+
+    if args.check_import_time:
+        return 0 if check_import_time() else 1
+    if args.fuzz is not None:
+        return 0 if fuzz_backends(args.fuzz, args.seed) else 1
+    use_backend(args.backend)
+    if args.check:
+        return 0 if check_golden() else 1
+    if args.update_golden:
+        update_golden()
+        return 0
+    if args.bench == "run":
+        print_bench(run_benchmarks(args.bench_repeats), _load_bench())
+        return 0
+    if args.bench == "update":
+        update_bench(args.bench_repeats)
+        return 0
+    if args.bench == "compare":
+        return 0 if compare_bench(args.bench_repeats, args.bench_threshold / 100.0) else 1
+    try:
+        list(iter_sprites(args.sprites or None))
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.memory:
+        memory_report(args.sprites or None)
+        return 0
+    if args.watch:
+        watch()
+        return 0
+    if args.serve is not None:
+        serve(args.serve or None)
+        return 0
+
+    events = _event_stream(sys.stdout) if args.events else None
+    with contextlib.redirect_stdout(sys.stderr if args.events else sys.stdout):
+        print("=== Dragon Survivors Enhanced Sprite Generator ===\n")
+        print("Output directory:", OUTPUT_DIR)
+        print()
+
+        summary = build(args.sprites or None, args.workers, events, args.stage)
+
+        print(f"\nDone! Generated {summary['sprites']} sprites in {OUTPUT_DIR} "
+              f"({summary['written']} file(s) written, {summary['unchanged']} unchanged)")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,43 @@
+extends Node2D
+
+## Floating combat text drawn from the baked glyph atlas (damage_glyphs.png).
+## Every number shares one texture, so many of them batch into few draw calls
+## instead of shaping and outlining a font Label per hit.
+## Set text and style ("normal", "crit" or "crit_label") before adding it.
+
+const GLYPH_TEXTURE: Texture2D = preload("res://assets/sprites/damage_glyphs.png")
+const GLYPH_METRICS: JSON = preload("res://assets/sprites/damage_glyphs.json")
+
+var text: String = ""
+var style: String = "normal"
+
+
+func _ready() -> void:
+	texture_filter = CanvasItem.TEXTURE_FILTER_NEAREST
+
+
+func _draw() -> void:
+	var glyphs: Dictionary = GLYPH_METRICS.data.styles[style].glyphs
+	# Whole words like "CRIT!" are baked as a single glyph
+	var parts: Array[String] = []
+	if glyphs.has(text):
+		parts.append(text)
+	else:
+		for i: int in range(text.length()):
+			if glyphs.has(text[i]):
+				parts.append(text[i])
+	if parts.is_empty():
+		return
+
+	# Centre the run on this node so scale tweens pop around the middle
+	var width: float = 0.0
+	for i: int in range(parts.size()):
+		var glyph: Dictionary = glyphs[parts[i]]
+		width += glyph.w if i == parts.size() - 1 else glyph.advance
+	var height: float = GLYPH_METRICS.data.styles[style].height
+	var pen: Vector2 = Vector2(-width / 2.0, -height / 2.0)
+	for part: String in parts:
+		var glyph: Dictionary = glyphs[part]
+		var size: Vector2 = Vector2(glyph.w, glyph.h)
+		draw_texture_rect_region(GLYPH_TEXTURE, Rect2(pen, size), Rect2(Vector2(glyph.x, glyph.y), size))
+		pen.x += glyph.advance
@@ -17,6 +17,7 @@ var death_particle_color: Color = Color(0.7, 0.7, 0.7)  # Override in subclasses
 # Critical hit settings
 # Preloaded resources (avoid load() on every death)
 var _DeathParticlesScript: GDScript = preload("res://scripts/enemies/DeathParticles.gd")
+var _DamageNumberScript: GDScript = preload("res://scripts/enemies/DamageNumber.gd")
 var _GoldCoinScript: GDScript = preload("res://scripts/pickups/GoldCoin.gd")
 
 var crit_chance: float = 0.10  # 10% base crit chance
@@ -25,6 +26,12 @@ var crit_multiplier: float = 2.0  # Crits deal double damage
 # Elite enemy settings
 var is_elite: bool = false
 var base_move_speed: float = 0.0
+# Gold elite sheets drawn at 1.5x by generate_sprites.py, keyed by base texture
+const ELITE_TEXTURES = {
+	"res://assets/sprites/slime.png": preload("res://assets/sprites/slime_elite.png"),
+	"res://assets/sprites/skeleton.png": preload("res://assets/sprites/skeleton_elite.png"),
+	"res://assets/sprites/armored_knight.png": preload("res://assets/sprites/armored_knight_elite.png"),
+}
 
 # Gold drop settings
 var gold_drop_chance: float = 0.20
@@ -51,13 +58,20 @@ func _apply_elite() -> void:
 	max_hp *= 2.5
 	current_hp = max_hp
 	contact_damage *= 1.4
-	scale *= 1.5
 	xp_tier = min(xp_tier + 1, 3)
 	gold_drop_chance = 1.0
 	gold_min *= 2
 	gold_max *= 3
-	# Gold shimmer
-	modulate = Color(1.3, 1.0, 0.5, 1.0)
+	# Gold shimmer: swap in the baked elite sheet when there is one
+	var body: Sprite2D = get_node_or_null("Body") as Sprite2D
+	if body and body.texture and ELITE_TEXTURES.has(body.texture.resource_path):
+		body.texture = ELITE_TEXTURES[body.texture.resource_path]
+		var shape: Node2D = get_node_or_null("CollisionShape2D")
+		if shape:
+			shape.scale *= 1.5
+	else:
+		scale *= 1.5
+		modulate = Color(1.3, 1.0, 0.5, 1.0)
 
 
 func _physics_process(delta: float) -> void:
@@ -224,9 +238,9 @@ func _drop_xp() -> void:
 
 
 func _show_damage_number(amount: float, is_crit: bool = false) -> void:
-	var label: Label = Label.new()
+	var label: Node2D = Node2D.new()
+	label.set_script(_DamageNumberScript)
 	label.text = str(int(amount))
-	label.horizontal_alignment = HORIZONTAL_ALIGNMENT_CENTER
 	label.z_index = 100
 
 	# Random offset so numbers don't stack
@@ -234,23 +248,18 @@ func _show_damage_number(amount: float, is_crit: bool = false) -> void:
 	var offset_y: float = randf_range(-35, -25)
 
 	if is_crit:
-		# Critical hit: yellow, larger font, bolder
-		label.add_theme_color_override("font_color", Color(1.0, 0.9, 0.1))  # Bright yellow
-		label.add_theme_font_size_override("font_size", 28)
+		# Critical hit: large yellow glyphs
+		label.style = "crit"
 		label.global_position = global_position + Vector2(offset_x, offset_y)
 
 		# Also show "CRIT!" text above the damage number
 		_show_crit_label()
 	else:
 		# Normal hit: white, standard size
-		label.add_theme_color_override("font_color", Color.WHITE)
-		label.add_theme_font_size_override("font_size", 18)
+		label.style = "normal"
 		label.global_position = global_position + Vector2(offset_x, offset_y)
 
-	# Add outline for readability
-	label.add_theme_color_override("font_outline_color", Color.BLACK)
-	label.add_theme_constant_override("outline_size", 3)
-
+	# Outlines are baked into the glyph atlas
 	get_tree().current_scene.add_child(label)
 
 	# Float up and fade out
@@ -269,13 +278,10 @@ func _show_damage_number(amount: float, is_crit: bool = false) -> void:
 
 
 func _show_crit_label() -> void:
-	var crit_label: Label = Label.new()
+	var crit_label: Node2D = Node2D.new()
+	crit_label.set_script(_DamageNumberScript)
 	crit_label.text = "CRIT!"
-	crit_label.horizontal_alignment = HORIZONTAL_ALIGNMENT_CENTER
-	crit_label.add_theme_color_override("font_color", Color(1.0, 0.3, 0.1))  # Red-orange
-	crit_label.add_theme_font_size_override("font_size", 14)
-	crit_label.add_theme_color_override("font_outline_color", Color.BLACK)
-	crit_label.add_theme_constant_override("outline_size", 2)
+	crit_label.style = "crit_label"  # Red-orange
 	crit_label.global_position = global_position + Vector2(randf_range(-8, 8), -50)
 	crit_label.z_index = 101
 	get_tree().current_scene.add_child(crit_label)
@@ -15,12 +15,14 @@ const MAGNET_ACCELERATION: float = 300.0
 const MAGNET_MAX_SPEED: float = 250.0
 const ATTRACT_ACCELERATION: float = 400.0
 
-# Tier data: { xp, color, scale }
+# Tier data: { xp, gem_scale, region }
+# Each tier's gem is drawn at its real size in the xp_orb.png strip
+# (XP_ORB_TIERS in generate_sprites.py), so all orbs share one texture.
 const TIER_DATA = {
-	1: {"xp": 1.0, "color": Color(0.3, 0.5, 1.0), "gem_scale": 1.0},       # Blue
-	2: {"xp": 5.0, "color": Color(0.2, 0.9, 0.3), "gem_scale": 1.2},       # Green
-	3: {"xp": 25.0, "color": Color(1.0, 0.2, 0.2), "gem_scale": 1.5},      # Red
-	4: {"xp": 100.0, "color": Color(0.9, 0.9, 1.0), "gem_scale": 2.0},     # Diamond
+	1: {"xp": 1.0, "gem_scale": 1.0, "region": Rect2(0, 0, 12, 12)},       # Blue
+	2: {"xp": 5.0, "gem_scale": 1.2, "region": Rect2(12, 0, 14, 14)},      # Green
+	3: {"xp": 25.0, "gem_scale": 1.5, "region": Rect2(26, 0, 18, 18)},     # Red
+	4: {"xp": 100.0, "gem_scale": 2.0, "region": Rect2(44, 0, 24, 24)},    # Diamond
 }
 
 
@@ -36,14 +38,15 @@ func _ready() -> void:
 func _apply_tier() -> void:
 	var data: Dictionary = TIER_DATA.get(xp_tier, TIER_DATA[1])
 	xp_value = data.xp
-	# Tint the sprite
-	var body: Node = get_node_or_null("Body")
-	if body:
-		body.modulate = data.color
-		body.scale *= data.gem_scale
-	else:
-		modulate = data.color
-		scale *= data.gem_scale
+	# Pick this tier's gem from the shared strip
+	var visual: Sprite2D = get_node_or_null("Visual")
+	if visual:
+		visual.region_enabled = true
+		visual.region_rect = data.region
+	# Bigger gems are still easier to touch
+	var shape: Node2D = get_node_or_null("CollisionShape2D")
+	if shape:
+		shape.scale = Vector2.ONE * data.gem_scale
 
 
 func _physics_process(delta: float) -> void:
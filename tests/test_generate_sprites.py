@@ -0,0 +1,740 @@
+"""Regression gates and unit tests for generate_sprites.py, runnable with `python -m pytest`."""
+
+import hashlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import generate_sprites  # noqa: E402
+
+RED, GREEN, BLUE, WHITE = (255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255), (255, 255, 255, 255)
+CLEAR = (0, 0, 0, 0)
+
+
+def _image(rows):
+    """An RGBA image from rows of RGBA tuples."""
+    return Image.fromarray(np.array(rows, dtype=np.uint8), "RGBA")
+
+
+def _pixels(img):
+    return [[img.getpixel((x, y)) for x in range(img.width)] for y in range(img.height)]
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    out = tmp_path / "sprites"
+    monkeypatch.setattr(generate_sprites, "OUTPUT_DIR", str(out))
+    monkeypatch.setattr(generate_sprites, "MANIFEST_FILE", str(tmp_path / "manifest.json"))
+    return out
+
+
+# Gates
+
+def test_sprites_match_golden_digests():
+    assert generate_sprites.check_golden(), "run --update-golden if the change is intentional"
+
+
+def test_import_loads_no_deferred_modules():
+    code = "import sys, generate_sprites; print(sorted(set(generate_sprites.DEFERRED_MODULES) & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_every_sprite_has_a_bench_baseline():
+    baseline = generate_sprites._load_bench()
+    names = {generate_sprites.sprite_name(gen) for _, gen in generate_sprites.iter_sprites()}
+    assert names <= set(baseline["sprites"])
+
+
+def test_fast_backend_matches_reference_on_fixed_seed(capsys):
+    assert generate_sprites.fuzz_backends(cases=300, seed=1234)
+    assert "OK: 300 random cases" in capsys.readouterr().out
+
+
+# Dithering
+
+def test_bayer_matrix_values_and_size_check():
+    assert generate_sprites.bayer_matrix(2).tolist() == [[0.0, 0.5], [0.75, 0.25]]
+    with pytest.raises(ValueError, match="power of two"):
+        generate_sprites.bayer_matrix(3)
+
+
+def test_dither_fill_picks_first_colour_below_level():
+    img = generate_sprites.new_canvas(4, 2)
+    generate_sprites.dither_fill(img, generate_sprites.rect_mask(img, 0, 0, 3, 1), RED, BLUE, 0.5, "bayer2")
+    assert _pixels(img) == [[RED, BLUE, RED, BLUE], [BLUE, RED, BLUE, RED]]
+
+
+def test_dither_gradient_steps_and_mask():
+    img = generate_sprites.new_canvas(4, 3)
+    mask = generate_sprites.rect_mask(img, 0, 0, 3, 1)
+    field = np.array([[0.0, 0.0, 1.0, 1.0], [0.25, 0.25, 0.25, 0.25], [0.5, 0.5, 0.5, 0.5]])
+    generate_sprites.dither_gradient(img, mask, (RED, GREEN, BLUE), field, "bayer2")
+    # Row 1 sits half way between RED and GREEN: thresholds 0.75 and 0.25 split it
+    assert _pixels(img) == [[RED, RED, BLUE, BLUE], [RED, GREEN, RED, GREEN], [CLEAR] * 4]
+
+
+def test_dither_gradient_accepts_palette_names():
+    img = generate_sprites.new_canvas(2, 1)
+    generate_sprites.dither_gradient(img, np.ones((1, 2), dtype=bool), "steel", np.array([[0.0, 1.0]]))
+    steel = generate_sprites.PALETTES["steel"]
+    assert _pixels(img) == [[steel[0], steel[-1]]]
+
+
+@pytest.mark.parametrize("kernel, expected", [
+    ("floyd-steinberg", [WHITE, RED, WHITE, RED, WHITE, RED]),
+    ("atkinson", [WHITE, RED, RED, WHITE, WHITE, RED]),
+])
+def test_error_diffusion_on_a_flat_half_field(kernel, expected):
+    img = generate_sprites.new_canvas(6, 1)
+    generate_sprites.dither_error_diffusion(img, np.ones((1, 6), dtype=bool), (RED, WHITE),
+                                            np.full((1, 6), 0.5), kernel)
+    assert _pixels(img) == [expected]
+
+
+def test_error_diffusion_keeps_error_inside_the_mask():
+    img = generate_sprites.new_canvas(3, 2)
+    mask = np.array([[True, False, True], [False, False, False]])
+    generate_sprites.dither_error_diffusion(img, mask, (RED, WHITE), np.full((2, 3), 0.5))
+    # Without the masked-out neighbour the right pixel sees no error and rounds up
+    assert _pixels(img) == [[WHITE, CLEAR, WHITE], [CLEAR] * 3]
+
+
+@pytest.mark.parametrize("call, error", [
+    (lambda img: generate_sprites.dither_error_diffusion(img, np.ones((2, 2), dtype=bool), (RED, BLUE),
+                                                         np.zeros((2, 2)), "sierra"), "diffusion kernel"),
+    (lambda img: generate_sprites.dither_fill(img, np.ones((2, 2), dtype=bool), RED, BLUE, 0.5, "zigzag"),
+     "dither pattern"),
+])
+def test_dithering_rejects_unknown_names(call, error):
+    with pytest.raises(ValueError, match=error):
+        call(generate_sprites.new_canvas(2, 2))
+
+
+def test_level_map_half_step_matches_dither_rect():
+    lo, hi = (10, 20, 30, 255), (200, 210, 220, 255)
+    expected = generate_sprites.new_canvas(8, 6)
+    generate_sprites.fill_rect(expected, 0, 0, 7, 5, lo)
+    generate_sprites.dither_rect(expected, 2, 1, 6, 4, hi, lo)
+    actual = generate_sprites.new_canvas(8, 6)
+    mask, field = generate_sprites.level_map(actual, 2, [(0, 0, 7, 5, 0), (2, 1, 6, 4, 0.5)])
+    generate_sprites.dither_gradient(actual, mask, (lo, hi), field, "checker")
+    assert actual.tobytes() == expected.tobytes()
+
+
+def test_reference_dither_matches_textbook_bayer4():
+    bayer4 = [[0, 8, 2, 10], [12, 4, 14, 6], [3, 11, 1, 9], [15, 7, 13, 5]]
+    on, off = (255, 255, 255, 255), (0, 0, 0, 255)
+    img = generate_sprites.new_canvas(8, 8)
+    generate_sprites.dither_rect_reference(img, 0, 0, 7, 7, on, off, "bayer4")
+    for y in range(8):
+        for x in range(8):
+            assert img.getpixel((x, y)) == (on if bayer4[y % 4][x % 4] < 8 else off), (x, y)
+
+
+def test_reference_dither_rejects_unknown_pattern_like_fast():
+    for backend in ("reference", "fast"):
+        img = generate_sprites.new_canvas(4, 4)
+        dither = generate_sprites.PRIMITIVE_BACKENDS[backend]["dither_rect"]
+        with pytest.raises(ValueError, match="Unknown dither pattern 'zigzag'"):
+            dither(img, 5, 5, 2, 2, (1, 1, 1, 255), (2, 2, 2, 255), "zigzag")
+
+
+# Radial fields
+
+def test_radial_field_is_euclidean_distance():
+    img = generate_sprites.new_canvas(3, 2)
+    field = generate_sprites.radial_field(img, 0, 0)
+    assert np.allclose(field, [[0.0, 1.0, 2.0], [1.0, 2 ** 0.5, 5 ** 0.5]])
+
+
+def test_band_lookup_behaves_like_an_elif_chain():
+    values = generate_sprites.band_lookup(np.array([0.5, 1.0, 1.9, 2.0, 7.0]), [1.0, 2.0], ["a", "b", "c"])
+    assert values.tolist() == ["a", "b", "b", "c", "c"]
+
+
+@pytest.mark.parametrize("curve, expected", [
+    ("linear", [1.0, 1.0, 0.5, 0.0, 0.0]),
+    ("quadratic", [1.0, 1.0, 0.25, 0.0, 0.0]),
+    ("smooth", [1.0, 1.0, 0.5, 0.0, 0.0]),
+])
+def test_falloff_curves(curve, expected):
+    dist = np.array([0.0, 1.0, 2.0, 3.0, 9.0])
+    assert np.allclose(generate_sprites.falloff(dist, 1.0, 3.0, curve), expected)
+
+
+def test_falloff_rejects_unknown_curve():
+    with pytest.raises(ValueError, match="falloff curve"):
+        generate_sprites.falloff(np.zeros(1), 0.0, 1.0, "cubic")
+
+
+def test_shade_radial_bands_match_concentric_ellipses():
+    colors = [(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255), (9, 9, 9, 128)]
+    expected = generate_sprites.new_canvas(12, 12)
+    for i, color in enumerate(reversed(colors)):
+        generate_sprites.draw_ellipse_filled(expected, i, i, 11 - i, 11 - i, color)
+    actual = generate_sprites.new_canvas(12, 12)
+    generate_sprites.shade_radial(actual, 5.5, 5.5, 5.5, colors, r_inner=1.5)
+    assert actual.tobytes() == expected.tobytes()
+
+
+def test_paint_radial_fades_alpha_between_radii():
+    img = generate_sprites.new_canvas(9, 1)
+    generate_sprites.paint_radial(img, 4, 0, 4.0, (10, 20, 30, 200), r_inner=2.0)
+    alphas = [img.getpixel((x, 0))[3] for x in range(9)]
+    assert alphas == [0, 100, 200, 200, 200, 200, 200, 100, 0]
+    assert img.getpixel((4, 0)) == (10, 20, 30, 200)
+
+
+# Lines and polylines
+
+@pytest.mark.parametrize("vertices", [[], [(1, 1)]])
+def test_polyline_needs_two_vertices(vertices):
+    img = generate_sprites.new_canvas(4, 4)
+    with pytest.raises(ValueError, match="at least 2 vertices"):
+        generate_sprites.draw_polyline(img, vertices, (255, 255, 255, 255))
+
+
+def test_polyline_glow_surrounds_stroke():
+    stroke, glow = (255, 255, 255, 255), (40, 40, 40, 255)
+    img = generate_sprites.new_canvas(7, 5)
+    generate_sprites.draw_polyline(img, [(1, 2), (5, 2)], stroke, glow_radius=1, glow_color=glow)
+    for x in range(7):
+        for y in range(5):
+            if y == 2 and 1 <= x <= 5:
+                expected = stroke
+            elif abs(y - 2) <= 1 and 0 <= x <= 6 and (x in range(1, 6) or y == 2):
+                expected = glow
+            else:
+                expected = (0, 0, 0, 0)
+            assert img.getpixel((x, y)) == expected, (x, y)
+
+
+def test_polyline_without_glow_matches_plain_points():
+    path = [(0, 0), (3, 2), (3, 5)]
+    plain = generate_sprites.new_canvas(6, 6)
+    generate_sprites.paint_points(plain, generate_sprites.polyline_points(path), (9, 9, 9, 255))
+    drawn = generate_sprites.new_canvas(6, 6)
+    generate_sprites.draw_polyline(drawn, path, (9, 9, 9, 255))
+    assert drawn.tobytes() == plain.tobytes()
+
+
+# Layer stack
+
+def _flatten(bottom, top, mode):
+    layers = []
+    generate_sprites.new_layer(layers, (1, 1)).putpixel((0, 0), bottom)
+    generate_sprites.new_layer(layers, (1, 1), mode).putpixel((0, 0), top)
+    return generate_sprites.flatten_layers(layers).getpixel((0, 0))
+
+
+@pytest.mark.parametrize("bottom, top, mode, expected", [
+    (RED, (0, 0, 255, 128), "over", (127, 0, 128, 255)),
+    (CLEAR, (0, 0, 255, 128), "over", (0, 0, 255, 128)),
+    ((100, 0, 0, 255), (100, 50, 0, 255), "add", (200, 50, 0, 255)),
+    ((200, 0, 0, 255), (100, 0, 0, 255), "add", (255, 0, 0, 255)),
+    ((200, 100, 50, 255), (128, 255, 0, 255), "multiply", (100, 100, 0, 255)),
+    (CLEAR, CLEAR, "multiply", CLEAR),
+])
+def test_layer_blend_modes(bottom, top, mode, expected):
+    assert _flatten(bottom, top, mode) == expected
+
+
+def test_new_layer_rejects_unknown_mode():
+    with pytest.raises(ValueError, match="blend mode"):
+        generate_sprites.new_layer([], (1, 1), "screen")
+
+
+# Pixel-art scaling
+
+def _scale2x_brute_force(img):
+    """EPX written out per pixel, edges replicated."""
+    w, h = img.size
+    get = lambda x, y: img.getpixel((min(max(x, 0), w - 1), min(max(y, 0), h - 1)))  # noqa: E731
+    out = Image.new("RGBA", (2 * w, 2 * h))
+    for y in range(h):
+        for x in range(w):
+            b, d, e, f, hh = get(x, y - 1), get(x - 1, y), get(x, y), get(x + 1, y), get(x, y + 1)
+            core = b != hh and d != f
+            out.putpixel((2 * x, 2 * y), d if core and d == b else e)
+            out.putpixel((2 * x + 1, 2 * y), f if core and b == f else e)
+            out.putpixel((2 * x, 2 * y + 1), d if core and d == hh else e)
+            out.putpixel((2 * x + 1, 2 * y + 1), f if core and hh == f else e)
+    return out
+
+
+def _random_sprite(seed, w, h, colours=(CLEAR, RED, BLUE)):
+    rng = random.Random(seed)
+    return _image([[rng.choice(colours) for _ in range(w)] for _ in range(h)])
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_scale2x_matches_brute_force(seed):
+    img = _random_sprite(seed, 7, 5)
+    assert generate_sprites.scale2x(img).tobytes() == _scale2x_brute_force(img).tobytes()
+
+
+def test_rescale_pixel_art_adds_no_colours():
+    img = _random_sprite("elite", 10, 8)
+    out = generate_sprites.rescale_pixel_art(img, 1.5)
+    assert out.size == (15, 12)
+    assert {c for _, c in out.getcolors()} <= {c for _, c in img.getcolors()}
+
+
+# Godot .import sidecars
+
+@pytest.fixture
+def godot_project(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_sprites, "GODOT_PROJECT_DIR", str(tmp_path))
+    (tmp_path / "art").mkdir()
+    return tmp_path
+
+
+def test_import_file_written_with_stable_uid(godot_project):
+    png = str(godot_project / "art" / "hero.png")
+    assert generate_sprites.write_import_file(png)
+    text = open(png + ".import", encoding="utf-8").read()
+    uid = generate_sprites.godot_uid("res://art/hero.png")
+    assert f'uid="{uid}"' in text
+    assert 'source_file="res://art/hero.png"' in text
+    ctex = f"res://.godot/imported/hero.png-{hashlib.md5(b'res://art/hero.png').hexdigest()}.ctex"
+    assert f'path="{ctex}"' in text and "mipmaps/generate=false" in text
+    assert not generate_sprites.write_import_file(png)
+
+
+def test_import_file_keeps_uid_godot_assigned(godot_project):
+    png = str(godot_project / "art" / "hero.png")
+    with open(png + ".import", "w", encoding="utf-8") as f:
+        f.write('[remap]\n\nuid="uid://b60y3nm46ngbg"\n')
+    assert generate_sprites.write_import_file(png)
+    assert 'uid="uid://b60y3nm46ngbg"' in open(png + ".import", encoding="utf-8").read()
+
+
+def test_import_file_skipped_outside_project(godot_project, tmp_path_factory):
+    png = str(tmp_path_factory.mktemp("elsewhere") / "hero.png")
+    assert not generate_sprites.write_import_file(png)
+    assert not os.path.exists(png + ".import")
+
+
+def _committed_uids():
+    for dirpath, dirnames, filenames in os.walk(ROOT):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in filenames:
+            if name.endswith((".import", ".uid")):
+                with open(os.path.join(dirpath, name), encoding="utf-8") as f:
+                    for token in f.read().replace('"', " ").split():
+                        if token.startswith("uid://"):
+                            yield name, token
+
+
+def test_uid_alphabet_matches_existing_sidecars():
+    alphabet = set(generate_sprites._UID_CHARS)
+    assert len(alphabet) == 34 and not {"z", "9"} & alphabet
+    uids = dict(_committed_uids())
+    assert len(uids) > 90
+    for name, uid in uids.items():
+        assert set(uid[len("uid://"):]) <= alphabet, name
+    for path in ("res://assets/sprites/knight.png", "res://scripts/Game.gd"):
+        assert set(generate_sprites.godot_uid(path)[len("uid://"):]) <= alphabet
+
+
+def test_existing_uid_outside_godot_alphabet_is_replaced(tmp_path):
+    sidecar = tmp_path / "x.png.import"
+    sidecar.write_text('[remap]\n\nuid="uid://9cm99syi4afe"\n', encoding="utf-8")
+    assert generate_sprites._existing_uid(str(sidecar)) is None
+    sidecar.write_text('[remap]\n\nuid="uid://b60y3nm46ngbg"\n', encoding="utf-8")
+    assert generate_sprites._existing_uid(str(sidecar)) == "uid://b60y3nm46ngbg"
+
+
+def test_write_sprite_skips_same_pixels_in_other_encoding(output_dir):
+    output_dir.mkdir()
+    path = str(output_dir / "dot.png")
+    img = _image([[RED, BLUE]])
+    data, changed = generate_sprites.write_sprite(path, generate_sprites.encode_png(img), img)
+    assert changed and open(path, "rb").read() == data
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", compress_level=0)
+    data, changed = generate_sprites.write_sprite(path, buf.getvalue(), img)
+    assert not changed and data != buf.getvalue()
+
+
+# Build stages
+
+def test_normal_map_is_flat_inside_and_slopes_at_edges():
+    img = _image([[WHITE] * 9] * 9)
+    img = generate_sprites.normal_map(generate_sprites.rescale_pixel_art(img, 1))
+    assert img.getpixel((4, 4)) == (128, 128, 255, 255)
+    assert img.getpixel((0, 4))[0] < 128 < img.getpixel((8, 4))[0]
+    assert img.getpixel((4, 8))[1] < 128 < img.getpixel((4, 0))[1]
+
+
+def test_normal_map_keeps_transparent_pixels_flat():
+    out = generate_sprites.stage_normal_maps("dot.png", _image([[CLEAR, RED, CLEAR]]))
+    assert list(out) == ["dot_n.png"]
+    assert out["dot_n.png"].getpixel((0, 0)) == (128, 128, 255, 0)
+
+
+def test_sdf_of_a_single_pixel():
+    img = generate_sprites.new_canvas(5, 5)
+    img.putpixel((2, 2), WHITE)
+    sdf = generate_sprites.sdf_image(img)
+    assert sdf.mode == "L" and sdf.size == (5, 5)
+    # Centre: half a pixel inside the edge; neighbours: half a pixel outside
+    assert sdf.getpixel((2, 2)) == 136
+    assert sdf.getpixel((1, 2)) == sdf.getpixel((2, 3)) == 120
+    assert sdf.getpixel((0, 0)) == round(128 - (8 ** 0.5 - 0.5) * 127 / 8)
+
+
+def test_sdf_stage_only_for_listed_sprites():
+    img = _image([[RED]])
+    assert generate_sprites.stage_sdf("rock.png", img) == {}
+    assert list(generate_sprites.stage_sdf("shield.png", img)) == ["shield_sdf.png"]
+
+
+def test_rotsprite_frames_turn_clockwise():
+    img = _random_sprite("rot", 7, 5)
+    frames = generate_sprites.rotsprite_frames(img, 4)
+    # hypot(7, 5) rounds up to a 9 px cell; the sprite sits centred in frame 0
+    assert frames.shape == (4, 9, 9)
+    assert np.array_equal(frames[0, 2:7, 1:8], generate_sprites._packed(img))
+    assert np.array_equal(frames[1], np.rot90(frames[0], -1))
+    assert np.array_equal(frames[2], np.rot90(frames[0], 2))
+
+
+def test_rotsprite_sheet_layout():
+    img = _random_sprite("sheet", 4, 4)
+    sheets = generate_sprites.stage_rotsprite("bone.png", img)
+    assert list(sheets) == ["bone_rot16.png"]
+    # 16 frames of a 6 px cell, ROTSPRITE_COLUMNS to a row
+    assert sheets["bone_rot16.png"].size == (6 * generate_sprites.ROTSPRITE_COLUMNS, 6 * 2)
+    assert generate_sprites.stage_rotsprite("rock.png", img) == {}
+
+
+def test_upscale_stage_names_and_pixels():
+    img = _random_sprite("hd", 5, 4)
+    out = generate_sprites.stage_upscale("shield.png", img)
+    assert sorted(out) == ["shield@2x.png", "shield@3x.png"]
+    assert out["shield@2x.png"].tobytes() == _scale2x_brute_force(img).tobytes()
+    assert out["shield@3x.png"].size == (15, 12)
+    assert generate_sprites.stage_upscale("knight.png", img) == {}
+
+
+def test_bloom_glows_around_bright_pixels_only():
+    img = generate_sprites.new_canvas(3, 3)
+    img.putpixel((1, 1), WHITE)
+    img.putpixel((0, 0), (40, 40, 40, 255))
+    out = generate_sprites.stage_bloom("crystal.png", img)
+    glow, bloom = out["crystal_glow.png"], out["crystal_bloom.png"]
+    pad = len(generate_sprites.gaussian_kernel(generate_sprites.BLOOM_SIGMA)) // 2
+    assert glow.size == bloom.size == (3 + 2 * pad, 3 + 2 * pad)
+    alpha = np.asarray(glow)[..., 3]
+    assert alpha.argmax() == np.ravel_multi_index((pad + 1, pad + 1), alpha.shape)
+    assert alpha[pad, pad] < alpha[pad + 1, pad + 1]
+    assert bloom.getpixel((pad + 1, pad + 1)) == WHITE
+    assert generate_sprites.stage_bloom("knight.png", img) == {}
+
+
+def test_bloom_ignores_dark_sprites():
+    img = _image([[(40, 40, 40, 255)] * 3] * 3)
+    assert not np.asarray(generate_sprites.glow_layer(img))[..., 3].any()
+
+
+def test_drop_shadow_geometry():
+    img = _image([[RED] * 4] * 4)
+    shadow, composite, pivot = generate_sprites.drop_shadow(img)
+    # The feet span 4 px, so a 2 x 1 px ellipse sits under them, padded by the blur
+    assert shadow.size == composite.size == (10, 8)
+    assert pivot == (5.0, 2.0)
+    assert composite.getpixel((4, 1)) == RED
+    alpha = np.asarray(shadow)[..., 3]
+    assert 0 < alpha.max() <= round(generate_sprites.SHADOW_ALPHA * 255)
+    assert not alpha[0].any() and np.array_equal(alpha, alpha[:, ::-1])
+
+
+def test_shadow_stage_records_pivot():
+    out = generate_sprites.stage_shadow("knight.png", _image([[RED] * 4] * 4))
+    assert sorted(out) == ["knight_shadow.png", "knight_shadowed.png"]
+    assert out["knight_shadow.png"].info["pivot"] == out["knight_shadowed.png"].info["pivot"] == (5.0, 2.0)
+    assert generate_sprites.stage_shadow("arrow.png", _image([[RED]])) == {}
+
+
+def test_palette_indices_and_lut_rows():
+    _, slices = generate_sprites.palette_slots()
+    steel = generate_sprites.PALETTES["steel"]
+    img = _image([[CLEAR, steel[0], steel[5]]])
+    out = generate_sprites.stage_palette("knight.png", img)
+    index = out["knight_idx.png"]
+    assert index.mode == "L"
+    assert [index.getpixel((x, 0)) for x in range(3)] == [0, slices["steel"].start, slices["steel"].start + 5]
+    lut = out[generate_sprites.PALETTE_LUT_FILE]
+    assert lut.size == (generate_sprites.PALETTE_LUT_WIDTH, len(generate_sprites.PALETTE_VARIANTS))
+    assert lut.info["variants"] == tuple(generate_sprites.PALETTE_VARIANTS)
+    crimson_row = list(generate_sprites.PALETTE_VARIANTS).index("crimson")
+    assert lut.getpixel((slices["steel"].start, crimson_row)) == generate_sprites.PALETTES["crimson"][0]
+    assert lut.getpixel((slices["steel"].start, 0)) == steel[0]
+
+
+def test_palette_indices_reject_unknown_colours():
+    with pytest.raises(ValueError, match="outside the palette LUT"):
+        generate_sprites.palette_indices(_image([[(1, 2, 3, 255)]]))
+
+
+# Elite sheets and damage glyphs
+
+@pytest.mark.parametrize("base", ["slime", "skeleton", "armored_knight"])
+def test_elite_sheet_scales_base_and_uses_gold(base):
+    source = generate_sprites.render(base)[f"{base}.png"]
+    elite = generate_sprites.render(f"{base}_elite")[f"{base}_elite.png"]
+    assert elite.size == (round(source.width * 1.5), round(source.height * 1.5))
+    gold = {tuple(int(v) for v in c) for c in generate_sprites.palette_array("elite_gold")}
+    colours = {c for _, c in elite.getcolors(4096)}
+    assert len(colours & gold) >= 3
+    assert colours <= gold | {c for _, c in source.getcolors(4096)}
+
+
+def test_damage_glyph_atlas_and_metrics_agree():
+    images, files = generate_sprites.render_outputs("damage_glyphs")
+    atlas = images["damage_glyphs.png"]
+    metrics = json.loads(files["damage_glyphs.json"])
+    assert metrics["texture"] == "res://assets/sprites/damage_glyphs.png"
+    styles = {s[0]: s for s in generate_sprites.DAMAGE_GLYPH_STYLES}
+    for style, info in metrics["styles"].items():
+        _, glyphs, scale, outline, fill, shade = styles[style]
+        assert list(info["glyphs"]) == list(glyphs) and info["outline"] == outline
+        for text, g in info["glyphs"].items():
+            assert g["x"] + g["w"] <= atlas.width and g["y"] + g["h"] <= atlas.height
+            cell = atlas.crop((g["x"], g["y"], g["x"] + g["w"], g["y"] + g["h"]))
+            assert {c for _, c in cell.getcolors()} <= {CLEAR, generate_sprites.DAMAGE_GLYPH_OUTLINE, fill, shade}
+            assert g["advance"] == g["w"] - 2 * outline + scale
+    assert metrics["styles"]["normal"]["glyphs"]["1"]["w"] < metrics["styles"]["normal"]["glyphs"]["8"]["w"]
+
+
+# Manifest and write pipeline
+
+def test_build_writes_stage_outputs_and_manifest(output_dir, godot_project):
+    events = []
+    generate_sprites.build(["fireball", "knight", "slime"], workers=2, events=events.append,
+                           stages=["bloom", "shadow", "palette"])
+    with open(generate_sprites.MANIFEST_FILE, encoding="utf-8") as f:
+        manifest = json.load(f)
+    entries = {e["file"]: e for e in manifest["sprites"]}
+    assert manifest["generator_version"] == generate_sprites.generator_version()
+    assert {"fireball.png", "fireball_glow.png", "fireball_bloom.png", "fireball_idx.png",
+            "knight_shadow.png", "knight_shadowed.png", "knight_idx.png", "palette_lut.png"} <= set(entries)
+    assert "fireball_shadow.png" not in entries
+    for name, entry in entries.items():
+        data = (output_dir / name).read_bytes()
+        assert entry["sha256"] == hashlib.sha256(data).hexdigest() and entry["bytes"] == len(data)
+        assert os.path.exists(output_dir / (name + ".import"))
+    assert entries["knight_shadowed.png"]["stage"] == "shadow"
+    assert entries["knight_shadowed.png"]["source"] == "knight.png"
+    assert len(entries["knight_shadowed.png"]["pivot"]) == 2
+    assert entries["palette_lut.png"]["variants"] == list(generate_sprites.PALETTE_VARIANTS)
+    # The LUT is shared by every palette sprite but written once
+    kinds = [e["event"] for e in events]
+    assert kinds[0] == "build_start" and kinds[-1] == "build_end"
+    assert kinds.count("sprite") == len(entries)
+    assert [e["file"] for e in events if e["event"] == "sprite"].count("palette_lut.png") == 1
+    assert events[-1]["sprites"] == 3
+
+
+def test_manifest_drops_files_that_no_longer_exist(output_dir):
+    generate_sprites.build(["slime", "rock"], workers=1)
+    os.remove(output_dir / "rock.png")
+    generate_sprites.build(["slime"], workers=1)
+    with open(generate_sprites.MANIFEST_FILE, encoding="utf-8") as f:
+        files = [e["file"] for e in json.load(f)["sprites"]]
+    assert files == ["slime.png"]
+
+
+def test_build_reports_unchanged_files_and_counts_only_sprites(output_dir, capsys):
+    first = generate_sprites.build(["shield", "slime"], workers=2, stages=["sdf"])
+    assert first == {"sprites": 2, "written": 3, "unchanged": 0}
+    report = capsys.readouterr().out
+    assert "Created: shield.png (16x16)" in report and "+ shield_sdf.png (sdf, created)" in report
+
+    second = generate_sprites.build(["shield", "slime"], workers=2, stages=["sdf"])
+    assert second == {"sprites": 2, "written": 0, "unchanged": 3}
+    report = capsys.readouterr().out
+    assert "Created" not in report
+    assert "Unchanged: slime.png (24x24)" in report and "+ shield_sdf.png (sdf, unchanged)" in report
+
+
+def test_save_reports_unchanged_sprite(output_dir, capsys):
+    output_dir.mkdir()
+    img = generate_sprites.new_canvas(3, 2)
+    generate_sprites.save(img, "dot.png")
+    generate_sprites.save(img, "dot.png")
+    assert capsys.readouterr().out.splitlines() == ["  Created: dot.png (3x2)", "  Unchanged: dot.png (3x2)"]
+
+
+def test_write_pipeline_reports_failures(tmp_path):
+    items = [(str(tmp_path / "missing" / "a.png"), generate_sprites.new_canvas(2, 2))]
+    with pytest.raises(RuntimeError, match="failed to write 1 file"):
+        generate_sprites.write_pipeline(iter(items), workers=1)
+
+
+# Watch mode
+
+WATCHED = '''"""Module docstring."""
+import os
+
+SIZE = 4
+TABLE = {"a": SIZE}
+
+
+@decorator
+def helper():
+    """Doc
+
+not a new chunk"""
+    return TABLE
+
+
+def generate_thing():
+    return helper(
+)
+'''
+
+
+def test_split_chunks_keeps_decorators_strings_and_brackets_together():
+    chunks = generate_sprites._split_chunks(WATCHED)
+    assert [line for line, _ in chunks] == [1, 2, 4, 5, 8, 16]
+    assert chunks[4][1].startswith("@decorator\ndef helper():") and "not a new chunk" in chunks[4][1]
+    assert chunks[5][1].endswith("return helper(\n)\n")
+    assert "".join(text for _, text in chunks) == WATCHED
+
+
+def test_chunk_units_names_and_references():
+    units = generate_sprites._scan_source(WATCHED, {})
+    assert set(units) == {"os", "SIZE", "TABLE", "helper", "generate_thing"}
+    assert {"TABLE"} <= units["helper"][1] and {"SIZE"} <= units["TABLE"][1]
+    assert units["generate_thing"][2].lineno == 16
+
+
+def test_chunk_units_report_source_line_of_syntax_errors():
+    with pytest.raises(SyntaxError) as err:
+        generate_sprites._chunk_units("def broken(:\n    pass\n", first_line=40)
+    assert err.value.lineno == 40
+
+
+def test_scan_source_reparses_only_edited_chunks():
+    cache = {}
+    before = generate_sprites._scan_source(WATCHED, cache)
+    edited = WATCHED.replace('{"a": SIZE}', '{"a": SIZE, "b": 1}')
+    after = generate_sprites._scan_source(edited, cache)
+    assert len(cache) == 7
+    changed = {name for name in after if after[name][0] != before[name][0]}
+    assert changed == {"TABLE"}
+    assert generate_sprites._affected_generators(after, changed) == {"generate_thing"}
+
+
+def test_comment_edits_change_nothing():
+    cache = {}
+    before = generate_sprites._scan_source(WATCHED, cache)
+    after = generate_sprites._scan_source(WATCHED.replace("    return TABLE", "    return TABLE  # note"), cache)
+    assert all(after[name][0] == before[name][0] for name in after)
+
+
+def test_dependent_assignments_follow_aliases():
+    units = generate_sprites._scan_source("def fast():\n    pass\npx = fast\nTABLE = {'px': px}\nOTHER = 1\n", {})
+    assert generate_sprites._dependent_assignments(units, {"fast"}) == {"fast", "px", "TABLE"}
+
+
+# Render daemon
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def test_daemon_ping_and_list(pool):
+    header, payloads = generate_sprites.handle_request({"cmd": "ping"}, pool)
+    assert header == {"ok": True, "pid": os.getpid()} and payloads == []
+    header, _ = generate_sprites.handle_request({"cmd": "list"}, pool)
+    assert header["sprites"]["aura"] == {"category": "Weapon Effects", "params": {"size": 64}}
+    with pytest.raises(ValueError, match="Unknown command"):
+        generate_sprites.handle_request({"cmd": "shutdown"}, pool)
+
+
+def test_daemon_renders_variants_in_memory(pool):
+    request = {"cmd": "render", "sprites": ["lightning"], "seed": 7, "variants": 2}
+    header, payloads = generate_sprites.handle_request(request, pool)
+    assert [e["name"] for e in header["images"]] == ["lightning_007.png", "lightning_008.png"]
+    for entry, data in zip(header["images"], payloads):
+        assert entry["bytes"] == len(data)
+        assert Image.open(io.BytesIO(data)).size == (entry["width"], entry["height"])
+    assert payloads[0] != payloads[1]
+
+
+def test_daemon_rejects_unknown_params(pool):
+    with pytest.raises(ValueError, match="does not accept: colour"):
+        generate_sprites.handle_request({"cmd": "render", "sprites": ["aura"], "params": {"colour": 1}}, pool)
+
+
+def test_daemon_writes_inside_output_dir(output_dir, pool):
+    request = {"cmd": "render", "sprites": ["slime"], "write": True, "output_dir": "variants"}
+    header, payloads = generate_sprites.handle_request(request, pool)
+    (entry,) = header["images"]
+    assert payloads == [] and entry["path"] == str(output_dir / "variants" / "slime.png")
+    assert os.path.exists(entry["path"])
+
+
+@pytest.mark.parametrize("out", ["..", "../elsewhere", "variants/../../x", "/tmp"])
+def test_daemon_refuses_output_dir_outside(output_dir, pool, out):
+    request = {"cmd": "render", "sprites": ["slime"], "write": True, "output_dir": out}
+    with pytest.raises(ValueError, match="output_dir must be inside"):
+        generate_sprites.handle_request(request, pool)
+
+
+def test_daemon_refuses_symlink_out_of_output_dir(output_dir, pool, tmp_path):
+    output_dir.mkdir()
+    os.symlink(tmp_path, output_dir / "link")
+    with pytest.raises(ValueError, match="output_dir must be inside"):
+        generate_sprites._request_output_dir({"output_dir": "link"})
+
+
+@pytest.mark.parametrize("variants, error", [
+    (generate_sprites.DAEMON_MAX_RENDERS + 1, "limit is"),
+    (10 ** 9, "limit is"),
+    (0, "at least 1"),
+    (-3, "at least 1"),
+])
+def test_daemon_rejects_bad_variant_counts(variants, error):
+    request = {"cmd": "render", "sprites": ["lightning"], "seed": 1, "variants": variants}
+    with pytest.raises(ValueError, match=error):
+        generate_sprites.handle_request(request, pool=None)
+
+
+def test_daemon_limit_counts_every_sprite():
+    half = generate_sprites.DAEMON_MAX_RENDERS // 2 + 1
+    request = {"cmd": "render", "sprites": ["lightning", "slime"], "seed": 1, "variants": half}
+    with pytest.raises(ValueError, match="limit is"):
+        generate_sprites.handle_request(request, pool=None)
+
+
+# Signed distances
+
+@pytest.mark.parametrize("shape", [(1, 1), (1, 9), (7, 1), (6, 6), (11, 17), (20, 13)])
+@pytest.mark.parametrize("density", [0.03, 0.3, 0.9])
+def test_squared_distance_matches_brute_force(shape, density):
+    rng = random.Random(f"{shape}-{density}")
+    h, w = shape
+    feature = [[rng.random() < density for _ in range(w)] for _ in range(h)]
+    feature[rng.randrange(h)][rng.randrange(w)] = True
+    points = [(y, x) for y in range(h) for x in range(w) if feature[y][x]]
+    expected = [[min((y - fy) ** 2 + (x - fx) ** 2 for fy, fx in points) for x in range(w)] for y in range(h)]
+    actual = generate_sprites._squared_distance_to(np.array(feature))
+    assert actual.tolist() == expected